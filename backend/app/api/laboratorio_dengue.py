@@ -1,21 +1,159 @@
-from fastapi import APIRouter
+from datetime import date
+from typing import Optional
+
+from fastapi import APIRouter, HTTPException, Request, Response
+from fastapi.responses import StreamingResponse
 from app.services.laboratorio_dengue_service import LaboratorioDengueService
+from app.services.refresco import RefrescoDataset
 
 router = APIRouter()
 
-service = LaboratorioDengueService(max_workers=4, chunk_size=500)
+# Workers y tamaño de chunk salen de Settings o se calculan (ver planificacion)
+service = LaboratorioDengueService()
+# Se inicia en el lifespan de la app (main.py) si REFRESCO_SEGUNDO_PLANO está activo
+refresco = RefrescoDataset(service)
+
+CABECERA_VERSION = 'X-Dataset-Version'
+
+def cabeceras_version(version: Optional[str]) -> dict:
+    '''Versión de los datos como cabecera propia y como ETag, para revalidar con If-None-Match.'''
+    if version is None:
+        return {}
+    return {CABECERA_VERSION: version, 'ETag': f'"{version}"', 'Cache-Control': 'no-cache'}
+
+def no_modificado(request: Request, version: Optional[str]) -> bool:
+    '''True si el cliente ya tiene esta versión (If-None-Match con su ETag).'''
+    if version is None:
+        return False
+    etiquetas = [e.strip().removeprefix('W/') for e in request.headers.get('if-none-match', '').split(',')]
+    return f'"{version}"' in etiquetas or '*' in etiquetas
 
 @router.get('/laboratorio-dengue/raw')
-async def laboratorio_dengue_raw():
-    '''Obtiene datos raw sin procesar.'''
-    return await service.obtener_datos_raw()
+async def laboratorio_dengue_raw(
+    fecha_desde: Optional[date] = None,
+    fecha_hasta: Optional[date] = None,
+    departamento: Optional[str] = None,
+    localidad: Optional[str] = None,
+    resultado_pcr: Optional[str] = None
+):
+    '''Obtiene datos raw sin procesar.
+
+    Todos los filtros se resuelven en el WHERE: las fechas sobre
+    fecha_recepcion y departamento, localidad y resultado_pcr contra los
+    valores raw tal como están cargados (en /procesados son los normalizados).
+    '''
+    return await service.obtener_datos_raw(
+        fecha_desde=fecha_desde,
+        fecha_hasta=fecha_hasta,
+        departamento=departamento,
+        localidad=localidad,
+        resultado_pcr=resultado_pcr
+    )
+
+@router.get('/laboratorio-dengue/version')
+async def laboratorio_dengue_version(response: Response):
+    '''Huella de la tabla (filas, último id y created_at) y versión de los datos que se entregarían.'''
+    huella = await service.huella()
+    version = await service.version_actual()
+    response.headers.update(cabeceras_version(version))
+    return {
+        **huella.describir(),
+        'version': version,
+        'version_tabla': huella.version,
+        'version_mapeos': service.describir_mapeos()['version'],
+        'version_en_memoria': service.version_dataset(),
+    }
+
+@router.get('/laboratorio-dengue/filtros')
+async def laboratorio_dengue_filtros(request: Request, response: Response):
+    '''Valores posibles de los filtros de /procesados y rango de fechas (304 si el cliente ya tiene la versión vigente).'''
+    version = await service.version_vigente()
+    if no_modificado(request, version):
+        return Response(status_code=304, headers=cabeceras_version(version))
+    
+    opciones, version = await service.obtener_opciones_filtro()
+    response.headers.update(cabeceras_version(version))
+    return opciones
 
 @router.get('/laboratorio-dengue/procesados')
-async def laboratorio_dengue_procesados():
-    '''Obtiene datos procesados y normalizados usando Polars y ProcessPoolExecutor.'''
-    return await service.obtener_datos_procesados()
+async def laboratorio_dengue_procesados(
+    request: Request,
+    response: Response,
+    fecha_desde: Optional[date] = None,
+    fecha_hasta: Optional[date] = None,
+    departamento: Optional[str] = None,
+    localidad: Optional[str] = None,
+    resultado_pcr: Optional[str] = None
+):
+    '''Obtiene datos procesados y normalizados usando Polars y ProcessPoolExecutor.
+
+    Las fechas filtran fecha_recepcion; departamento, localidad y resultado_pcr
+    se comparan contra los valores normalizados. Con If-None-Match de la
+    versión vigente responde 304 sin tocar el dataset.
+    '''
+    version = await service.version_vigente()
+    if no_modificado(request, version):
+        return Response(status_code=304, headers=cabeceras_version(version))
+    
+    datos, version = await service.obtener_datos_versionados(
+        fecha_desde=fecha_desde,
+        fecha_hasta=fecha_hasta,
+        departamento=departamento,
+        localidad=localidad,
+        resultado_pcr=resultado_pcr
+    )
+    response.headers.update(cabeceras_version(version))
+    return datos
+
+@router.get('/laboratorio-dengue/procesados/stream')
+async def laboratorio_dengue_procesados_stream(
+    fecha_desde: Optional[date] = None,
+    fecha_hasta: Optional[date] = None,
+    departamento: Optional[str] = None,
+    localidad: Optional[str] = None,
+    resultado_pcr: Optional[str] = None
+):
+    '''Mismos datos que /procesados, como NDJSON procesado y enviado por lotes (memoria acotada).'''
+    # Una vez empezada la respuesta ya no se puede contestar 503
+    service.ejecutor.verificar_admision()
+    version = await service.version_actual()
+    return StreamingResponse(
+        service.stream_procesados_ndjson(
+            fecha_desde=fecha_desde,
+            fecha_hasta=fecha_hasta,
+            departamento=departamento,
+            localidad=localidad,
+            resultado_pcr=resultado_pcr
+        ),
+        media_type='application/x-ndjson',
+        headers=cabeceras_version(version)
+    )
 
 @router.get('/laboratorio-dengue/kpis')
-async def laboratorio_dengue_kpis():
-    '''Obtiene KPIs básicos calculados sobre los datos procesados.'''
-    return await service.obtener_kpis_basicos()
+async def laboratorio_dengue_kpis(
+    request: Request,
+    response: Response,
+    fecha_desde: Optional[date] = None,
+    fecha_hasta: Optional[date] = None
+):
+    '''Obtiene KPIs básicos agregados en la base de datos (304 si el cliente ya tiene la versión de la tabla actual).'''
+    version = await service.version_actual()
+    if no_modificado(request, version):
+        return Response(status_code=304, headers=cabeceras_version(version))
+    
+    kpis, version = await service.obtener_kpis_versionados(fecha_desde=fecha_desde, fecha_hasta=fecha_hasta)
+    response.headers.update(cabeceras_version(version))
+    return kpis
+
+@router.get('/laboratorio-dengue/mapeos')
+async def laboratorio_dengue_mapeos():
+    '''Versión de las tablas de normalización en uso.'''
+    return service.describir_mapeos()
+
+@router.post('/laboratorio-dengue/mapeos/recargar')
+async def laboratorio_dengue_recargar_mapeos():
+    '''Recarga las tablas de normalización desde sus archivos sin reiniciar el servicio.'''
+    try:
+        return await service.recargar_mapeos()
+    except (OSError, ValueError) as e:
+        raise HTTPException(status_code=400, detail=f'No se pudieron recargar las tablas: {e}')
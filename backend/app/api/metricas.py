@@ -0,0 +1,28 @@
+from typing import Literal
+
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from app.core.metricas import metricas
+from app.data.processors.memo import estadisticas_memos
+from app.data.processors.planificacion import cpus_disponibles
+from app.api.laboratorio_dengue import refresco, service
+
+router = APIRouter()
+
+@router.get('/metrics')
+async def obtener_metricas(formato: Literal['json', 'prometheus'] = 'json'):
+    '''Tiempos, filas y bytes por etapa y por columna, cola del pool, admisión, cache, refresco y memos de normalización.'''
+    if formato == 'prometheus':
+        return PlainTextResponse(metricas.exportar_prometheus())
+    
+    instantanea = metricas.instantanea()
+    instantanea['pool']['max_workers'] = service.processor.max_workers
+    instantanea['pool']['cpus'] = cpus_disponibles()
+    instantanea['admision'] = service.ejecutor.estado()
+    instantanea['cache'] = service.cache.estado()
+    instantanea['cache_kpis'] = service.cache_kpis.estado()
+    instantanea['refresco'] = refresco.estado()
+    instantanea['costos_por_valor'] = service.processor.costos.como_dict()
+    instantanea['memos'] = estadisticas_memos()
+    return instantanea
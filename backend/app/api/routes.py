@@ -1,5 +1,9 @@
 from fastapi import APIRouter
 from app.api.laboratorio_dengue import router as laboratorio_dengue_router
+from app.api.metricas import router as metricas_router
+from app.api.salud import router as salud_router
 
 router = APIRouter()
 router.include_router(laboratorio_dengue_router)
+router.include_router(metricas_router)
+router.include_router(salud_router)
@@ -0,0 +1,15 @@
+from fastapi import APIRouter
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from app.api.laboratorio_dengue import refresco
+
+router = APIRouter()
+
+@router.get('/ready')
+async def listo():
+    '''Listo para atender: con refresco en segundo plano, recién después de la primera construcción del dataset.'''
+    estado = refresco.estado()
+    if estado['activo'] and not estado['listo']:
+        return JSONResponse(status_code=503, content=jsonable_encoder({'listo': False, 'refresco': estado}))
+    return {'listo': True, 'refresco': estado}
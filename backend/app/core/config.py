@@ -1,4 +1,5 @@
 import os
+import tempfile
 import dotenv
 
 dotenv.load_dotenv()
@@ -10,5 +11,78 @@ class Settings:
     DB_PORT: int = os.getenv('DB_PORT')
     DB_NAME: str = os.getenv('DB_NAME')
 
+    # Filas por lote leídas desde el cursor del servidor
+    DB_BATCH_SIZE: int = int(os.getenv('DB_BATCH_SIZE', 5000))
+
+    # 'python' (funciones escalares en el pool) o 'polars' (expresiones vectorizadas)
+    MOTOR_NORMALIZACION: str = os.getenv('MOTOR_NORMALIZACION', 'python')
+
+    # Canonización difusa de localidades y establecimientos que no están en los
+    # mapeos. Apagada por defecto: cambia los conteos del dashboard sin revisión.
+    # Lo habitual es revisar scripts/reporte_coincidencias.py y pasar las
+    # sugerencias aceptadas a los mapeos; 'true' las aplica automáticamente
+    CANONIZACION_DIFUSA: bool = os.getenv('CANONIZACION_DIFUSA', 'false').lower() == 'true'
+    UMBRAL_SIMILITUD: float = float(os.getenv('UMBRAL_SIMILITUD', 0.85))
+
+    # Ejecución de la normalización: 'auto' elige por columna entre 'serial'
+    # (proceso principal), 'hilos' y 'procesos'; cualquier otro valor la fuerza
+    # ('procesos' solo aplica a las columnas por diccionario: las vectorizadas
+    # de Polars liberan el GIL y van a hilos)
+    ESTRATEGIA_NORMALIZACION: str = os.getenv('ESTRATEGIA_NORMALIZACION', 'auto')
+    # Vacíos = se calculan (CPUs según afinidad y cuota del cgroup, chunk adaptativo)
+    CPUS: int = int(os.getenv('CPUS')) if os.getenv('CPUS') else None
+    MAX_WORKERS: int = int(os.getenv('MAX_WORKERS')) if os.getenv('MAX_WORKERS') else None
+    CHUNK_SIZE: int = int(os.getenv('CHUNK_SIZE')) if os.getenv('CHUNK_SIZE') else None
+    # Trabajo estimado (segundos) por debajo del cual no conviene repartir una columna
+    UMBRAL_PARALELO_SEGUNDOS: float = float(os.getenv('UMBRAL_PARALELO_SEGUNDOS', 0.05))
+    # Trabajo mínimo por chunk y chunks por worker para balancear la carga
+    OBJETIVO_SEGUNDOS_CHUNK: float = float(os.getenv('OBJETIVO_SEGUNDOS_CHUNK', 0.02))
+    CHUNKS_POR_WORKER: int = int(os.getenv('CHUNKS_POR_WORKER', 4))
+    CHUNK_MINIMO: int = int(os.getenv('CHUNK_MINIMO', 100))
+    CHUNK_MAXIMO: int = int(os.getenv('CHUNK_MAXIMO', 50000))
+    # Costo por valor supuesto hasta tener mediciones (segundos)
+    COSTO_INICIAL_POR_VALOR: float = float(os.getenv('COSTO_INICIAL_POR_VALOR', 20e-6))
+
+    # Procesamiento por lotes (backfills, /procesados/stream): filas máximas por
+    # lote, memoria que pueden ocupar los lotes en vuelo y dónde derramar a disco
+    LOTE_STREAMING: int = int(os.getenv('LOTE_STREAMING', 50000))
+    PRESUPUESTO_MEMORIA_MB: int = int(os.getenv('PRESUPUESTO_MEMORIA_MB', 512))
+    RUTA_DERRAME: str = os.getenv('RUTA_DERRAME', tempfile.gettempdir())
+
+    # Trabajos de procesamiento que pueden esperar turno y cuánto (segundos)
+    # antes de responder 503; el procesamiento corre de a un trabajo por vez
+    COLA_PROCESAMIENTO: int = int(os.getenv('COLA_PROCESAMIENTO', 8))
+    ESPERA_MAXIMA_SEGUNDOS: float = float(os.getenv('ESPERA_MAXIMA_SEGUNDOS', 30))
+
+    # Cache del dataset procesado y de los KPIs: vale mientras no cambie la huella
+    # de la tabla (o durante el TTL si no se conoce) y, vencido, durante el margen
+    # stale mientras se reconstruye
+    CACHE_TTL_SEGUNDOS: float = float(os.getenv('CACHE_TTL_SEGUNDOS', 60))
+    CACHE_STALE_SEGUNDOS: float = float(os.getenv('CACHE_STALE_SEGUNDOS', 300))
+    # Cuánto se reutiliza la huella de la tabla (COUNT/MAX) entre pedidos
+    HUELLA_TTL_SEGUNDOS: float = float(os.getenv('HUELLA_TTL_SEGUNDOS', 2))
+
+    # Refresco en segundo plano: cada cuánto se mira la huella para reconstruir el
+    # dataset y cuánto espera el arranque la primera construcción antes de atender
+    REFRESCO_SEGUNDO_PLANO: bool = os.getenv('REFRESCO_SEGUNDO_PLANO', 'true').lower() == 'true'
+    REFRESCO_INTERVALO_SEGUNDOS: float = float(os.getenv('REFRESCO_INTERVALO_SEGUNDOS', 30))
+    REFRESCO_ESPERA_INICIAL_SEGUNDOS: float = float(os.getenv('REFRESCO_ESPERA_INICIAL_SEGUNDOS', 300))
+
+    # Instantánea del dataset procesado para arrancar sin reprocesar la tabla
+    # entera (vacío la desactiva)
+    RUTA_INSTANTANEA: str = os.getenv(
+        'RUTA_INSTANTANEA',
+        os.path.join(
+            os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+            'instantaneas', 'laboratorio_dengue.parquet'
+        )
+    )
+
+    # Directorio con las tablas de normalización versionadas (JSON)
+    RUTA_MAPEOS: str = os.getenv(
+        'RUTA_MAPEOS',
+        os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'mapeos')
+    )
+
 
 settings = Settings()
\ No newline at end of file
@@ -0,0 +1,202 @@
+"""
+Métricas de tiempo y volumen del pipeline de procesamiento.
+
+Cada etapa (lectura de la base, armado del DataFrame, normalización por
+columna, campos derivados, serialización, ...) se mide con
+metricas.etapa(nombre): tiempo de pared, tiempo de CPU del hilo, filas y
+bytes. Se acumulan por etapa para /metrics y, dentro de
+metricas.ejecucion(nombre), se juntan en un único registro de log por
+ejecución. Medir cuesta dos lecturas de reloj por etapa, así que queda
+siempre activo.
+"""
+import contextvars
+import json
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+class Medicion:
+    '''Resultado de una etapa. filas y bytes se pueden completar dentro del bloque medido.'''
+    __slots__ = ('nombre', 'filas', 'bytes', 'segundos', 'cpu')
+
+    def __init__(self, nombre: str, filas: int = 0, bytes: int = 0):
+        self.nombre = nombre
+        self.filas = filas
+        self.bytes = bytes
+        self.segundos = 0.0
+        self.cpu = 0.0
+
+    def como_dict(self) -> Dict[str, Any]:
+        return {
+            'segundos': round(self.segundos, 6),
+            'cpu': round(self.cpu, 6),
+            'filas': self.filas,
+            'bytes': self.bytes,
+            'filas_por_segundo': round(self.filas / self.segundos) if self.segundos > 0 else None,
+        }
+
+class _Acumulado:
+    __slots__ = ('llamadas', 'segundos', 'cpu', 'filas', 'bytes', 'ultima')
+
+    def __init__(self):
+        self.llamadas = 0
+        self.segundos = 0.0
+        self.cpu = 0.0
+        self.filas = 0
+        self.bytes = 0
+        self.ultima: Optional[Medicion] = None
+
+    def agregar(self, medicion: Medicion):
+        self.llamadas += 1
+        self.segundos += medicion.segundos
+        self.cpu += medicion.cpu
+        self.filas += medicion.filas
+        self.bytes += medicion.bytes
+        self.ultima = medicion
+
+    def como_dict(self) -> Dict[str, Any]:
+        return {
+            'llamadas': self.llamadas,
+            'segundos': round(self.segundos, 6),
+            'cpu': round(self.cpu, 6),
+            'filas': self.filas,
+            'bytes': self.bytes,
+            'filas_por_segundo': round(self.filas / self.segundos) if self.segundos > 0 else None,
+            'ultima': self.ultima.como_dict() if self.ultima else None,
+        }
+
+# Mediciones de la ejecución en curso (si hay una abierta en este contexto)
+_ejecucion_actual: contextvars.ContextVar[Optional[List[Medicion]]] = contextvars.ContextVar(
+    'ejecucion_actual', default=None
+)
+
+class RegistroMetricas:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._etapas: Dict[str, _Acumulado] = {}
+        self._columnas: Dict[str, Dict[str, Any]] = {}
+        self._ultima_ejecucion: Optional[Dict[str, Any]] = None
+        self.cola_pool = 0
+        self.cola_pool_max = 0
+
+    def registrar(self, medicion: Medicion):
+        with self._lock:
+            self._etapas.setdefault(medicion.nombre, _Acumulado()).agregar(medicion)
+        mediciones = _ejecucion_actual.get()
+        if mediciones is not None:
+            mediciones.append(medicion)
+
+    @contextmanager
+    def etapa(self, nombre: str, filas: int = 0, bytes: int = 0) -> Iterator[Medicion]:
+        '''
+        Mide el bloque: tiempo de pared y CPU del hilo actual (en código async
+        incluye lo que corran otras corrutinas en el mismo hilo mientras tanto).
+        '''
+        medicion = Medicion(nombre, filas, bytes)
+        inicio, inicio_cpu = time.perf_counter(), time.thread_time()
+        try:
+            yield medicion
+        finally:
+            medicion.segundos = time.perf_counter() - inicio
+            medicion.cpu = time.thread_time() - inicio_cpu
+            self.registrar(medicion)
+
+    def registrar_columna(self, columna: str, **valores: Any):
+        '''Datos de la última normalización de una columna (valores distintos, aciertos del memo, ...).'''
+        with self._lock:
+            self._columnas.setdefault(columna, {}).update(valores)
+
+    def encolar(self, cantidad: int = 1):
+        with self._lock:
+            self.cola_pool += cantidad
+            self.cola_pool_max = max(self.cola_pool_max, self.cola_pool)
+
+    def desencolar(self, *_):
+        '''Se usa como done_callback de los futures del pool.'''
+        with self._lock:
+            self.cola_pool -= 1
+
+    @contextmanager
+    def ejecucion(self, nombre: str, **datos: Any) -> Iterator[Dict[str, Any]]:
+        '''
+        Agrupa las etapas medidas dentro del bloque y al salir las emite como un
+        único registro de log estructurado (en el mensaje como JSON y en
+        record.metricas). El dict que se entrega permite agregar datos.
+        '''
+        mediciones: List[Medicion] = []
+        token = _ejecucion_actual.set(mediciones)
+        inicio, inicio_cpu = time.perf_counter(), time.thread_time()
+        try:
+            yield datos
+        finally:
+            _ejecucion_actual.reset(token)
+            # Una ejecución anidada también cuenta para la que la contiene
+            externas = _ejecucion_actual.get()
+            if externas is not None:
+                externas.extend(mediciones)
+            segundos = time.perf_counter() - inicio
+            etapas = {}
+            for medicion in mediciones:
+                # Una etapa que se repite (un lote por iteración) se suma
+                previa = etapas.get(medicion.nombre)
+                if previa is None:
+                    etapas[medicion.nombre] = medicion.como_dict()
+                else:
+                    for clave in ('segundos', 'cpu', 'filas', 'bytes'):
+                        previa[clave] = round(previa[clave] + getattr(medicion, clave), 6)
+                    previa['filas_por_segundo'] = (
+                        round(previa['filas'] / previa['segundos']) if previa['segundos'] > 0 else None
+                    )
+            registro = {
+                'ejecucion': nombre,
+                'segundos': round(segundos, 6),
+                'cpu': round(time.thread_time() - inicio_cpu, 6),
+                **datos,
+                'etapas': etapas,
+            }
+            with self._lock:
+                self._ultima_ejecucion = registro
+            logger.info(f'Métricas {nombre}: {json.dumps(registro, default=str)}', extra={'metricas': registro})
+
+    def instantanea(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'etapas': {nombre: acumulado.como_dict() for nombre, acumulado in self._etapas.items()},
+                'columnas': {columna: dict(valores) for columna, valores in self._columnas.items()},
+                'pool': {'cola': self.cola_pool, 'cola_max': self.cola_pool_max},
+                'ultima_ejecucion': self._ultima_ejecucion,
+            }
+
+    def exportar_prometheus(self) -> str:
+        '''Acumulados por etapa en el formato de texto de Prometheus.'''
+        lineas = []
+        with self._lock:
+            series = [
+                ('dengue_etapa_llamadas_total', 'counter', lambda a: a.llamadas),
+                ('dengue_etapa_segundos_total', 'counter', lambda a: a.segundos),
+                ('dengue_etapa_cpu_segundos_total', 'counter', lambda a: a.cpu),
+                ('dengue_etapa_filas_total', 'counter', lambda a: a.filas),
+                ('dengue_etapa_bytes_total', 'counter', lambda a: a.bytes),
+            ]
+            for metrica, tipo, valor in series:
+                lineas.append(f'# TYPE {metrica} {tipo}')
+                for nombre, acumulado in sorted(self._etapas.items()):
+                    lineas.append(f'{metrica}{{etapa="{nombre}"}} {valor(acumulado)}')
+            lineas.append('# TYPE dengue_pool_cola gauge')
+            lineas.append(f'dengue_pool_cola {self.cola_pool}')
+            lineas.append('# TYPE dengue_pool_cola_max gauge')
+            lineas.append(f'dengue_pool_cola_max {self.cola_pool_max}')
+        return '\n'.join(lineas) + '\n'
+
+    def reiniciar(self):
+        with self._lock:
+            self._etapas.clear()
+            self._columnas.clear()
+            self._ultima_ejecucion = None
+            self.cola_pool_max = self.cola_pool
+
+metricas = RegistroMetricas()
@@ -0,0 +1,153 @@
+"""
+Canonización difusa de valores normalizados que no figuran en las tablas de
+mapeo ('CLODORMIA', 'FERNNADEZ', 'LA BNADA', ...).
+
+Cada índice se construye sobre las claves y los valores canónicos de su
+mapeo. Los trigramas del valor buscado eligen unos pocos candidatos y
+difflib confirma la similitud contra el umbral. El índice se reconstruye si
+cambia el mapeo y cada valor se resuelve una sola vez (caché de resultados).
+"""
+import logging
+import re
+import threading
+from collections import Counter, OrderedDict
+from difflib import SequenceMatcher
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional
+
+from app.core.config import settings
+from .mapeos import tablas
+
+logger = logging.getLogger(__name__)
+
+# Valores más cortos se parecen demasiado entre sí ('CAP', 'SDE', ...)
+LONGITUD_MINIMA = 5
+MAX_CANDIDATOS = 8
+TAMANIO_CACHE = 50_000
+
+_DIGITOS = re.compile(r'\d+')
+
+class Coincidencia(NamedTuple):
+    canonico: str
+    nombre: str
+    similitud: float
+
+def trigramas(texto: str) -> set:
+    relleno = f'  {texto} '
+    return {relleno[i:i + 3] for i in range(len(relleno) - 2)}
+
+class IndiceDifuso:
+    def __init__(
+        self,
+        nombre: str,
+        entradas: Callable[[], Dict[str, str]],
+        firma: Callable[[], str],
+        umbral: Optional[float] = None
+    ):
+        '''
+        entradas devuelve nombre conocido -> valor canónico; firma, la huella
+        actual de la tabla de la que salen, para detectar cambios.
+        '''
+        self.nombre = nombre
+        self.umbral = settings.UMBRAL_SIMILITUD if umbral is None else umbral
+        self._obtener_entradas = entradas
+        self._obtener_firma = firma
+        self._firma = None
+        self._lock = threading.Lock()
+        self._cache: 'OrderedDict[str, Optional[Coincidencia]]' = OrderedDict()
+
+    def _construir(self):
+        entradas = self._obtener_entradas()
+        self._entradas = entradas
+        self._canonicos = set(entradas.values())
+        self._nombres = [nombre for nombre in entradas if len(nombre) >= LONGITUD_MINIMA]
+        self._postings: Dict[str, List[int]] = {}
+        for indice, nombre in enumerate(self._nombres):
+            for trigrama in trigramas(nombre):
+                self._postings.setdefault(trigrama, []).append(indice)
+        self._cache.clear()
+        logger.info(f'Índice difuso {self.nombre}: {len(self._nombres)} nombres, {len(self._postings)} trigramas')
+
+    def verificar(self):
+        '''Reconstruye el índice si es la primera vez o si cambió alguna tabla de mapeo.'''
+        firma = self._obtener_firma()
+        with self._lock:
+            if firma != self._firma:
+                self._construir()
+                self._firma = firma
+
+    def _buscar(self, valor: str) -> Optional[Coincidencia]:
+        if valor in self._entradas:
+            return Coincidencia(self._entradas[valor], valor, 1.0)
+        if len(valor) < LONGITUD_MINIMA:
+            return None
+
+        votos = Counter()
+        for trigrama in trigramas(valor):
+            votos.update(self._postings.get(trigrama, ()))
+
+        digitos = _DIGITOS.findall(valor)
+        mejor = None
+        for indice, _ in votos.most_common(MAX_CANDIDATOS):
+            nombre = self._nombres[indice]
+            # 'UPA N1' y 'UPA N2' son establecimientos distintos
+            if _DIGITOS.findall(nombre) != digitos:
+                continue
+            similitud = SequenceMatcher(None, valor, nombre, autojunk=False).ratio()
+            if mejor is None or similitud > mejor.similitud:
+                mejor = Coincidencia(self._entradas[nombre], nombre, similitud)
+        return mejor
+
+    def conocido(self, valor: str) -> bool:
+        '''True si el valor es una clave o un valor canónico del mapeo.'''
+        if self._firma is None:
+            self.verificar()
+        return valor in self._entradas
+
+    def sugerir(self, valor: str) -> Optional[Coincidencia]:
+        '''Mejor coincidencia para el valor, sin aplicar el umbral.'''
+        if self._firma is None:
+            self.verificar()
+        with self._lock:
+            if valor in self._cache:
+                self._cache.move_to_end(valor)
+                return self._cache[valor]
+            coincidencia = self._buscar(valor)
+            self._cache[valor] = coincidencia
+            if len(self._cache) > TAMANIO_CACHE:
+                self._cache.popitem(last=False)
+            return coincidencia
+
+    def canonizar(self, valor: Optional[str]) -> Optional[str]:
+        '''Valor canónico si la similitud alcanza el umbral; si no, el valor sin cambios.'''
+        if self._firma is None:
+            self.verificar()
+        if not isinstance(valor, str) or valor in self._canonicos:
+            return valor
+        coincidencia = self.sugerir(valor)
+        if coincidencia is not None and coincidencia.similitud >= self.umbral:
+            return coincidencia.canonico
+        return valor
+
+    def canonizar_valores(self, valores: Iterable[Optional[str]]) -> List[Optional[str]]:
+        self.verificar()
+        return [self.canonizar(valor) for valor in valores]
+
+def _entradas_mapeo(tabla: str) -> Callable[[], Dict[str, str]]:
+    def entradas() -> Dict[str, str]:
+        mapeo = getattr(tablas(), tabla)
+        return {**{canonico: canonico for canonico in mapeo.values()}, **mapeo}
+    return entradas
+
+def _firma_tabla(tabla: str) -> Callable[[], str]:
+    return lambda: tablas().firmas[tabla]
+
+indice_localidades = IndiceDifuso('localidades', _entradas_mapeo('localidades'), _firma_tabla('localidades'))
+indice_establecimientos = IndiceDifuso(
+    'establecimientos', _entradas_mapeo('establecimientos'), _firma_tabla('establecimientos')
+)
+
+# Columna raw -> índice con el que se canonizan sus valores normalizados
+INDICES_DIFUSOS = {
+    'localidad': indice_localidades,
+    'establecimiento_notificador': indice_establecimientos,
+}
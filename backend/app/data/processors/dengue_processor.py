@@ -1,214 +1,616 @@
 import polars as pl
-from concurrent.futures import ProcessPoolExecutor, as_completed
-from typing import List, Dict, Any
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import List, Dict, Any, Callable, Optional, Tuple
 import logging
-from datetime import datetime
+import threading
+import time
 
-from .localidad_processor import normalizar_localidad
-from .departamento_processor import normalizar_departamento
-from .laboratorio_processor import normalizar_laboratorio
-from .establecimiento_processor import normalizar_establecimiento_notificador
+from app.core.config import settings
+from app.core.metricas import Medicion, metricas
+from .coincidencia_difusa import INDICES_DIFUSOS
+from .departamento_processor import clave_departamento
+from .establecimiento_processor import clave_establecimiento
+from .fecha_processor import parsear_fecha
+from .localidad_processor import clave_localidad
+from .mapeos import tablas
+from .memoria_compartida import (
+    DescriptorColumna,
+    leer_columna,
+    liberar,
+    preparar_proceso_principal,
+    publicar_columna,
+    recibir_columna
+)
+from .planificacion import CostosNormalizacion, ESTRATEGIAS, Estrategia, cpus_disponibles, elegir_estrategia
+from .memo import (
+    NormalizadorMemoizado,
+    departamento_memo,
+    establecimiento_memo,
+    estadisticas_memos,
+    exportar_memos,
+    laboratorio_memo,
+    localidad_memo,
+    sembrar_memos,
+    verificar_memos
+)
+from .text_expr import (
+    normalizar_departamento_expr,
+    normalizar_establecimiento_expr,
+    normalizar_laboratorio_expr,
+    normalizar_localidad_expr
+)
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 def procesar_chunk_localidades(chunk_data: List[str]) -> List[str]:
-    return [normalizar_localidad(loc) for loc in chunk_data]
+    localidad_memo.verificar()
+    return [localidad_memo(loc) for loc in chunk_data]
 
 def procesar_chunk_departamentos(chunk_data: List[str]) -> List[str]:
-    return [normalizar_departamento(dept) for dept in chunk_data]
+    departamento_memo.verificar()
+    return [departamento_memo(dept) for dept in chunk_data]
 
 def procesar_chunk_laboratorio(chunk_data: List[str]) -> List[str]:
-    return [normalizar_laboratorio(lab) for lab in chunk_data]
+    laboratorio_memo.verificar()
+    return [laboratorio_memo(lab) for lab in chunk_data]
 
 def procesar_chunk_establecimiento(chunk_data: List[str]) -> List[str]:
-    return [normalizar_establecimiento_notificador(est) for est in chunk_data]
+    establecimiento_memo.verificar()
+    return [establecimiento_memo(est) for est in chunk_data]
+
+def procesar_chunk_compartido(
+    func_procesamiento: Callable[[List[str]], List[str]],
+    descriptor: DescriptorColumna,
+    inicio: int,
+    fin: int
+) -> Tuple[DescriptorColumna, float]:
+    '''
+    Normaliza las filas [inicio, fin) de una columna en memoria compartida y
+    publica el resultado. Devuelve también el tiempo de CPU del worker.
+    '''
+    inicio_cpu = time.process_time()
+    descriptor_resultado = publicar_columna(func_procesamiento(leer_columna(descriptor, inicio, fin)))
+    return descriptor_resultado, time.process_time() - inicio_cpu
+
+def liberar_resultado_chunk(future: Future):
+    '''Libera el segmento con el resultado de un chunk que nadie va a leer.'''
+    if not future.cancelled() and future.exception() is None:
+        descriptor_resultado, _ = future.result()
+        liberar(descriptor_resultado)
 
 def dividir_en_chunks(data: List[Any], chunk_size: int = 1000) -> List[List[Any]]:
     return [data[i:i + chunk_size] for i in range(0, len(data), chunk_size)]
 
+def _inicializar_worker(semillas: Optional[Dict[str, tuple]] = None):
+    '''
+    Precarga en cada worker los módulos de normalización y sus tablas de mapeo,
+    y siembra los memos con lo que ya resolvió el proceso principal.
+    '''
+    sembrar_memos(semillas)
+    procesar_chunk_localidades(['CAP'])
+    procesar_chunk_departamentos(['CAP'])
+    procesar_chunk_laboratorio(['NO DETECTABLE'])
+    procesar_chunk_establecimiento(['HOSPITAL REGIONAL'])
+
+COLUMNAS_LABORATORIO = [
+    'rt_pcr_tiempo_real_dengue',
+    'serotipo_virus_dengue',
+    'igg_test_rapido',
+    'ns1_elisa',
+    'ig_m_dengue_elisa'
+]
+
+# Columna raw -> (columna normalizada, función de chunk, memo), en el orden en que se agregan
+COLUMNAS_NORMALIZADAS = {
+    'localidad': ('localidad_normalizada', procesar_chunk_localidades, localidad_memo),
+    'departamento': ('departamento_normalizado', procesar_chunk_departamentos, departamento_memo),
+    'establecimiento_notificador': (
+        'establecimiento_notificador_normalizada', procesar_chunk_establecimiento, establecimiento_memo
+    ),
+    **{
+        col: (f'{col}_normalizado', procesar_chunk_laboratorio, laboratorio_memo)
+        for col in COLUMNAS_LABORATORIO
+    },
+}
+
+# Normalizadores con versión vectorizada (ver text_expr)
+EXPRESIONES_NORMALIZACION = {
+    'localidad': normalizar_localidad_expr,
+    'departamento': normalizar_departamento_expr,
+    'establecimiento_notificador': normalizar_establecimiento_expr,
+    **{col: normalizar_laboratorio_expr for col in COLUMNAS_LABORATORIO},
+}
+
+MOTORES_NORMALIZACION = ('python', 'polars')
+
+# Columna raw -> (clave con la que se consultan las tablas, tablas de las que depende)
+CLAVES_NORMALIZACION = {
+    'localidad': (clave_localidad, ('localidades',)),
+    'departamento': (clave_departamento, ('departamentos',)),
+    'establecimiento_notificador': (
+        lambda valor: clave_establecimiento(valor, tablas().alias_previos),
+        ('establecimientos', 'alias_previos')
+    ),
+}
+
+def valores_afectados(
+    col: str,
+    valores: List[Any],
+    cambios: Dict[str, set],
+    canonizacion_difusa: bool = False
+) -> List[Any]:
+    '''
+    Valores crudos de la columna cuyo resultado normalizado puede cambiar con
+    las claves modificadas en cambios (ver mapeos.recargar). Con la
+    canonización difusa también entran los que no tienen mapeo, porque el
+    índice difuso se arma con las mismas tablas.
+    '''
+    funcion_clave, tablas_col = CLAVES_NORMALIZACION[col]
+    claves_cambiadas = set().union(*(cambios.get(tabla, set()) for tabla in tablas_col if tabla != 'alias_previos'))
+    alias_cambiados = cambios.get('alias_previos', set()) if 'alias_previos' in tablas_col else set()
+    indice = tablas().indices[tablas_col[0]]
+    revisar_sin_mapeo = canonizacion_difusa and col in INDICES_DIFUSOS and tablas_col[0] in cambios
+    
+    afectados = []
+    for valor in valores:
+        if valor is None:
+            continue
+        if alias_cambiados and str(valor).lower().strip() in alias_cambiados:
+            afectados.append(valor)
+            continue
+        clave = funcion_clave(valor)
+        if clave in claves_cambiadas or (revisar_sin_mapeo and clave is not None and clave not in indice):
+            afectados.append(valor)
+    return afectados
+
+FECHA_COLS = ['fecha_recepcion', 'fecha_procesamiento', 'fecha_inicio_fiebre']
+
+def _entero_acotado(col: str, maximo: int) -> pl.Expr:
+    return (
+        pl.col(col)
+        .cast(pl.Utf8, strict=False)
+        .str.replace_all(r'[^\d]', '')  # Eliminar caracteres no numéricos
+        .cast(pl.Int32, strict=False)
+        .fill_null(0)
+        .clip(0, maximo)
+        .alias(col)
+    )
+
+def etapas_campos_derivados(schema: pl.Schema) -> List[Tuple[str, List[pl.Expr], List[pl.Expr]]]:
+    '''
+    Etapas de campos derivados para un DataFrame con el esquema dado:
+    (nombre, expresiones, expresiones por defecto si la etapa falla). Cada
+    etapa puede usar las columnas que agregan las anteriores.
+    '''
+    etapas = []
+    
+    for col in FECHA_COLS:
+        if col in schema:
+            # El loader ya entrega pl.Date; el texto se parsea con los formatos conocidos
+            if schema[col] == pl.Date:
+                fecha = pl.col(col)
+            else:
+                fecha = parsear_fecha(pl.col(col).cast(pl.Utf8), col)
+            etapas.append((
+                f'fecha {col}',
+                [fecha.alias(f'{col}_date')],
+                [pl.lit(None).cast(pl.Date).alias(f'{col}_date')]
+            ))
+    
+    if 'fecha_recepcion' in schema and 'fecha_procesamiento' in schema:
+        demora = (pl.col('fecha_procesamiento_date') - pl.col('fecha_recepcion_date')).dt.total_days()
+        etapas.append((
+            'demoras',
+            [demora.alias('demora_dias'), (demora * 24).alias('demora_horas')],
+            [pl.lit(None).cast(pl.Float64).alias('demora_dias'), pl.lit(None).cast(pl.Float64).alias('demora_horas')]
+        ))
+    
+    if 'fecha_recepcion' in schema:
+        etapas.append((
+            'campos temporales',
+            [
+                pl.col('fecha_recepcion_date').dt.year().alias('anio_recepcion'),
+                pl.col('fecha_recepcion_date').dt.month().alias('mes_recepcion'),
+                pl.col('fecha_recepcion_date').dt.week().alias('sem_epid_recepcion')
+            ],
+            [
+                pl.lit(None).cast(pl.Int32).alias('anio_recepcion'),
+                pl.lit(None).cast(pl.Int32).alias('mes_recepcion'),
+                pl.lit(None).cast(pl.Int32).alias('sem_epid_recepcion')
+            ]
+        ))
+    
+    # Edad entre 0 y 120 años, días de evolución entre 0 y 365
+    if 'edad' in schema:
+        etapas.append(('edad', [_entero_acotado('edad', 120)], [pl.lit(0).cast(pl.Int32).alias('edad')]))
+    if 'dias_evolucion' in schema:
+        etapas.append((
+            'dias_evolucion',
+            [_entero_acotado('dias_evolucion', 365)],
+            [pl.lit(0).cast(pl.Int32).alias('dias_evolucion')]
+        ))
+    
+    return etapas
+
 class DengueDataProcessor:
-    def __init__(self, max_workers: int = None, chunk_size: int = 1000):
-        self.max_workers = max_workers
+    def __init__(
+        self,
+        max_workers: int = None,
+        chunk_size: int = None,
+        motor: str = 'python',
+        canonizacion_difusa: bool = False,
+        estrategia: str = None
+    ):
+        '''
+        max_workers y chunk_size en None se calculan (ver planificacion); un
+        valor explícito, o el de Settings, los fija. estrategia fuerza el modo
+        de ejecución de todas las columnas ('auto' elige por columna).
+        '''
+        estrategia = estrategia or settings.ESTRATEGIA_NORMALIZACION
+        if motor not in MOTORES_NORMALIZACION:
+            raise ValueError(f'Motor de normalización desconocido: {motor}')
+        if estrategia not in ESTRATEGIAS:
+            raise ValueError(f'Estrategia de ejecución desconocida: {estrategia}')
+        
+        self.max_workers = max_workers or settings.MAX_WORKERS or cpus_disponibles()
         self.chunk_size = chunk_size
+        self.motor = motor
+        self.canonizacion_difusa = canonizacion_difusa
+        self.estrategia = estrategia
+        self.costos = CostosNormalizacion()
+        
+        # Pools persistentes: se crean en el primer uso y viven hasta cerrar()
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._version_executor: Optional[str] = None
+        self._hilos: Optional[ThreadPoolExecutor] = None
+        self._lock_executor = threading.Lock()
+    
+    def _obtener_executor(self) -> ProcessPoolExecutor:
+        version = tablas().version
+        with self._lock_executor:
+            # Los workers conservan las tablas con las que arrancaron: si se
+            # recargaron, el pool se reemplaza por uno nuevo
+            if self._executor is not None and self._version_executor != version:
+                logger.info(f'Tablas de normalización en versión {version}: se reinicia el pool de procesos')
+                self._executor.shutdown(wait=False)
+                self._executor = None
+            if self._executor is None:
+                logger.info(f'Iniciando pool de procesos (max_workers={self.max_workers})')
+                preparar_proceso_principal()
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    initializer=_inicializar_worker,
+                    initargs=(exportar_memos(),)
+                )
+                self._version_executor = version
+            return self._executor
+    
+    def _obtener_hilos(self) -> ThreadPoolExecutor:
+        with self._lock_executor:
+            if self._hilos is None:
+                self._hilos = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='normalizacion')
+            return self._hilos
+    
+    def _estrategia(self, salida: str, valores: int, libera_gil: bool = False) -> Estrategia:
+        estrategia = elegir_estrategia(
+            valores,
+            self.costos.costo(salida),
+            libera_gil=libera_gil,
+            forzada=self.estrategia,
+            max_workers=self.max_workers,
+            chunk_size=self.chunk_size
+        )
+        metricas.registrar_columna(salida, estrategia=estrategia.modo, chunk_size=estrategia.chunk_size)
+        return estrategia
+    
+    def _descartar_executor(self, executor: ProcessPoolExecutor):
+        with self._lock_executor:
+            if self._executor is executor:
+                self._executor = None
+        executor.shutdown(wait=False, cancel_futures=True)
+    
+    def cerrar(self):
+        '''Apaga el pool de procesos. Pensado para el shutdown de la aplicación.'''
+        with self._lock_executor:
+            executor, self._executor = self._executor, None
+            hilos, self._hilos = self._hilos, None
+        if executor is not None:
+            logger.info('Cerrando pool de procesos')
+            executor.shutdown(wait=True, cancel_futures=True)
+        if hilos is not None:
+            hilos.shutdown(wait=True, cancel_futures=True)
         
     def procesar_datos_paralelo(self, df: pl.DataFrame) -> pl.DataFrame:
         logger.info('Iniciando procesamiento paralelo de datos de dengue')
-        start_time = datetime.now()
         
-        df_processed = df.clone()
+        inicio = time.perf_counter()
         
-        if 'localidad' in df.columns:
-            logger.info('Procesando localidades...')
-            localidades_normalizadas = self._procesar_columna_paralelo(
-                df['localidad'].to_list(),
-                procesar_chunk_localidades
-            )
-            df_processed = df_processed.with_columns(
-                pl.Series('localidad_normalizada', localidades_normalizadas)
-            )
+        with metricas.ejecucion('procesamiento', filas=df.height, motor=self.motor):
+            df_processed = self._procesar(df)
         
-        if 'departamento' in df.columns:
-            logger.info('Procesando departamentos...')
-            departamentos_normalizados = self._procesar_columna_paralelo(
-                df['departamento'].to_list(),
-                procesar_chunk_departamentos
-            )
-            df_processed = df_processed.with_columns(
-                pl.Series('departamento_normalizado', departamentos_normalizados)
-            )
+        logger.info(f'Procesamiento completado en {time.perf_counter() - inicio:.2f} segundos')
         
-        if 'establecimiento_notificador' in df.columns:
-            logger.info('Procesando establecimientos notificadores...')
-            establecimientos_normalizados = self._procesar_columna_paralelo(
-                df['establecimiento_notificador'].to_list(),
-                procesar_chunk_establecimiento
-            )
-            df_processed = df_processed.with_columns(
-                pl.Series('establecimiento_notificador_normalizada', establecimientos_normalizados)
-            )
+        return df_processed
+    
+    def _procesar(self, df: pl.DataFrame) -> pl.DataFrame:
+        # Codificación por diccionario: cada valor distinto se normaliza una sola vez
+        columnas = [col for col in COLUMNAS_NORMALIZADAS if col in df.columns]
+        with metricas.etapa('diccionario', filas=df.height * len(columnas)):
+            unicos = {col: df[col].unique(maintain_order=True) for col in columnas}
+        for col in columnas:
+            logger.info(f'Normalizando {col}: {unicos[col].len()} valores distintos en {df.height} filas')
+            metricas.registrar_columna(COLUMNAS_NORMALIZADAS[col][0], filas=df.height, distintos=unicos[col].len())
         
-        columnas_laboratorio = [
-            'rt_pcr_tiempo_real_dengue',
-            'serotipo_virus_dengue',
-            'igg_test_rapido',
-            'ns1_elisa',
-            'ig_m_dengue_elisa'
+        # Con el motor 'polars' las columnas de texto se resuelven con expresiones
+        # vectorizadas en el propio proceso; el resto va al pool
+        vectorizadas = [
+            col for col in columnas
+            if self.motor == 'polars' and col in EXPRESIONES_NORMALIZACION
         ]
+        # Los valores que el memo del proceso principal ya conoce no viajan al pool
+        with metricas.etapa('memo') as etapa:
+            verificar_memos()
+            conocidos = {}
+            trabajos = {}
+            for col in columnas:
+                if col in vectorizadas:
+                    continue
+                salida, func_procesamiento, memo = COLUMNAS_NORMALIZADAS[col]
+                valores = unicos[col].to_list()
+                conocidos[salida] = memo.buscar(valores)
+                pendientes = [valor for valor in valores if valor not in conocidos[salida]]
+                logger.info(f'{col}: {len(valores) - len(pendientes)} valores resueltos por el memo')
+                metricas.registrar_columna(salida, memo_aciertos=len(valores) - len(pendientes), pool_valores=len(pendientes))
+                trabajos[salida] = (valores, pendientes, func_procesamiento, memo)
+                etapa.filas += len(valores)
         
-        for col in columnas_laboratorio:
-            if col in df.columns:
-                logger.info(f'Procesando columna de laboratorio: {col}')
-                resultados_normalizados = self._procesar_columna_paralelo(
-                    df[col].to_list(),
-                    procesar_chunk_laboratorio
-                )
-                df_processed = df_processed.with_columns(
-                    pl.Series(f'{col}_normalizado', resultados_normalizados)
-                )
+        # Cada columna con pendientes se resuelve según su estrategia
+        calculados, trabajos_hilos, trabajos_pool = {}, {}, {}
+        for salida, (_, pendientes, func_procesamiento, memo) in trabajos.items():
+            if not pendientes:
+                continue
+            estrategia = self._estrategia(salida, len(pendientes))
+            if estrategia.modo == 'serial':
+                calculados[salida] = self._procesar_columna_serial(salida, pendientes, func_procesamiento)
+            elif estrategia.modo == 'hilos':
+                trabajos_hilos[salida] = (pendientes, memo, estrategia.chunk_size)
+            else:
+                trabajos_pool[salida] = (pendientes, func_procesamiento, memo, estrategia.chunk_size)
+        calculados.update(self._procesar_columnas_hilos(trabajos_hilos))
+        calculados.update(self._procesar_columnas_paralelo(trabajos_pool))
+        resultados = {}
+        for salida, (valores, pendientes, _, _) in trabajos.items():
+            conocidos[salida].update(zip(pendientes, calculados.get(salida, [])))
+            resultados[salida] = [conocidos[salida][valor] for valor in valores]
+        logger.info(f'Memos de normalización: {estadisticas_memos()}')
+        
+        # En modo lazy Polars elimina las subexpresiones comunes (la limpieza
+        # se repite en cada rama de los when/then). Polars suelta el GIL, así
+        # que las columnas grandes se resuelven a la vez en hilos
+        en_hilos = {}
+        for col in vectorizadas:
+            salida = COLUMNAS_NORMALIZADAS[col][0]
+            estrategia = self._estrategia(salida, unicos[col].len(), libera_gil=True)
+            if estrategia.modo == 'serial':
+                resultados[salida] = self._normalizar_vectorizada(col, unicos[col])
+            else:
+                en_hilos[salida] = self._obtener_hilos().submit(self._normalizar_vectorizada, col, unicos[col])
+        for salida, future in en_hilos.items():
+            resultados[salida] = future.result()
         
-        df_processed = self._calcular_campos_derivados(df_processed)
+        # Los valores que quedaron fuera de los mapeos se acercan al nombre canónico más parecido
+        if self.canonizacion_difusa:
+            for col in columnas:
+                if col in INDICES_DIFUSOS:
+                    salida = COLUMNAS_NORMALIZADAS[col][0]
+                    with metricas.etapa(f'canonizacion_difusa.{salida}', filas=len(resultados[salida])):
+                        resultados[salida] = INDICES_DIFUSOS[col].canonizar_valores(resultados[salida])
         
-        end_time = datetime.now()
-        duration = (end_time - start_time).total_seconds()
-        logger.info(f'Procesamiento completado en {duration:.2f} segundos')
+        with metricas.etapa('reemplazo', filas=df.height * len(columnas)):
+            df_processed = df.with_columns([
+                pl.col(col)
+                .replace_strict(unicos[col], resultados[COLUMNAS_NORMALIZADAS[col][0]], return_dtype=pl.Utf8)
+                .alias(COLUMNAS_NORMALIZADAS[col][0])
+                for col in columnas
+            ])
+        
+        with metricas.etapa('campos_derivados', filas=df.height) as etapa:
+            df_processed = self._calcular_campos_derivados(df_processed)
+            etapa.bytes = df_processed.estimated_size()
         
         return df_processed
     
-    def _procesar_columna_paralelo(self, data: List[Any], func_procesamiento) -> List[Any]:
-        if not data:
-            return []
+    def _normalizar_vectorizada(self, col: str, unicos: pl.Series) -> pl.Series:
+        salida = COLUMNAS_NORMALIZADAS[col][0]
+        with metricas.etapa(f'vectorizada.{salida}', filas=unicos.len()) as etapa:
+            resultado = unicos.to_frame().lazy().select(
+                EXPRESIONES_NORMALIZACION[col](pl.col(col).cast(pl.Utf8))
+            ).collect().to_series()
+        self.costos.medir(salida, etapa.segundos, unicos.len())
+        return resultado
+    
+    def _procesar_columna_serial(self, salida: str, data: List[Any], func_procesamiento: Callable) -> List[Any]:
+        '''Normaliza la columna en el proceso principal (la función de chunk ya guarda en el memo).'''
+        with metricas.etapa(f'serial.{salida}', filas=len(data)) as etapa:
+            try:
+                resultado = func_procesamiento(data)
+            except Exception as exc:
+                logger.error(f'Error normalizando {salida}: {exc}')
+                resultado = ['DESCONOCIDO'] * len(data)
+        self.costos.medir(salida, etapa.segundos, len(data))
+        return resultado
+    
+    def _procesar_columnas_hilos(self, trabajos: Dict[str, Tuple[List[Any], NormalizadorMemoizado, int]]) -> Dict[str, List[Any]]:
+        '''
+        Reparte los chunks en el pool de hilos. Solo rinde sin GIL; los hilos
+        usan la función sin memo porque los pendientes ya son los valores que
+        el memo no tenía (consultarlo solo sumaría contención en su lock), y
+        los resultados se guardan en el memo desde este hilo, de a un chunk.
+        '''
+        if not trabajos:
+            return {}
+        hilos = self._obtener_hilos()
         
-        chunks = dividir_en_chunks(data, self.chunk_size)
-        resultados = [None] * len(chunks)
+        def normalizar(funcion: Callable, chunk: List[Any]) -> Tuple[List[Any], float]:
+            inicio_cpu = time.thread_time()
+            return [funcion(valor) for valor in chunk], time.thread_time() - inicio_cpu
         
-        with ProcessPoolExecutor(max_workers=self.max_workers) as executor:
-            future_to_index = {
-                executor.submit(func_procesamiento, chunk): i 
-                for i, chunk in enumerate(chunks)
-            }
-            
-            for future in as_completed(future_to_index):
-                index = future_to_index[future]
+        enviados: Dict[str, Tuple[List[List[Any]], List[Future], NormalizadorMemoizado]] = {}
+        inicio = time.perf_counter()
+        for salida, (data, memo, chunk_size) in trabajos.items():
+            chunks = dividir_en_chunks(data, chunk_size)
+            enviados[salida] = (chunks, [hilos.submit(normalizar, memo.funcion, chunk) for chunk in chunks], memo)
+        
+        resultados = {}
+        for salida, (chunks, futures, memo) in enviados.items():
+            medicion = Medicion(f'hilos.{salida}', filas=sum(len(chunk) for chunk in chunks))
+            resultado_final = []
+            for index, (chunk, future) in enumerate(zip(chunks, futures)):
                 try:
-                    resultados[index] = future.result()
+                    resultado_chunk, cpu = future.result()
+                    medicion.cpu += cpu
+                    memo.actualizar(chunk, resultado_chunk)
+                    resultado_final.extend(resultado_chunk)
                 except Exception as exc:
-                    logger.error(f'Chunk {index} generó excepción: {exc}')
-                    resultados[index] = ['DESCONOCIDO'] * len(chunks[index])
-        
-        resultado_final = []
-        for chunk_resultado in resultados:
-            resultado_final.extend(chunk_resultado)
+                    logger.error(f'Chunk {index} de {salida} generó excepción: {exc}')
+                    resultado_final.extend(['DESCONOCIDO'] * len(chunk))
+            medicion.segundos = time.perf_counter() - inicio
+            metricas.registrar(medicion)
+            self.costos.medir(salida, medicion.cpu, medicion.filas)
+            resultados[salida] = resultado_final
+        return resultados
+    
+    def renormalizar(self, df: pl.DataFrame, cambios: Dict[str, set]) -> pl.DataFrame:
+        '''
+        Actualiza un DataFrame ya procesado después de recargar las tablas de
+        normalización: solo se vuelven a normalizar los valores crudos
+        distintos afectados por las claves que cambiaron.
+        '''
+        verificar_memos()
+        expresiones = []
+        for col in CLAVES_NORMALIZACION:
+            if col not in df.columns:
+                continue
+            afectados = valores_afectados(col, df[col].unique().to_list(), cambios, self.canonizacion_difusa)
+            if not afectados:
+                continue
+            
+            salida, _, memo = COLUMNAS_NORMALIZADAS[col]
+            nuevos = [memo(valor) for valor in afectados]
+            if self.canonizacion_difusa and col in INDICES_DIFUSOS:
+                nuevos = INDICES_DIFUSOS[col].canonizar_valores(nuevos)
+            logger.info(f'{col}: {len(afectados)} valores distintos normalizados de nuevo')
+            
+            expresiones.append(
+                pl.when(pl.col(col).is_in(afectados))
+                .then(pl.col(col).replace(afectados, nuevos))
+                .otherwise(pl.col(salida))
+                .alias(salida)
+            )
         
-        return resultado_final
+        return df.with_columns(expresiones) if expresiones else df
     
-    def _calcular_campos_derivados(self, df: pl.DataFrame) -> pl.DataFrame:
-        df_with_derived = df
+    def _procesar_columnas_paralelo(
+        self, trabajos: Dict[str, Tuple[List[Any], Callable, NormalizadorMemoizado, int]]
+    ) -> Dict[str, List[Any]]:
+        '''
+        Envía los chunks de todas las columnas al pool a la vez y recompone cada
+        columna en orden. Solo los chunks resueltos sin error se guardan en el memo.
+
+        Cada columna se publica una vez en memoria compartida; a los workers
+        solo viajan el descriptor y el rango de filas de su chunk, y devuelven
+        el descriptor del segmento con sus resultados.
+        '''
+        if not trabajos:
+            return {}
+        executor = self._obtener_executor()
         
-        fecha_cols = ['fecha_recepcion', 'fecha_procesamiento', 'fecha_inicio_fiebre']
-        for col in fecha_cols:
-            if col in df.columns:
-                try:
-                    df_with_derived = df_with_derived.with_columns(
-                        pl.coalesce([
-                            pl.col(col).str.strptime(pl.Date, format='%Y-%m-%d', strict=False),
-                            pl.col(col).str.strptime(pl.Date, format='%d/%m/%Y', strict=False),
-                            pl.col(col).str.strptime(pl.Date, format='%Y/%m/%d', strict=False)
-                        ]).alias(f'{col}_date')
-                    )
-                    logger.info(f'Columna {col} convertida exitosamente')
-                except Exception as e:
-                    logger.warning(f'Error convirtiendo fecha en columna {col}: {e}')
-                    df_with_derived = df_with_derived.with_columns(
-                        pl.lit(None).cast(pl.Date).alias(f'{col}_date')
+        enviados = {}
+        # Futures cuyo resultado ya se leyó (recibir_columna libera su segmento)
+        leidos = set()
+        try:
+            inicio = time.perf_counter()
+            for salida, (data, func_procesamiento, memo, chunk_size) in trabajos.items():
+                descriptor = publicar_columna(data)
+                chunks = dividir_en_chunks(data, chunk_size)
+                futures = []
+                for index, chunk in enumerate(chunks):
+                    future = executor.submit(
+                        procesar_chunk_compartido, func_procesamiento, descriptor,
+                        index * chunk_size, index * chunk_size + len(chunk)
                     )
+                    metricas.encolar()
+                    future.add_done_callback(metricas.desencolar)
+                    futures.append(future)
+                enviados[salida] = (descriptor, chunks, futures, memo)
+            
+            resultados = {}
+            for salida, (descriptor, chunks, futures, memo) in enviados.items():
+                # Ida y vuelta de la columna por el pool: desde el primer envío
+                # hasta su último chunk; la CPU es la que sumaron los workers
+                medicion = Medicion(
+                    f'pool.{salida}', filas=descriptor.largo,
+                    bytes=descriptor.bytes_offsets + descriptor.bytes_datos + descriptor.bytes_validez
+                )
+                resultado_final = []
+                for index, (chunk, future) in enumerate(zip(chunks, futures)):
+                    try:
+                        descriptor_resultado, cpu_worker = future.result()
+                        leidos.add(future)
+                        medicion.cpu += cpu_worker
+                        resultado_chunk = recibir_columna(descriptor_resultado)
+                        memo.actualizar(chunk, resultado_chunk)
+                        resultado_final.extend(resultado_chunk)
+                    except BrokenProcessPool as exc:
+                        logger.error(f'Pool de procesos roto procesando {salida}: {exc}')
+                        self._descartar_executor(executor)
+                        resultado_final.extend(['DESCONOCIDO'] * len(chunk))
+                    except Exception as exc:
+                        logger.error(f'Chunk {index} de {salida} generó excepción: {exc}')
+                        resultado_final.extend(['DESCONOCIDO'] * len(chunk))
+                resultados[salida] = resultado_final
+                medicion.segundos = time.perf_counter() - inicio
+                metricas.registrar(medicion)
+                metricas.registrar_columna(salida, chunks=len(chunks), pool_segundos=round(medicion.segundos, 6))
+                self.costos.medir(salida, medicion.cpu, descriptor.largo)
+        finally:
+            for descriptor, _, futures, _ in enviados.values():
+                # Si se sale por una excepción, los chunks pendientes se cancelan; los que
+                # ya terminaron o están corriendo liberan su resultado al terminar. Un
+                # worker que ya abrió el segmento de entrada conserva su mapeo aunque se desvincule
+                for future in futures:
+                    if future not in leidos and not future.cancel():
+                        future.add_done_callback(liberar_resultado_chunk)
+                liberar(descriptor)
         
-        if 'fecha_recepcion_date' in df_with_derived.columns and 'fecha_procesamiento_date' in df_with_derived.columns:
-            try:
-                df_with_derived = df_with_derived.with_columns([
-                    (pl.col('fecha_procesamiento_date') - pl.col('fecha_recepcion_date')).dt.total_days().alias('demora_dias'),
-                    ((pl.col('fecha_procesamiento_date') - pl.col('fecha_recepcion_date')).dt.total_days() * 24).alias('demora_horas')
-                ])
-                logger.info('Demoras calculadas exitosamente')
-            except Exception as e:
-                logger.warning(f'Error calculando demoras: {e}')
-                df_with_derived = df_with_derived.with_columns([
-                    pl.lit(None).cast(pl.Float64).alias('demora_dias'),
-                    pl.lit(None).cast(pl.Float64).alias('demora_horas')
-                ])
+        return resultados
+    
+    def _calcular_campos_derivados(self, df: pl.DataFrame) -> pl.DataFrame:
+        '''
+        Agrega los campos derivados con un único plan lazy y un solo collect().
+        Si el plan falla se recalcula etapa por etapa, reemplazando solo la que
+        falla por su valor por defecto.
+        '''
+        etapas = etapas_campos_derivados(df.schema)
         
-        if 'fecha_recepcion_date' in df_with_derived.columns:
-            try:
-                df_with_derived = df_with_derived.with_columns([
-                    pl.col('fecha_recepcion_date').dt.year().alias('anio_recepcion'),
-                    pl.col('fecha_recepcion_date').dt.month().alias('mes_recepcion'),
-                    pl.col('fecha_recepcion_date').dt.week().alias('sem_epid_recepcion')
-                ])
-                logger.info('Campos temporales calculados exitosamente')
-            except Exception as e:
-                logger.warning(f'Error calculando campos temporales: {e}')
-                df_with_derived = df_with_derived.with_columns([
-                    pl.lit(None).cast(pl.Int32).alias('anio_recepcion'),
-                    pl.lit(None).cast(pl.Int32).alias('mes_recepcion'),
-                    pl.lit(None).cast(pl.Int32).alias('sem_epid_recepcion')
-                ])
-        
-        # Procesamiento específico para edad con validaciones
-        if 'edad' in df.columns:
-            try:
-                df_with_derived = df_with_derived.with_columns(
-                    pl.col('edad')
-                    .cast(pl.Utf8, strict=False)
-                    .str.replace_all(r'[^\d]', '')  # Eliminar caracteres no numéricos
-                    .cast(pl.Int32, strict=False)
-                    .fill_null(0)
-                    .clip(0, 120)  # Limitar edad entre 0 y 120 años
-                    .alias('edad')
-                )
-                logger.info('Columna edad normalizada exitosamente con validaciones de rango')
-            except Exception as e:
-                logger.warning(f'Error normalizando columna edad: {e}')
-                df_with_derived = df_with_derived.with_columns(
-                    pl.lit(0).cast(pl.Int32).alias('edad')
-                )
+        plan = df.lazy()
+        for _, expresiones, _ in etapas:
+            plan = plan.with_columns(expresiones)
+        try:
+            df_with_derived = plan.collect()
+            logger.info(f'Campos derivados calculados: {", ".join(nombre for nombre, _, _ in etapas)}')
+            return df_with_derived
+        except Exception as e:
+            logger.warning(f'Error en el plan de campos derivados: {e}. Se calcula por etapas')
         
-        # Procesamiento específico para días de evolución con validaciones
-        if 'dias_evolucion' in df.columns:
+        df_with_derived = df
+        for nombre, expresiones, por_defecto in etapas:
             try:
-                df_with_derived = df_with_derived.with_columns(
-                    pl.col('dias_evolucion')
-                    .cast(pl.Utf8, strict=False)
-                    .str.replace_all(r'[^\d]', '')  # Eliminar caracteres no numéricos
-                    .cast(pl.Int32, strict=False)
-                    .fill_null(0)
-                    .clip(0, 365)  # Limitar días de evolución entre 0 y 365 días
-                    .alias('dias_evolucion')
-                )
-                logger.info('Columna dias_evolucion normalizada exitosamente con validaciones de rango')
+                df_with_derived = df_with_derived.with_columns(expresiones)
             except Exception as e:
-                logger.warning(f'Error normalizando columna dias_evolucion: {e}')
-                df_with_derived = df_with_derived.with_columns(
-                    pl.lit(0).cast(pl.Int32).alias('dias_evolucion')
-                )
+                logger.warning(f'Error calculando {nombre}: {e}')
+                df_with_derived = df_with_derived.with_columns(por_defecto)
         
         return df_with_derived
@@ -1,77 +1,13 @@
-from .text_utils import normalizar_texto_base
+from typing import Optional
 
-MAPEO_DEPARTAMENTOS = {
-    'CAP': 'CAPITAL',
-    'SDE': 'CAPITAL',
-    'CAPS': 'CAPITAL',
-    '?CAP': 'CAPITAL',
-    'SGO': 'CAPITAL',
-    'CCAP': 'CAPITAL',
-    'SANTIAGO DEL ESTERO': 'CAPITAL',
-    'CPA': 'CAPITAL',
-    'CAP.': 'CAPITAL',
-    'CA': 'CAPITAL',
-    'PELEGRINI': 'PELLEGRINI',
-    'TABOADA': 'GENERAL TABOADA',
-    'GRAL TABOADA': 'GENERAL TABOADA',
-    'GENERAL TADOADA': 'GENERAL TABOADA',
-    'AATUYA': 'GENERAL TABOADA',
-    'RIVADAVIA': 'MITRE',
-    'LB': 'BANDA',
-    'LA BANDA': 'BANDA',
-    'BADNA': 'BANDA',
-    'LA BADNA': 'BANDA',
-    'BAND': 'BANDA',
-    'BANSA': 'BANDA',
-    'CLODOMIRA': 'BANDA',
-    'M MORENO': 'MORENO',
-    'MARIANO MORENO': 'MORENO',
-    'QUIMILI': 'MORENO',
-    'SAN PEDRO': 'GUASAYAN',
-    'LAVALLE': 'GUASAYAN',
-    'GUSAYAN': 'GUASAYAN',
-    'JFI': 'JUAN FELIPE IBARRA',
-    'J F IBARRA': 'JUAN FELIPE IBARRA',
-    'J. F. IBARRA': 'JUAN FELIPE IBARRA',
-    'J. F IBARRA': 'JUAN FELIPE IBARRA',
-    'JUAN F IBARRA': 'JUAN FELIPE IBARRA',
-    'J.F.I': 'JUAN FELIPE IBARRA',
-    'J.F. IBARRA': 'JUAN FELIPE IBARRA',
-    'JUAN F. IBARRA': 'JUAN FELIPE IBARRA',
-    'J.F.IBARRA': 'JUAN FELIPE IBARRA',
-    'J.F IBARRA': 'JUAN FELIPE IBARRA',
-    'JF IBARRA': 'JUAN FELIPE IBARRA',
-    'J. F.I': 'JUAN FELIPE IBARRA',
-    'RH': 'RIO HONDO',
-    'RIO HOND': 'RIO HONDO',
-    'RI HONDO': 'RIO HONDO',
-    'TRH': 'RIO HONDO',
-    'QUEBRACHO': 'QUEBRACHOS',
-    'STA ROSA': 'LORETO',
-    'SANTA ROSA': 'LORETO',
-    'GRANEROS': 'LORETO',
-    'LA PAZ': 'LORETO',
-    'EL ALTO': 'JIMENEZ',
-    'ROBELS': 'ROBLES',
-    'FRIAS': 'CHOYA',
-    'BANDERA': 'BELGRANO',
-    'FIGUEORA': 'FIGUEROA',
-    'FIGEUROA': 'FIGUEROA',
-    'LA CA¥ADA': 'FIGUEROA',
-    'BREA POZO': 'SAN MARTIN',
-    'FERNANDEZ': 'ROBLES',
-    'AGUIIRRE': 'AGUIRRE',
-    'MONTE QUEMADO': 'COPO',
-    'DESCONOCIDO': 'DESCONOCIDO',
-    'NO INFORMADO': 'DESCONOCIDO',
-    'SIN DATO': 'DESCONOCIDO',
-    '-': 'DESCONOCIDO',
-    'SIN DATOS': 'DESCONOCIDO',
-    'DESCONOCIDA': 'DESCONOCIDO',
-    'N/A': 'DESCONOCIDO',
-    'NA': 'DESCONOCIDO',
-    'NONE': 'DESCONOCIDO',
-}
+from .mapeos import tablas
+from .text_utils import clave_texto_base, normalizar_texto_base
+
+# La tabla de variantes vive en app/data/mapeos/departamentos.json
+
+def clave_departamento(valor: str) -> Optional[str]:
+    '''Clave canónica con la que se consulta el índice de departamentos.'''
+    return clave_texto_base(valor, quitar_tildes_flag=True)
 
 def normalizar_departamento(valor: str) -> str:
-    return normalizar_texto_base(valor, MAPEO_DEPARTAMENTOS, quitar_tildes_flag=True)
+    return normalizar_texto_base(valor, tablas().indices['departamentos'], quitar_tildes_flag=True)
@@ -0,0 +1,99 @@
+import logging
+import threading
+from typing import Dict, List, Optional
+
+import polars as pl
+
+logger = logging.getLogger(__name__)
+
+# Formatos de fecha vistos en laboratorio_dengue, en orden de prioridad
+FORMATOS_FECHA = ['%Y-%m-%d', '%d/%m/%Y', '%Y/%m/%d']
+
+# Valores de cada columna que se prueban para elegir su formato dominante
+TAMANIO_MUESTRA = 1000
+
+# Si más de esta fracción de una columna no parsea con el formato cacheado,
+# se vuelve a detectar
+RESIDUO_MAXIMO = 0.5
+
+# Columna -> formatos ordenados, el dominante primero. Persiste entre refrescos.
+_formatos_por_columna: Dict[str, List[str]] = {}
+_lock_formatos = threading.Lock()
+
+def detectar_formatos(serie: pl.Series, tamanio_muestra: int = TAMANIO_MUESTRA) -> List[str]:
+    '''
+    Ordena FORMATOS_FECHA según cuántos valores de una muestra de la serie
+    parsea cada uno. A igual cantidad se respeta el orden de prioridad.
+    '''
+    muestra = serie.drop_nulls()
+    if muestra.len() > tamanio_muestra:
+        muestra = muestra.sample(tamanio_muestra, seed=0)
+    if muestra.len() == 0:
+        return list(FORMATOS_FECHA)
+
+    aciertos = {
+        formato: muestra.str.strptime(pl.Date, format=formato, strict=False).is_not_null().sum()
+        for formato in FORMATOS_FECHA
+    }
+    return sorted(FORMATOS_FECHA, key=lambda formato: -aciertos[formato])
+
+def formatos_columna(serie: pl.Series, columna: Optional[str] = None) -> List[str]:
+    '''Formatos de la columna: los cacheados si existen, si no se detectan (y se cachean).'''
+    if columna is None:
+        return detectar_formatos(serie)
+    with _lock_formatos:
+        formatos = _formatos_por_columna.get(columna)
+    if formatos is None:
+        formatos = detectar_formatos(serie)
+        logger.info(f'Formato de fecha detectado para {columna}: {formatos[0]}')
+        with _lock_formatos:
+            _formatos_por_columna[columna] = formatos
+    return formatos
+
+def olvidar_formatos():
+    with _lock_formatos:
+        _formatos_por_columna.clear()
+
+def parsear_fechas(serie: pl.Series, columna: Optional[str] = None) -> pl.Series:
+    '''
+    Convierte una serie de texto a pl.Date. La columna completa se parsea una
+    sola vez con su formato dominante; solo el residuo que no coincide pasa
+    por los demás formatos.
+
+    Los formatos conocidos no se solapan (ningún texto parsea con dos), así
+    que el resultado es el mismo que probar cada formato sobre toda la serie.
+    '''
+    serie = serie.cast(pl.Utf8)
+    formatos = formatos_columna(serie, columna)
+    fechas = serie.str.strptime(pl.Date, format=formatos[0], strict=False)
+
+    residuo = fechas.is_null() & serie.is_not_null()
+    cantidad_residuo = residuo.sum()
+    if not cantidad_residuo:
+        return fechas
+
+    if columna is not None and cantidad_residuo > RESIDUO_MAXIMO * serie.len():
+        logger.info(f'{cantidad_residuo} fechas de {columna} no usan {formatos[0]}: se vuelve a detectar el formato')
+        with _lock_formatos:
+            _formatos_por_columna.pop(columna, None)
+        anterior, formatos = formatos[0], formatos_columna(serie, columna)
+        if formatos[0] != anterior:
+            fechas = serie.str.strptime(pl.Date, format=formatos[0], strict=False)
+            residuo = fechas.is_null() & serie.is_not_null()
+            if not residuo.any():
+                return fechas
+
+    indices = residuo.arg_true()
+    restantes = serie.gather(indices)
+    alternativas = pl.select(pl.coalesce([
+        pl.lit(restantes).str.strptime(pl.Date, format=formato, strict=False)
+        for formato in formatos[1:]
+    ])).to_series()
+    return fechas.scatter(indices, alternativas).rename(serie.name)
+
+def parsear_fecha(expr: pl.Expr, columna: Optional[str] = None) -> pl.Expr:
+    '''
+    Convierte una expresión de texto a pl.Date probando cada formato conocido.
+    Con columna, el formato detectado queda cacheado para los próximos lotes.
+    '''
+    return expr.map_batches(lambda serie: parsear_fechas(serie, columna), return_dtype=pl.Date)
@@ -1,47 +1,78 @@
 import re
 from typing import Optional
 
-def normalizar_laboratorio(valor: Optional[str]) -> str:
-    if not valor or str(valor).strip() in ['', '-', '--', '?']:
-        return 'no realizado'
+_ESPACIOS = re.compile(r'\s+')
+_ESPECIALES = re.compile(r'[^\w\s\-]')
 
-    # Limpiar espacios múltiples, normalizar y eliminar caracteres especiales
-    val = str(valor).strip()
-    val = re.sub(r'\s+', ' ', val)  # Espacios múltiples -> un espacio
-    val = val.lower()
-    val = re.sub(r'[^\w\s\-]', '', val)  # Eliminar caracteres especiales excepto guiones
+# Valores que se consideran "sin resultado" antes de limpiar
+VALORES_VACIOS = frozenset(['', '-', '--', '?'])
 
-    if re.search(r'no detectable|no detectado|negativo|non detectable', val):
-        return 'negativo'
+# Reglas en orden de precedencia: gana la primera que aparezca en el valor,
+# sin importar en qué posición del texto esté.
+REGLAS_LABORATORIO = [
+    ('negativo', r'no detectable|no detectado|negativo|non detectable'),
+    ('positivo', r'detectable|positivo|positiva'),
+    ('en proceso', r'en proceso|en estudio'),
+    # Variaciones de "no realizado" incluyendo typos comunes y espacios extra
+    ('no realizado', r'no\s+(?:realizado|relizado|realiado|realzado|realisado)'
+                     r'|no\s+(?:procesado|procesada|efectuado|efectuada)'
+                     r'|sin\s+(?:realizar|procesar)'),
+    ('indeterminado', r'indeterminado'),
+    ('serotipo', r'den[\s\-_.]*(?P<digito>[1-4])'),
+]
 
-    if re.search(r'detectable|positivo|positiva', val):
-        return 'positivo'
+# Valores exactos. Ninguna regla de mayor precedencia los alcanza, así que
+# pueden resolverse antes del escaneo.
+VALORES_EXACTOS = {
+    'den_': 'DEN-1',
+    'den-': 'DEN-1',
+    'den': 'DEN-1',
+    'de-2': 'DEN-2',
+    '25': 'DEN-2',
+}
 
-    if 'en proceso' in val or 'en estudio' in val:
-        return 'en proceso'
+# Todas las reglas en una sola alternativa: un finditer recorre el valor una
+# vez y se queda con la regla de menor índice. Ninguna regla puede empezar
+# dentro de la coincidencia de otra de menor precedencia, así que las
+# coincidencias no solapadas alcanzan (test_laboratorio_processor lo verifica).
+_CLASIFICADOR = re.compile('|'.join(
+    f'(?P<r{indice}>{patron})' for indice, (_, patron) in enumerate(REGLAS_LABORATORIO)
+))
+_SEROTIPO = len(REGLAS_LABORATORIO) - 1
 
-    # Capturar variaciones de "no realizado" incluyendo typos comunes y espacios extra
-    if re.search(r'no\s+(realizado|relizado|realiado|realzado|realisado)', val) or \
-       re.search(r'no\s+(procesado|procesada|efectuado|efectuada)', val) or \
-       re.search(r'sin\s+(realizar|procesar)', val) or \
-       val in ['no realizado', 'no  realizado', 'no   realizado', 'no realiado', 'no relizado']:
+def limpiar_laboratorio(valor: str) -> str:
+    '''Espacios colapsados, minúsculas y sin caracteres especiales excepto guiones.'''
+    val = _ESPACIOS.sub(' ', str(valor).strip())
+    return _ESPECIALES.sub('', val.lower())
+
+def normalizar_laboratorio(valor: Optional[str]) -> str:
+    if not valor or str(valor).strip() in VALORES_VACIOS:
         return 'no realizado'
 
-    if 'indeterminado' in val:
-        return 'indeterminado'
+    val = limpiar_laboratorio(valor)
 
-    match = re.search(r'den[\s\-_.]*([1-4])', val)
-    if match:
-        return f'DEN-{match.group(1)}'
+    if val in VALORES_EXACTOS:
+        return VALORES_EXACTOS[val]
+
+    mejor = len(REGLAS_LABORATORIO)
+    serotipo = None
+    for match in _CLASIFICADOR.finditer(val):
+        indice = match.lastindex - 1
+        if indice < mejor:
+            mejor = indice
+            if indice == _SEROTIPO:
+                serotipo = match.group('digito')
+            if mejor == 0:
+                break
+
+    if mejor == _SEROTIPO:
+        return f'DEN-{serotipo}'
+    if mejor < len(REGLAS_LABORATORIO):
+        return REGLAS_LABORATORIO[mejor][0]
 
     if 'den' in val and 'y' in val:
         return 'DEN-1 y DEN-2'
 
-    if val in ['den_', 'den-', 'den']:
-        return 'DEN-1'
-    if val in ['de-2', '25']:
-        return 'DEN-2'
-
     # Fallback: si contiene variaciones de "no realizado" que se escaparon
     if 'no' in val and ('real' in val or 'reliz' in val or 'proces' in val):
         return 'no realizado'
@@ -0,0 +1,143 @@
+"""
+Registro de las tablas de normalización (localidades, departamentos,
+establecimientos y alias previos).
+
+Las tablas viven como archivos JSON versionados en app/data/mapeos (o en
+settings.RUTA_MAPEOS) con la forma {"version": n, "mapeo": {...}}. Se cargan
+en una instantánea inmutable; recargar() arma una instantánea nueva y la
+reemplaza de una sola vez, de modo que cada normalización ve las tablas
+completas de antes o las de después, nunca una mezcla.
+"""
+import hashlib
+import json
+import logging
+import os
+import threading
+from types import MappingProxyType
+from typing import Any, Dict, Mapping, NamedTuple, Optional, Sequence, Set
+
+from app.core.config import settings
+from .text_utils import indice_canonico
+
+logger = logging.getLogger(__name__)
+
+TABLAS = ('localidades', 'departamentos', 'establecimientos', 'alias_previos')
+# Tablas que se consultan por clave canónica (alias_previos se consulta tal cual)
+TABLAS_INDEXADAS = ('localidades', 'departamentos', 'establecimientos')
+
+def firma_mapeos(mapeos: Sequence[Any]) -> str:
+    '''
+    Huella del contenido actual de las tablas (dicts o listas de pares). Usa
+    hashlib y no hash() para que coincida entre procesos con distinta semilla.
+    '''
+    digest = hashlib.blake2b(digest_size=8)
+    for mapeo in mapeos:
+        items = mapeo.items() if isinstance(mapeo, Mapping) else mapeo
+        digest.update(repr(sorted(items)).encode())
+    return digest.hexdigest()
+
+class TablasNormalizacion(NamedTuple):
+    localidades: Mapping[str, str]
+    departamentos: Mapping[str, str]
+    establecimientos: Mapping[str, str]
+    alias_previos: Mapping[str, str]
+    # Tabla -> versión declarada en su archivo
+    versiones: Mapping[str, Any]
+    # Tabla -> huella del contenido
+    firmas: Mapping[str, str]
+    # Tabla -> clave canónica -> valor canónico (ver text_utils.indice_canonico)
+    indices: Mapping[str, Mapping[str, str]]
+
+    @property
+    def version(self) -> str:
+        '''Identificador del conjunto de tablas: cambia si cambia cualquiera de ellas.'''
+        return firma_mapeos([sorted(self.firmas.items())])
+
+    def describir(self) -> Dict[str, Any]:
+        return {
+            'version': self.version,
+            'tablas': {
+                tabla: {
+                    'version': self.versiones[tabla],
+                    'entradas': len(getattr(self, tabla)),
+                    'claves': len(self.indices.get(tabla, getattr(self, tabla))),
+                }
+                for tabla in TABLAS
+            },
+        }
+
+def _leer_tabla(ruta: str, tabla: str) -> tuple:
+    with open(os.path.join(ruta, f'{tabla}.json'), encoding='utf-8') as archivo:
+        contenido = json.load(archivo)
+
+    mapeo = contenido.get('mapeo')
+    if not isinstance(mapeo, dict) or not all(
+        isinstance(clave, str) and isinstance(valor, str) for clave, valor in mapeo.items()
+    ):
+        raise ValueError(f'La tabla {tabla} debe tener un objeto "mapeo" de texto a texto')
+    return contenido.get('version'), mapeo
+
+def cargar_tablas(ruta: Optional[str] = None) -> TablasNormalizacion:
+    '''
+    Lee y valida todos los archivos y arma los índices canónicos; si alguno
+    falla (incluidas variantes con la misma clave y distinto destino) no se
+    devuelve nada a medias.
+    '''
+    ruta = ruta or settings.RUTA_MAPEOS
+    versiones, mapeos = {}, {}
+    for tabla in TABLAS:
+        versiones[tabla], mapeos[tabla] = _leer_tabla(ruta, tabla)
+    indices = {}
+    for tabla in TABLAS_INDEXADAS:
+        try:
+            indices[tabla] = MappingProxyType(indice_canonico(mapeos[tabla]))
+        except ValueError as e:
+            raise ValueError(f'Tabla {tabla}: {e}') from e
+
+    return TablasNormalizacion(
+        **{tabla: MappingProxyType(mapeo) for tabla, mapeo in mapeos.items()},
+        versiones=MappingProxyType(versiones),
+        firmas=MappingProxyType({tabla: firma_mapeos([mapeo]) for tabla, mapeo in mapeos.items()}),
+        indices=MappingProxyType(indices)
+    )
+
+def diferencias(anteriores: TablasNormalizacion, nuevas: TablasNormalizacion) -> Dict[str, Set[str]]:
+    '''
+    Claves agregadas, quitadas o con otro valor, por tabla (solo tablas con
+    cambios). En las tablas indexadas son claves canónicas: agregar una
+    variante que ya cubría otra no cuenta como cambio.
+    '''
+    cambios = {}
+    for tabla in TABLAS:
+        if tabla in TABLAS_INDEXADAS:
+            antes, despues = anteriores.indices[tabla], nuevas.indices[tabla]
+        else:
+            antes, despues = getattr(anteriores, tabla), getattr(nuevas, tabla)
+        claves = {
+            clave for clave in antes.keys() | despues.keys()
+            if antes.get(clave) != despues.get(clave)
+        }
+        if claves:
+            cambios[tabla] = claves
+    return cambios
+
+_tablas: TablasNormalizacion = cargar_tablas()
+_lock_recarga = threading.Lock()
+
+def tablas() -> TablasNormalizacion:
+    '''Instantánea vigente. Quien la lee una vez trabaja con un conjunto coherente.'''
+    return _tablas
+
+def recargar(ruta: Optional[str] = None) -> Dict[str, Set[str]]:
+    '''Vuelve a leer los archivos y reemplaza la instantánea. Devuelve las claves que cambiaron.'''
+    global _tablas
+    with _lock_recarga:
+        nuevas = cargar_tablas(ruta)
+        cambios = diferencias(_tablas, nuevas)
+        if cambios:
+            _tablas = nuevas
+            resumen = {tabla: len(claves) for tabla, claves in cambios.items()}
+            logger.info(f'Tablas de normalización recargadas (versión {nuevas.version}): {resumen}')
+        else:
+            logger.info('Recarga de tablas de normalización sin cambios')
+        return cambios
@@ -0,0 +1,166 @@
+"""
+Memo LRU acotado para los normalizadores de texto.
+
+Los mismos valores crudos ('CAP', 'LA BANDA', 'NO DETECTABLE', ...) se
+normalizan una y otra vez. Cada normalizador memoizado guarda sus últimos
+resultados junto con la firma de las tablas de mapeo de las que depende; si
+alguna tabla cambia, el memo se vacía en la siguiente verificación.
+
+El hilo de procesamiento y el event loop (KPIs) usan los mismos memos, así
+que las operaciones sobre el LRU van bajo un lock; la función normalizadora
+corre fuera de él.
+"""
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Sequence
+
+from .mapeos import firma_mapeos, tablas
+from .localidad_processor import normalizar_localidad
+from .departamento_processor import normalizar_departamento
+from .laboratorio_processor import REGLAS_LABORATORIO, VALORES_EXACTOS, normalizar_laboratorio
+from .establecimiento_processor import normalizar_establecimiento_notificador
+
+logger = logging.getLogger(__name__)
+
+TAMANIO_MEMO = 50_000
+
+class NormalizadorMemoizado:
+    def __init__(self, nombre: str, funcion: Callable[[Any], str], firma: Callable[[], str], max_size: int = TAMANIO_MEMO):
+        '''firma devuelve la huella actual de las tablas de las que depende funcion.'''
+        self.nombre = nombre
+        self.funcion = funcion
+        self.obtener_firma = firma
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._cache: 'OrderedDict[Any, str]' = OrderedDict()
+        self._firma = firma()
+        self._lock = threading.Lock()
+
+    def __call__(self, valor: Any) -> str:
+        try:
+            with self._lock:
+                resultado = self._cache[valor]
+                self._cache.move_to_end(valor)
+                self.hits += 1
+        except KeyError:
+            resultado = self.funcion(valor)
+            with self._lock:
+                self.misses += 1
+                self._guardar(valor, resultado)
+            return resultado
+        except TypeError:
+            # Valor no hasheable: se normaliza sin pasar por el memo
+            return self.funcion(valor)
+
+        return resultado
+
+    def _guardar(self, valor: Any, resultado: str):
+        '''Se llama con el lock tomado.'''
+        self._cache[valor] = resultado
+        if len(self._cache) > self.max_size:
+            self._cache.popitem(last=False)
+
+    @property
+    def firma(self) -> str:
+        return self._firma
+
+    def verificar(self) -> bool:
+        '''Vacía el memo si alguna tabla de mapeo cambió. Devuelve True si lo invalidó.'''
+        firma = self.obtener_firma()
+        if firma == self._firma:
+            return False
+        logger.info(f'Mapeos de {self.nombre} modificados: se invalida el memo ({len(self._cache)} entradas)')
+        with self._lock:
+            self._firma = firma
+            self._limpiar()
+        return True
+
+    def limpiar(self):
+        with self._lock:
+            self._limpiar()
+
+    def _limpiar(self):
+        self._cache.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def buscar(self, valores: Sequence[Any]) -> Dict[Any, str]:
+        '''Resultados ya memoizados para los valores dados (cuenta hits y misses).'''
+        encontrados = {}
+        with self._lock:
+            for valor in valores:
+                if valor in self._cache:
+                    self.hits += 1
+                    self._cache.move_to_end(valor)
+                    encontrados[valor] = self._cache[valor]
+                else:
+                    self.misses += 1
+        return encontrados
+
+    def actualizar(self, valores: Sequence[Any], resultados: Sequence[str]):
+        '''Incorpora resultados calculados fuera del memo (por ejemplo, en el pool).'''
+        with self._lock:
+            for valor, resultado in zip(valores, resultados):
+                self._guardar(valor, resultado)
+
+    def exportar(self) -> Dict[Any, str]:
+        '''Copia de las entradas, de la más antigua a la más reciente.'''
+        with self._lock:
+            return dict(self._cache)
+
+    def sembrar(self, entradas: Dict[Any, str], firma: str):
+        '''Carga entradas calculadas por otro proceso si se hicieron con los mismos mapeos.'''
+        if firma != self._firma:
+            logger.info(f'Semilla de {self.nombre} descartada: los mapeos no coinciden')
+            return
+        with self._lock:
+            for valor, resultado in entradas.items():
+                self._guardar(valor, resultado)
+
+    def estadisticas(self) -> Dict[str, Any]:
+        consultas = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'size': len(self._cache),
+            'max_size': self.max_size,
+            'hit_rate': round(self.hits / consultas, 4) if consultas else 0.0,
+        }
+
+_FIRMA_LABORATORIO = firma_mapeos([REGLAS_LABORATORIO, VALORES_EXACTOS])
+
+localidad_memo = NormalizadorMemoizado(
+    'localidad', normalizar_localidad, lambda: tablas().firmas['localidades']
+)
+departamento_memo = NormalizadorMemoizado(
+    'departamento', normalizar_departamento, lambda: tablas().firmas['departamentos']
+)
+laboratorio_memo = NormalizadorMemoizado('laboratorio', normalizar_laboratorio, lambda: _FIRMA_LABORATORIO)
+establecimiento_memo = NormalizadorMemoizado(
+    'establecimiento',
+    normalizar_establecimiento_notificador,
+    lambda: tablas().firmas['establecimientos'] + tablas().firmas['alias_previos']
+)
+
+MEMOS = {
+    memo.nombre: memo
+    for memo in (localidad_memo, departamento_memo, laboratorio_memo, establecimiento_memo)
+}
+
+def exportar_memos() -> Dict[str, tuple]:
+    '''Semilla (firma, entradas) de cada memo, para pasar a los workers del pool.'''
+    return {nombre: (memo.firma, memo.exportar()) for nombre, memo in MEMOS.items()}
+
+def sembrar_memos(semillas: Optional[Dict[str, tuple]]):
+    for nombre, (firma, entradas) in (semillas or {}).items():
+        if nombre in MEMOS:
+            MEMOS[nombre].sembrar(entradas, firma)
+
+def verificar_memos():
+    for memo in MEMOS.values():
+        memo.verificar()
+
+def estadisticas_memos() -> Dict[str, Dict[str, Any]]:
+    return {nombre: memo.estadisticas() for nombre, memo in MEMOS.items()}
@@ -0,0 +1,103 @@
+"""
+Transporte de columnas de texto entre el proceso principal y los workers del
+pool mediante memoria compartida con el formato de Arrow (large_string).
+
+El proceso principal copia los buffers de la columna (offsets, datos y
+validez) una sola vez a un segmento de multiprocessing.shared_memory. A los
+workers solo viaja un descriptor con el nombre del segmento y el rango de
+filas; cada worker lee su porción sin copiar los buffers y deja su resultado
+en un segmento propio, del que también devuelve solo el descriptor.
+"""
+import logging
+from multiprocessing import resource_tracker
+from multiprocessing.shared_memory import SharedMemory
+from typing import List, NamedTuple, Optional
+
+import pyarrow as pa
+
+logger = logging.getLogger(__name__)
+
+class DescriptorColumna(NamedTuple):
+    '''Ubicación de una columna large_string dentro de un segmento compartido.'''
+    nombre: str
+    largo: int
+    bytes_offsets: int
+    bytes_datos: int
+    bytes_validez: int
+
+def _escribir(array: pa.Array) -> DescriptorColumna:
+    '''Copia los buffers de un array large_string a un segmento nuevo (offsets | datos | validez).'''
+    if array.offset:
+        array = pa.concat_arrays([array])
+    validez, offsets, datos = array.buffers()
+    partes = [offsets, datos, validez]
+    tamanios = [parte.size if parte is not None else 0 for parte in partes]
+
+    shm = SharedMemory(create=True, size=max(sum(tamanios), 1))
+    try:
+        posicion = 0
+        for parte, tamanio in zip(partes, tamanios):
+            if tamanio:
+                shm.buf[posicion:posicion + tamanio] = memoryview(parte).cast('B')
+            posicion += tamanio
+    except Exception:
+        shm.close()
+        shm.unlink()
+        raise
+    shm.close()
+
+    return DescriptorColumna(shm.name, len(array), *tamanios)
+
+def _leer(shm: SharedMemory, descriptor: DescriptorColumna, inicio: int, fin: int) -> List[Optional[str]]:
+    d = descriptor
+    offsets = pa.py_buffer(shm.buf[:d.bytes_offsets])
+    datos = pa.py_buffer(shm.buf[d.bytes_offsets:d.bytes_offsets + d.bytes_datos])
+    validez = None
+    if d.bytes_validez:
+        inicio_validez = d.bytes_offsets + d.bytes_datos
+        validez = pa.py_buffer(shm.buf[inicio_validez:inicio_validez + d.bytes_validez])
+
+    array = pa.Array.from_buffers(pa.large_string(), d.largo, [validez, offsets, datos])
+    valores = array.slice(inicio, fin - inicio).to_pylist()
+    # Las vistas sobre shm.buf tienen que liberarse antes de cerrar el segmento
+    del array, offsets, datos, validez
+    return valores
+
+def preparar_proceso_principal():
+    '''
+    Arranca el resource_tracker antes de crear el pool. Así los workers heredan
+    el mismo tracker y un segmento creado en un worker y liberado en el proceso
+    principal queda registrado y desregistrado en el mismo lugar.
+    '''
+    resource_tracker.ensure_running()
+
+def publicar_columna(valores: List[Optional[str]]) -> DescriptorColumna:
+    '''Publica una columna en memoria compartida. El llamador debe liberarla con liberar().'''
+    return _escribir(pa.array(valores, type=pa.large_string()))
+
+def leer_columna(descriptor: DescriptorColumna, inicio: int = 0, fin: Optional[int] = None) -> List[Optional[str]]:
+    '''Lee las filas [inicio, fin) de una columna publicada.'''
+    fin = descriptor.largo if fin is None else fin
+    shm = SharedMemory(name=descriptor.nombre)
+    try:
+        return _leer(shm, descriptor, inicio, fin)
+    finally:
+        shm.close()
+
+def recibir_columna(descriptor: DescriptorColumna) -> List[Optional[str]]:
+    '''Lee una columna completa publicada por otro proceso y libera su segmento.'''
+    shm = SharedMemory(name=descriptor.nombre)
+    try:
+        return _leer(shm, descriptor, 0, descriptor.largo)
+    finally:
+        shm.close()
+        shm.unlink()
+
+def liberar(descriptor: DescriptorColumna):
+    '''Libera el segmento de una columna (publicada por este proceso o recibida de un worker).'''
+    try:
+        shm = SharedMemory(name=descriptor.nombre)
+    except FileNotFoundError:
+        return
+    shm.close()
+    shm.unlink()
@@ -0,0 +1,147 @@
+"""
+Elección de la estrategia de ejecución y del tamaño de chunk por columna.
+
+Con la codificación por diccionario cada columna solo normaliza sus valores
+distintos, así que el trabajo a repartir es (valores pendientes) x (costo por
+valor). Si ese trabajo no paga el envío al pool se resuelve en el proceso
+principal; si la función libera el GIL (expresiones de Polars, o un
+intérprete sin GIL) alcanza con hilos; si no, va al pool de procesos. El
+costo por valor se mide en cada ejecución y los CPUs disponibles respetan la
+cuota del cgroup del contenedor.
+"""
+import logging
+import math
+import os
+import sys
+import threading
+from functools import lru_cache
+from typing import Dict, NamedTuple, Optional
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+ESTRATEGIAS = ('auto', 'serial', 'hilos', 'procesos')
+
+# Peso de la última medición en el promedio móvil del costo por valor
+PESO_MEDICION = 0.3
+
+def _cuota_cgroup(raiz: str = '/sys/fs/cgroup') -> Optional[float]:
+    '''CPUs que permite la cuota del cgroup (v2 cpu.max o v1 cfs_quota/cfs_period), o None si no hay límite.'''
+    try:
+        with open(os.path.join(raiz, 'cpu.max')) as archivo:
+            cuota, periodo = archivo.read().split()[:2]
+        return None if cuota == 'max' else int(cuota) / int(periodo)
+    except (OSError, ValueError):
+        pass
+    try:
+        with open(os.path.join(raiz, 'cpu', 'cpu.cfs_quota_us')) as archivo:
+            cuota = int(archivo.read())
+        with open(os.path.join(raiz, 'cpu', 'cpu.cfs_period_us')) as archivo:
+            periodo = int(archivo.read())
+        return None if cuota <= 0 or periodo <= 0 else cuota / periodo
+    except (OSError, ValueError):
+        return None
+
+def calcular_cpus(raiz: str = '/sys/fs/cgroup') -> int:
+    '''CPUs utilizables: afinidad del proceso acotada por la cuota del cgroup (redondeada hacia abajo).'''
+    if hasattr(os, 'sched_getaffinity'):
+        cpus = len(os.sched_getaffinity(0))
+    else:
+        cpus = os.cpu_count() or 1
+    cuota = _cuota_cgroup(raiz)
+    if cuota is not None:
+        cpus = min(cpus, max(1, int(cuota)))
+    return cpus
+
+@lru_cache(maxsize=1)
+def cpus_disponibles() -> int:
+    if settings.CPUS:
+        return settings.CPUS
+    cpus = calcular_cpus()
+    logger.info(f'CPUs disponibles para normalizar: {cpus}')
+    return cpus
+
+def sin_gil() -> bool:
+    '''True en un intérprete free-threaded con el GIL desactivado.'''
+    return not getattr(sys, '_is_gil_enabled', lambda: True)()
+
+class Estrategia(NamedTuple):
+    modo: str
+    workers: int
+    chunk_size: int
+
+class CostosNormalizacion:
+    '''Promedio móvil de segundos por valor de cada columna, alimentado por las ejecuciones reales.'''
+    def __init__(self, inicial: Optional[float] = None):
+        self.inicial = settings.COSTO_INICIAL_POR_VALOR if inicial is None else inicial
+        self._costos: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def costo(self, columna: str) -> float:
+        return self._costos.get(columna, self.inicial)
+
+    def medir(self, columna: str, segundos: float, valores: int):
+        if valores <= 0 or segundos <= 0:
+            return
+        medido = segundos / valores
+        with self._lock:
+            previo = self._costos.get(columna)
+            self._costos[columna] = medido if previo is None else (1 - PESO_MEDICION) * previo + PESO_MEDICION * medido
+
+    def como_dict(self) -> Dict[str, float]:
+        with self._lock:
+            return dict(self._costos)
+
+def elegir_estrategia(
+    valores: int,
+    costo_por_valor: float,
+    libera_gil: bool = False,
+    forzada: str = 'auto',
+    max_workers: Optional[int] = None,
+    chunk_size: Optional[int] = None,
+    cpus: Optional[int] = None
+) -> Estrategia:
+    '''
+    Estrategia para normalizar una columna de `valores` pendientes.
+
+    - serial: el trabajo estimado no llega a UMBRAL_PARALELO_SEGUNDOS (lo que
+      cuesta repartirlo) o hay un solo CPU.
+    - hilos: la función libera el GIL.
+    - procesos: el resto.
+
+    Una estrategia forzada se respeta, salvo 'procesos' para una función
+    que libera el GIL (expresiones de Polars): mandar la serie a otro proceso
+    solo agrega la serialización, así que va a hilos.
+
+    El chunk apunta a CHUNKS_POR_WORKER chunks por worker, con un piso de
+    OBJETIVO_SEGUNDOS_CHUNK de trabajo por chunk para que el envío no domine.
+    chunk_size fijo (argumento o settings.CHUNK_SIZE) reemplaza el cálculo.
+    '''
+    cpus = cpus or cpus_disponibles()
+    workers = max(1, min(max_workers or settings.MAX_WORKERS or cpus, cpus))
+    trabajo = valores * costo_por_valor
+
+    if forzada == 'procesos' and libera_gil:
+        modo = 'hilos'
+    elif forzada != 'auto':
+        modo = forzada
+    elif workers <= 1 or trabajo < settings.UMBRAL_PARALELO_SEGUNDOS:
+        modo = 'serial'
+    elif libera_gil or sin_gil():
+        modo = 'hilos'
+    else:
+        modo = 'procesos'
+
+    if modo == 'serial':
+        return Estrategia('serial', 1, max(valores, 1))
+
+    chunk_fijo = chunk_size or settings.CHUNK_SIZE
+    if chunk_fijo:
+        chunk = chunk_fijo
+    else:
+        por_reparto = math.ceil(valores / (workers * settings.CHUNKS_POR_WORKER))
+        por_costo = math.ceil(settings.OBJETIVO_SEGUNDOS_CHUNK / costo_por_valor) if costo_por_valor > 0 else 1
+        chunk = min(max(por_reparto, por_costo, settings.CHUNK_MINIMO), settings.CHUNK_MAXIMO)
+    chunk = max(1, min(chunk, max(valores, 1)))
+    return Estrategia(modo, max(1, min(workers, math.ceil(valores / chunk))), chunk)
@@ -0,0 +1,188 @@
+"""
+Versión vectorizada (expresiones de Polars) de los normalizadores de texto.
+
+Cada función recibe y devuelve una pl.Expr y reproduce exactamente a su par
+escalar de text_utils / establecimiento_processor, de modo que puede correr
+en el ejecutor multihilo de Polars sin GIL ni pool de procesos.
+"""
+import sys
+import unicodedata
+from functools import lru_cache
+from typing import Mapping
+
+import polars as pl
+
+from .mapeos import tablas
+from .text_utils import tabla_tildes
+from .laboratorio_processor import (
+    REGLAS_LABORATORIO,
+    VALORES_EXACTOS,
+    VALORES_VACIOS
+)
+
+# Caracteres que Python considera espacio (str.isspace / \s / strip()). El \s
+# de Polars no incluye \x1c-\x1f, por eso se usa una clase explícita.
+ESPACIOS = ''.join(c for c in map(chr, range(0x3001)) if c.isspace())
+_CLASE_ESPACIOS = '[' + ''.join(f'\\x{{{ord(c):04X}}}' for c in ESPACIOS) + ']+'
+
+def _rangos(predicado) -> str:
+    '''Rangos de código (formato de clase regex) de los caracteres que cumplen el predicado.'''
+    rangos = []
+    inicio = previo = None
+    for codigo in range(sys.maxunicode + 1):
+        if predicado(chr(codigo)):
+            if previo is not None and codigo == previo + 1:
+                previo = codigo
+                continue
+            if inicio is not None:
+                rangos.append((inicio, previo))
+            inicio = previo = codigo
+    if inicio is not None:
+        rangos.append((inicio, previo))
+    return ''.join(f'\\x{{{a:X}}}-\\x{{{b:X}}}' for a, b in rangos)
+
+@lru_cache(maxsize=1)
+def _clase_combinantes() -> str:
+    '''Clase regex con los caracteres de clase combinante distinta de cero (unicodedata.combining).'''
+    return '[' + _rangos(unicodedata.combining) + ']'
+
+@lru_cache(maxsize=1)
+def _clase_no_alfanumerica() -> str:
+    '''Caracteres que clave_canonica pasa a espacio (no alfanuméricos, salvo el "?").'''
+    return '[^' + _rangos(lambda c: c.isalnum() or c == '?') + ']'
+
+@lru_cache(maxsize=1)
+def _clase_especiales() -> str:
+    r'''Caracteres que elimina [^\w\s\-] en Python (el \w de Polars también acepta marcas combinantes).'''
+    return '[^' + _rangos(lambda c: c.isalnum() or c == '_' or c.isspace() or c == '-') + ']'
+
+def _reemplazar(expr: pl.Expr, reemplazos: list) -> pl.Expr:
+    '''Aplica str.replace de Python en secuencia (todas las ocurrencias, literal).'''
+    for patron, reemplazo in reemplazos:
+        expr = expr.str.replace_all(patron, reemplazo, literal=True)
+    return expr
+
+def _colapsar_espacios(expr: pl.Expr) -> pl.Expr:
+    return expr.str.replace_all(_CLASE_ESPACIOS, ' ')
+
+def _strip(expr: pl.Expr) -> pl.Expr:
+    return expr.str.strip_chars(ESPACIOS)
+
+def _es_vacio(expr: pl.Expr) -> pl.Expr:
+    return expr.is_null() | (_strip(expr) == '')
+
+# Los grupos de cada replace_many no interactúan entre sí (patrones que no se
+# solapan y reemplazos que no crean nuevas coincidencias), así que una pasada
+# simultánea equivale a la cadena de replace() de la versión escalar.
+_TILDES_PREVIAS = ['?A', '?E', '?I', '?O', '?U']
+_TILDES_POSTERIORES = ['A?', 'E?', 'I?', 'O?', 'U?']
+_ACENTUADAS = ['Á', 'É', 'Í', 'Ó', 'Ú']
+
+def _arreglar_codificacion(expr: pl.Expr, palabras_enie: bool) -> pl.Expr:
+    expr = expr.str.replace_many(_TILDES_PREVIAS, _ACENTUADAS)
+    expr = expr.str.replace_many(_TILDES_POSTERIORES, _ACENTUADAS)
+    if palabras_enie:
+        expr = expr.str.replace_many(['NU?EZ', 'A?ATUYA', 'CA?ADA'], ['NUÑEZ', 'AÑATUYA', 'CAÑADA'])
+    return expr.str.replace_many(['N?', 'N§'], ['Ñ', 'Ñ'])
+
+@lru_cache(maxsize=1)
+def _tabla_tildes() -> tuple:
+    tabla = tabla_tildes()
+    return list(tabla), list(tabla.values())
+
+def quitar_tildes_expr(expr: pl.Expr) -> pl.Expr:
+    '''Equivalente a text_utils.quitar_tildes: la misma tabla de traducción en una sola pasada.'''
+    # Los patrones son caracteres sueltos: replace_many equivale a str.translate
+    originales, traducciones = _tabla_tildes()
+    return expr.str.replace_many(originales, traducciones)
+
+_MOJIBAKE = list('ÑñØø§¤¥°º')
+# El regex de Polars no tiene lookbehind: el borde de palabra se captura y se repone
+_UPA = r'(^| )UPA ?(?:NRO|NO|N\?*|\?+)? ?(\d)'
+_MARCA_NUMERO = r'(^| )(?:NRO|NO|N\?*|\?+) ?(\d)'
+
+def clave_canonica_expr(expr: pl.Expr) -> pl.Expr:
+    '''Equivalente a text_utils.clave_canonica.'''
+    expr = expr.str.replace_many(_MOJIBAKE, ['?'] * len(_MOJIBAKE))
+    expr = expr.str.normalize('NFKD').str.replace_all(_clase_combinantes(), '').str.to_uppercase()
+    expr = expr.str.replace_all(_clase_no_alfanumerica(), ' ').str.replace_all(' +', ' ').str.strip_chars(' ')
+    expr = expr.str.replace_all(_UPA, '${1}UPA N${2}').str.replace_all(_MARCA_NUMERO, '${1}N${2}')
+    return expr.str.replace_all('?', '', literal=True).str.replace_all(' +', ' ').str.strip_chars(' ')
+
+def limpiar_basico_expr(expr: pl.Expr) -> pl.Expr:
+    '''Equivalente a text_utils.limpiar_basico.'''
+    limpio = _arreglar_codificacion(_strip(expr), palabras_enie=True)
+    limpio = _colapsar_espacios(limpio).str.to_uppercase()
+    return pl.when(_es_vacio(expr)).then(pl.lit('')).otherwise(limpio)
+
+def normalizar_texto_base_expr(expr: pl.Expr, indice: Mapping[str, str], quitar_tildes_flag: bool = True) -> pl.Expr:
+    '''Equivalente a text_utils.normalizar_texto_base.'''
+    v = limpiar_basico_expr(expr)
+    if quitar_tildes_flag:
+        v = quitar_tildes_expr(v)
+    v = _strip(_colapsar_espacios(v))
+    resultado = clave_canonica_expr(v).replace_strict(dict(indice), default=v, return_dtype=pl.Utf8)
+    return pl.when(_es_vacio(expr)).then(pl.lit('DESCONOCIDO')).otherwise(resultado)
+
+def normalizar_localidad_expr(expr: pl.Expr) -> pl.Expr:
+    '''Equivalente a localidad_processor.normalizar_localidad.'''
+    resultado = normalizar_texto_base_expr(expr, tablas().indices['localidades'], quitar_tildes_flag=True)
+    return (
+        pl.when(resultado.str.contains('TERMAS', literal=True) & resultado.str.contains('HONDO', literal=True))
+        .then(pl.lit('TERMAS DE RIO HONDO'))
+        .when(resultado.is_in(['CAP', 'CAPITAL', 'CAPÍTAL']))
+        .then(pl.lit('SANTIAGO DEL ESTERO'))
+        .otherwise(resultado)
+    )
+
+def normalizar_departamento_expr(expr: pl.Expr) -> pl.Expr:
+    '''Equivalente a departamento_processor.normalizar_departamento.'''
+    return normalizar_texto_base_expr(expr, tablas().indices['departamentos'], quitar_tildes_flag=True)
+
+def limpiar_establecimiento_expr(expr: pl.Expr) -> pl.Expr:
+    '''Equivalente a establecimiento_processor.limpiar_establecimiento.'''
+    limpio = _arreglar_codificacion(_strip(expr), palabras_enie=False)
+    return _colapsar_espacios(limpio).str.to_uppercase()
+
+def normalizar_establecimiento_expr(expr: pl.Expr, quitar_tildes_flag: bool = True) -> pl.Expr:
+    '''Equivalente a establecimiento_processor.normalizar_establecimiento_notificador.'''
+    vigentes = tablas()
+    alias_previos, establecimientos = dict(vigentes.alias_previos), dict(vigentes.indices['establecimientos'])
+    v = limpiar_establecimiento_expr(expr)
+    alias = _strip(expr.str.to_lowercase())
+    v = pl.when(alias.is_in(list(alias_previos))).then(alias.replace(alias_previos)).otherwise(v)
+    if quitar_tildes_flag:
+        v = quitar_tildes_expr(v)
+    v = _strip(_colapsar_espacios(v))
+    resultado = clave_canonica_expr(v).replace_strict(establecimientos, default=v.str.to_uppercase(), return_dtype=pl.Utf8)
+    return pl.when(_es_vacio(expr)).then(pl.lit('DESCONOCIDO')).otherwise(resultado)
+
+def limpiar_laboratorio_expr(expr: pl.Expr) -> pl.Expr:
+    '''Equivalente a laboratorio_processor.limpiar_laboratorio.'''
+    val = _colapsar_espacios(_strip(expr)).str.to_lowercase()
+    return val.str.replace_all(_clase_especiales(), '')
+
+def normalizar_laboratorio_expr(expr: pl.Expr) -> pl.Expr:
+    '''Equivalente a laboratorio_processor.normalizar_laboratorio: mismas reglas y precedencia.'''
+    val = limpiar_laboratorio_expr(expr)
+    reglas = dict(REGLAS_LABORATORIO)
+
+    resultado = (
+        pl.when(expr.is_null() | _strip(expr).is_in(list(VALORES_VACIOS))).then(pl.lit('no realizado'))
+        .when(val.is_in(list(VALORES_EXACTOS))).then(val.replace(VALORES_EXACTOS))
+    )
+    for categoria, patron in REGLAS_LABORATORIO:
+        if categoria == 'serotipo':
+            continue
+        resultado = resultado.when(val.str.contains(patron)).then(pl.lit(categoria))
+
+    return (
+        resultado
+        .when(val.str.contains(reglas['serotipo']))
+        .then(pl.lit('DEN-') + val.str.extract(reglas['serotipo'], 1))
+        .when(val.str.contains('den', literal=True) & val.str.contains('y', literal=True))
+        .then(pl.lit('DEN-1 y DEN-2'))
+        .when(val.str.contains('no', literal=True) & val.str.contains('real|reliz|proces'))
+        .then(pl.lit('no realizado'))
+        .otherwise(val)
+    )
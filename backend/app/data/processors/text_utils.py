@@ -1,15 +1,47 @@
 import re
+import sys
 import unicodedata
-from typing import Optional
+from typing import Dict, Mapping, Optional
+
+def _sin_tildes(caracter: str) -> str:
+    '''Traducción de un carácter: NFKD sin marcas combinantes, salvo la Ñ/ñ que se conserva.'''
+    if caracter in 'Ññ':
+        return caracter
+    return ''.join(c for c in unicodedata.normalize('NFKD', caracter) if not unicodedata.combining(c))
+
+class _TablaTildes(dict):
+    '''Tabla de str.translate que calcula cada carácter la primera vez que aparece.'''
+    def __missing__(self, codigo: int) -> str:
+        traduccion = self[codigo] = _sin_tildes(chr(codigo))
+        return traduccion
+
+_TABLA_TILDES = _TablaTildes()
+
+def tabla_tildes() -> Dict[str, str]:
+    '''
+    Todos los caracteres que cambia quitar_tildes, con su traducción (para
+    la versión vectorizada, que no puede completar la tabla sobre la marcha).
+    '''
+    tabla = {}
+    for codigo in range(sys.maxunicode + 1):
+        if 0xD800 <= codigo <= 0xDFFF:
+            continue
+        caracter = chr(codigo)
+        if unicodedata.combining(caracter) or not unicodedata.is_normalized('NFKD', caracter):
+            traduccion = _sin_tildes(caracter)
+            if traduccion != caracter:
+                tabla[caracter] = traduccion
+    return tabla
 
 def quitar_tildes(texto: str) -> str:
     if not isinstance(texto, str):
         return str(texto)
+    if texto.isascii():
+        return texto
     
-    texto = texto.replace('ñ', '__enie__').replace('Ñ', '__ENIE__')
-    nfkd = unicodedata.normalize('NFKD', texto)
-    sin_tildes = ''.join(c for c in nfkd if not unicodedata.combining(c))
-    return sin_tildes.replace('__enie__', 'ñ').replace('__ENIE__', 'Ñ')
+    # Carácter por carácter equivale a normalizar toda la cadena: el reordenamiento
+    # canónico de NFKD solo mueve marcas combinantes, que igual se descartan
+    return texto.translate(_TABLA_TILDES)
 
 def limpiar_basico(texto: str) -> str:
     if not isinstance(texto, str) or not texto.strip():
@@ -29,18 +61,86 @@ def limpiar_basico(texto: str) -> str:
     
     return s
 
-def normalizar_texto_base(valor: Optional[str], mapeo: dict, quitar_tildes_flag: bool = True) -> str:
+# Caracteres con los que llega rota la Ñ (o el "°" de N°) según la codificación de origen
+_MOJIBAKE = str.maketrans({c: '?' for c in 'ÑñØø§¤¥°º'})
+# "UPA N?8", "UPAN?8", "UPA NRO 8", "UPA18" -> "UPA N8"
+_UPA = re.compile(r'(^| )UPA ?(?:NRO|NO|N\?*|\?+)? ?(\d)')
+# "N?1", "N§1", "NØ1", "NRO1", "No1", "N°1", "N 1" -> "N1"
+_MARCA_NUMERO = re.compile(r'(^| )(?:NRO|NO|N\?*|\?+) ?(\d)')
+_ESPACIOS = re.compile(r' +')
+
+def clave_canonica(texto: str) -> str:
+    '''
+    Clave con la que se agrupan las variantes de escritura de un mismo nombre:
+    sin tildes ni mojibake, en mayúscula, sin puntuación y con los marcadores
+    de número (N?, N§, NØ, NRO, No, N°) unificados como "N<número>". Da lo
+    mismo para el valor crudo de la tabla que para el ya limpio
+    (limpiar_basico convierte "N?1" en "Ñ1" y ambos terminan en "N1").
+    '''
+    s = texto.translate(_MOJIBAKE)
+    s = ''.join(c for c in unicodedata.normalize('NFKD', s) if not unicodedata.combining(c)).upper()
+    s = ''.join(c if c.isalnum() or c == '?' else ' ' for c in s)
+    s = _ESPACIOS.sub(' ', s).strip()
+    s = _MARCA_NUMERO.sub(r'\1N\2', _UPA.sub(r'\1UPA N\2', s))
+    return _ESPACIOS.sub(' ', s.replace('?', '')).strip()
+
+def indice_canonico(mapeo: Mapping[str, str]) -> Dict[str, str]:
+    '''
+    Índice clave canónica -> valor canónico a partir de una tabla de variantes.
+    Cada valor canónico también se indexa a sí mismo. Dos variantes con la
+    misma clave y distinto destino son un error de la tabla.
+    '''
+    indice = {}
+    for variante, canonico in mapeo.items():
+        clave = clave_canonica(variante)
+        if indice.setdefault(clave, canonico) != canonico:
+            raise ValueError(f'"{variante}" y otra variante con clave "{clave}" apuntan a "{indice[clave]}" y "{canonico}"')
+    for canonico in mapeo.values():
+        indice.setdefault(clave_canonica(canonico), canonico)
+    return indice
+
+def compactar_mapeo(mapeo: Mapping[str, str]) -> Dict[str, str]:
+    '''
+    Tabla mínima con el mismo índice canónico: una variante por clave, sin
+    las que ya cubre el propio valor canónico. Es para mantener los archivos
+    de app/data/mapeos, no se usa al normalizar.
+    '''
+    objetivo = indice_canonico(mapeo)
+    compacto, claves = {}, set()
+    for variante, canonico in mapeo.items():
+        clave = clave_canonica(variante)
+        if clave not in claves:
+            claves.add(clave)
+            compacto[variante] = canonico
+    for variante, canonico in list(compacto.items()):
+        if clave_canonica(variante) != clave_canonica(canonico):
+            continue
+        sin_variante = {v: c for v, c in compacto.items() if v != variante}
+        if indice_canonico(sin_variante) == objetivo:
+            compacto = sin_variante
+    return compacto
+
+def limpiar_texto_base(valor: Optional[str], quitar_tildes_flag: bool = True) -> Optional[str]:
+    '''Valor limpio que se devuelve si no está en la tabla de mapeo (None si está vacío).'''
     if not valor or str(valor).strip() == '':
-        return 'DESCONOCIDO'
+        return None
     
     v = limpiar_basico(valor)
     
     if quitar_tildes_flag:
         v = quitar_tildes(v)
     
-    v = re.sub(r'\s+', ' ', v).strip()
-    
-    if v in mapeo:
-        return mapeo[v]
+    return re.sub(r'\s+', ' ', v).strip()
+
+def clave_texto_base(valor: Optional[str], quitar_tildes_flag: bool = True) -> Optional[str]:
+    '''Clave canónica con la que se consulta el índice de la tabla (None si está vacío).'''
+    v = limpiar_texto_base(valor, quitar_tildes_flag)
+    return None if v is None else clave_canonica(v)
+
+def normalizar_texto_base(valor: Optional[str], indice: Mapping[str, str], quitar_tildes_flag: bool = True) -> str:
+    '''indice: clave canónica -> valor canónico (ver indice_canonico).'''
+    v = limpiar_texto_base(valor, quitar_tildes_flag)
+    if v is None:
+        return 'DESCONOCIDO'
     
-    return v
+    return indice.get(clave_canonica(v), v)
@@ -1,6 +1,17 @@
+import polars as pl
+from typing import Any, AsyncIterator, Dict, List, NamedTuple, Optional, Sequence, Tuple
+from datetime import date, datetime
+import hashlib
+import logging
+
+from app.core.config import settings
+from app.core.metricas import metricas
 from app.data.connection import engine
+from app.data.processors.fecha_processor import parsear_fecha
 from sqlalchemy import text
 
+logger = logging.getLogger(__name__)
+
 selected_columns = [
     'id',
     'edad',
@@ -22,8 +33,216 @@ selected_columns = [
     'created_at'
 ]
 
-async def get_laboratorio_dengue_data():
+# Tipos declarados para selected_columns; las fechas quedan como pl.Date nativo
+LABORATORIO_DENGUE_SCHEMA = {
+    'id': pl.Int64,
+    'edad': pl.Utf8,
+    'establecimiento_notificador': pl.Utf8,
+    'centro_derivador': pl.Utf8,
+    'localidad': pl.Utf8,
+    'departamento': pl.Utf8,
+    'fecha_recepcion': pl.Date,
+    'fecha_procesamiento': pl.Date,
+    'fecha_inicio_fiebre': pl.Date,
+    'dias_evolucion': pl.Utf8,
+    'ns1_elisa': pl.Utf8,
+    'ns1_test_rapido': pl.Utf8,
+    'ig_m_dengue_elisa': pl.Utf8,
+    'ig_m_test_rapido': pl.Utf8,
+    'igg_test_rapido': pl.Utf8,
+    'rt_pcr_tiempo_real_dengue': pl.Utf8,
+    'serotipo_virus_dengue': pl.Utf8,
+    'created_at': pl.Datetime('us'),
+}
+
+def _convertir(nombre: str, actual: pl.DataType, destino: pl.DataType) -> pl.Expr:
+    '''Expresión que lleva una columna construida con otro tipo al tipo declarado.'''
+    if destino == pl.Date and actual == pl.Utf8:
+        return parsear_fecha(pl.col(nombre), nombre)
+    if destino == pl.Date and isinstance(actual, pl.Datetime):
+        return pl.col(nombre).dt.date()
+    return pl.col(nombre).cast(destino, strict=False)
+
+def filas_a_dataframe(filas: Sequence[Sequence], columnas: List[str] = selected_columns) -> pl.DataFrame:
+    '''
+    Convierte un lote de filas del cursor en un DataFrame de Polars con el
+    esquema declarado. Las filas se transponen a columnas y cada columna se
+    construye tipada en una sola llamada, sin diccionarios por fila.
+    '''
+    esquema = {nombre: LABORATORIO_DENGUE_SCHEMA.get(nombre, pl.Utf8) for nombre in columnas}
+
+    if not filas:
+        return pl.DataFrame(schema=esquema)
+
+    series = []
+    for nombre, valores in zip(columnas, zip(*filas)):
+        try:
+            series.append(pl.Series(nombre, valores, dtype=esquema[nombre], strict=False))
+        except Exception as e:
+            logger.warning(f'Error construyendo columna {nombre}: {e}. Se convierte a string')
+            series.append(pl.Series(nombre, [None if v is None else str(v) for v in valores], dtype=pl.Utf8))
+
+    df = pl.DataFrame(series)
+
+    conversiones = [
+        _convertir(nombre, df.schema[nombre], destino).alias(nombre)
+        for nombre, destino in esquema.items()
+        if df.schema[nombre] != destino
+    ]
+    if conversiones:
+        df = df.with_columns(conversiones)
+
+    return df
+
+# Filtro -> columna raw con la que se compara en el WHERE (valores tal como están cargados)
+COLUMNAS_FILTRO_RAW = {
+    'departamento': 'departamento',
+    'localidad': 'localidad',
+    'resultado_pcr': 'rt_pcr_tiempo_real_dengue',
+}
+
+def _construir_where(
+    desde_id: Optional[int] = None,
+    desde_created_at: Optional[datetime] = None,
+    fecha_desde: Optional[date] = None,
+    fecha_hasta: Optional[date] = None,
+    **filtros_raw: Optional[str]
+) -> Tuple[str, Dict[str, Any]]:
+    '''Arma la cláusula WHERE común a las consultas y sus parámetros.'''
+    condiciones = ['edad IS NOT NULL']
+    parametros = {}
+    marcas = []
+    if desde_id is not None:
+        marcas.append('id > :desde_id')
+        parametros['desde_id'] = desde_id
+    if desde_created_at is not None:
+        marcas.append('created_at > :desde_created_at')
+        parametros['desde_created_at'] = desde_created_at
+    if marcas:
+        condiciones.append(f'({" OR ".join(marcas)})')
+    if fecha_desde is not None:
+        condiciones.append('fecha_recepcion >= :fecha_desde')
+        parametros['fecha_desde'] = fecha_desde
+    if fecha_hasta is not None:
+        condiciones.append('fecha_recepcion <= :fecha_hasta')
+        parametros['fecha_hasta'] = fecha_hasta
+    for nombre, valor in filtros_raw.items():
+        if valor is not None:
+            condiciones.append(f'{COLUMNAS_FILTRO_RAW[nombre]} = :{nombre}')
+            parametros[nombre] = valor
+
+    return f'WHERE {" AND ".join(condiciones)}', parametros
+
+async def stream_laboratorio_dengue_data(
+    batch_size: int = None,
+    desde_id: Optional[int] = None,
+    desde_created_at: Optional[datetime] = None,
+    fecha_desde: Optional[date] = None,
+    fecha_hasta: Optional[date] = None,
+    **filtros_raw: Optional[str]
+) -> AsyncIterator[pl.DataFrame]:
+    '''
+    Lee laboratorio_dengue con un cursor del lado del servidor y entrega lotes
+    de hasta batch_size filas como DataFrames de Polars. Solo un lote de filas
+    de SQLAlchemy vive en memoria a la vez.
+
+    Si se indica una marca de agua (desde_id / desde_created_at) solo se leen
+    las filas posteriores a ella. fecha_desde / fecha_hasta se aplican sobre
+    fecha_recepcion en el WHERE, y departamento / localidad / resultado_pcr
+    sobre las columnas raw (ver COLUMNAS_FILTRO_RAW).
+    '''
+    batch_size = batch_size or settings.DB_BATCH_SIZE
+    where, parametros = _construir_where(desde_id, desde_created_at, fecha_desde, fecha_hasta, **filtros_raw)
+
+    query = text(
+        f'SELECT {", ".join(selected_columns)} FROM laboratorio_dengue {where}'
+    ).bindparams(**parametros).execution_options(yield_per=batch_size)
+
+    async with engine.connect() as connection:
+        result = await connection.stream(query)
+        lotes = result.partitions(batch_size).__aiter__()
+        while True:
+            # Espera del lote (red + driver) y armado del DataFrame por separado
+            with metricas.etapa('lectura_db') as etapa:
+                try:
+                    filas = await lotes.__anext__()
+                except StopAsyncIteration:
+                    break
+                etapa.filas = len(filas)
+            with metricas.etapa('construccion_dataframe', filas=len(filas)) as etapa:
+                lote = filas_a_dataframe(filas)
+                etapa.bytes = lote.estimated_size()
+            yield lote
+
+async def get_laboratorio_dengue_agregados(
+    columnas_histograma: List[str],
+    fecha_desde: Optional[date] = None,
+    fecha_hasta: Optional[date] = None
+) -> Dict[str, Any]:
+    '''
+    Agregados calculados en MySQL: total, rango de fechas de recepción, demora
+    promedio y un histograma (valor raw, casos) por cada columna pedida.
+    '''
+    for columna in columnas_histograma:
+        if columna not in selected_columns:
+            raise ValueError(f'Columna no permitida para histograma: {columna}')
+
+    where, parametros = _construir_where(fecha_desde=fecha_desde, fecha_hasta=fecha_hasta)
+
+    async with engine.connect() as connection:
+        result = await connection.execute(
+            text(
+                'SELECT COUNT(*) AS total_casos, '
+                'MIN(fecha_recepcion) AS fecha_recepcion_min, '
+                'MAX(fecha_recepcion) AS fecha_recepcion_max, '
+                'AVG(DATEDIFF(fecha_procesamiento, fecha_recepcion)) AS demora_promedio_dias '
+                f'FROM laboratorio_dengue {where}'
+            ).bindparams(**parametros)
+        )
+        agregados = dict(result.mappings().one())
+
+        histogramas = {}
+        for columna in columnas_histograma:
+            result = await connection.execute(
+                text(
+                    f'SELECT {columna} AS valor, COUNT(*) AS casos '
+                    f'FROM laboratorio_dengue {where} GROUP BY {columna}'
+                ).bindparams(**parametros)
+            )
+            histogramas[columna] = pl.DataFrame(
+                [tuple(fila) for fila in result.fetchall()],
+                schema={'valor': pl.Utf8, 'casos': pl.Int64},
+                orient='row',
+                strict=False
+            )
+
+    agregados['histogramas'] = histogramas
+    return agregados
+
+class HuellaDataset(NamedTuple):
+    '''Huella de laboratorio_dengue: si no cambia, la tabla no recibió altas ni bajas.'''
+    filas: int
+    max_id: Optional[int]
+    max_created_at: Optional[datetime]
+
+    @property
+    def version(self) -> str:
+        digest = hashlib.blake2b(repr(tuple(self)).encode(), digest_size=8)
+        return digest.hexdigest()
+
+    def describir(self) -> Dict[str, Any]:
+        return {'version': self.version, **self._asdict()}
+
+async def get_huella_laboratorio_dengue() -> HuellaDataset:
+    '''
+    COUNT(*), MAX(id) y MAX(created_at) de toda la tabla en una sola consulta
+    (índices de la PK y de created_at, sin leer filas). Cubre también las
+    filas sin edad que el dataset descarta: un cambio ahí solo provoca una
+    sincronización incremental vacía.
+    '''
     async with engine.connect() as connection:
-        result = await connection.execute(text(f'SELECT {", ".join(selected_columns)} FROM laboratorio_dengue WHERE edad IS NOT NULL'))
-        rows = result.fetchall()
-        return rows
\ No newline at end of file
+        result = await connection.execute(
+            text('SELECT COUNT(*) AS filas, MAX(id) AS max_id, MAX(created_at) AS max_created_at FROM laboratorio_dengue')
+        )
+        fila = result.mappings().one()
+    return HuellaDataset(int(fila['filas']), fila['max_id'], fila['max_created_at'])
@@ -0,0 +1,129 @@
+"""
+Ejecución del procesamiento fuera del event loop, con admisión acotada.
+
+Normalizar, calcular derivados y serializar es trabajo de CPU: si corre en la
+corrutina del handler, uvicorn no atiende nada más mientras tanto. Los
+trabajos pesados pasan por EjecutorProcesamiento, que los corre de a uno en un
+hilo dedicado (cada trabajo ya reparte su carga en el pool del procesador, y
+el procesador no admite dos trabajos a la vez). Los pedidos que llegan
+mientras tanto esperan en una cola de COLA_PROCESAMIENTO lugares; con la cola
+llena, o tras ESPERA_MAXIMA_SEGUNDOS, se rechazan con Saturado (503).
+"""
+import asyncio
+import contextvars
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+from app.core.config import settings
+from app.core.metricas import metricas
+
+logger = logging.getLogger(__name__)
+
+class Saturado(Exception):
+    '''No hay lugar para otro trabajo de procesamiento; conviene reintentar en reintentar_en segundos.'''
+    def __init__(self, mensaje: str, reintentar_en: int):
+        super().__init__(mensaje)
+        self.reintentar_en = reintentar_en
+
+class EjecutorProcesamiento:
+    def __init__(self, cola: Optional[int] = None, espera_maxima: Optional[float] = None):
+        self.cola_maxima = settings.COLA_PROCESAMIENTO if cola is None else cola
+        self.espera_maxima = settings.ESPERA_MAXIMA_SEGUNDOS if espera_maxima is None else espera_maxima
+        self.en_curso = 0
+        self.en_espera = 0
+        self.completados = 0
+        self.rechazados = 0
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._semaforo: Optional[asyncio.Semaphore] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _obtener_semaforo(self) -> asyncio.Semaphore:
+        # Un semáforo de asyncio queda atado a su loop; uno nuevo por loop (solo cambia en pruebas)
+        loop = asyncio.get_running_loop()
+        if self._semaforo is None or self._loop is not loop:
+            self._semaforo = asyncio.Semaphore(1)
+            self._loop = loop
+        return self._semaforo
+
+    def _obtener_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='procesamiento')
+        return self._executor
+
+    def _rechazar(self, motivo: str):
+        self.rechazados += 1
+        logger.warning(f'Procesamiento saturado: {motivo} ({self.en_espera} en espera)')
+        raise Saturado(f'Procesamiento saturado: {motivo}', reintentar_en=max(1, round(self.espera_maxima / 2)))
+
+    def verificar_admision(self):
+        '''Rechaza de antemano si un trabajo nuevo no entraría en la cola (antes de empezar una respuesta en streaming).'''
+        if self.en_curso and self.en_espera >= self.cola_maxima:
+            self._rechazar('cola llena')
+
+    async def ejecutar(self, funcion: Callable[..., Any], *args: Any, rechazable: bool = True) -> Any:
+        '''
+        Corre funcion(*args) en el hilo de procesamiento y devuelve su
+        resultado. Con rechazable=False espera su turno sin límite (lotes
+        siguientes de un trabajo ya admitido). Las métricas del trabajo se
+        suman a la ejecución abierta en la corrutina que llama.
+        '''
+        semaforo = self._obtener_semaforo()
+        if rechazable and semaforo.locked() and self.en_espera >= self.cola_maxima:
+            self._rechazar('cola llena')
+
+        self.en_espera += 1
+        try:
+            with metricas.etapa('espera_admision'):
+                # Con el turno libre se toma sin wait_for: en Python 3.11 wait_for se
+                # traga una cancelación que llega justo cuando el acquire ya terminó
+                if rechazable and semaforo.locked():
+                    await asyncio.wait_for(semaforo.acquire(), self.espera_maxima)
+                else:
+                    await semaforo.acquire()
+        except asyncio.TimeoutError:
+            self._rechazar(f'sin turno tras {self.espera_maxima} s')
+        finally:
+            self.en_espera -= 1
+
+        self.en_curso += 1
+        loop = asyncio.get_running_loop()
+        try:
+            futuro = self._obtener_executor().submit(contextvars.copy_context().run, funcion, *args)
+        except BaseException:
+            self._liberar(semaforo)
+            raise
+
+        # El turno se libera cuando termina el hilo, no el que espera: si este se
+        # cancela (el cliente se fue) el trabajo sigue ocupando el turno y el
+        # siguiente espera a la vista en en_espera en lugar de en la cola del pool
+        def al_terminar(_):
+            try:
+                loop.call_soon_threadsafe(self._liberar, semaforo)
+            except RuntimeError:
+                # El loop ya cerró (solo en pruebas): su semáforo ya no le sirve a nadie
+                self._liberar(None)
+
+        futuro.add_done_callback(al_terminar)
+        return await asyncio.wrap_future(futuro)
+
+    def _liberar(self, semaforo: Optional[asyncio.Semaphore]):
+        self.en_curso -= 1
+        self.completados += 1
+        if semaforo is not None:
+            semaforo.release()
+
+    def estado(self) -> Dict[str, Any]:
+        return {
+            'en_curso': self.en_curso,
+            'en_espera': self.en_espera,
+            'cola_maxima': self.cola_maxima,
+            'espera_maxima_segundos': self.espera_maxima,
+            'completados': self.completados,
+            'rechazados': self.rechazados,
+        }
+
+    def cerrar(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
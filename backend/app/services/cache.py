@@ -0,0 +1,144 @@
+"""
+Cache en memoria de resultados costosos del servicio (dataset procesado, KPIs).
+
+Cada entrada guarda el valor, la versión del dataset con la que se construyó
+y cuándo. Si quien pide conoce la versión actual (la huella de la tabla), la
+entrada vale mientras coincida; si no, mientras tenga menos de
+CACHE_TTL_SEGUNDOS. Ya vencida (desde que venció el TTL o desde que se vio
+otra versión), durante CACHE_STALE_SEGUNDOS se sigue entregando mientras se reconstruye en segundo plano (stale-while-revalidate);
+pasado ese margen, el pedido espera la reconstrucción. Pedidos simultáneos de
+una misma clave comparten una única construcción en vuelo (single-flight).
+"""
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, NamedTuple, Optional, Tuple
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# construir() devuelve (valor, versión del dataset)
+Constructor = Callable[[], Awaitable[Tuple[Any, Optional[str]]]]
+
+class Entrada(NamedTuple):
+    valor: Any
+    version: Optional[str]
+    creada: float
+
+class CacheVersionado:
+    def __init__(self, ttl: Optional[float] = None, stale: Optional[float] = None, max_entradas: int = 32):
+        self.ttl = settings.CACHE_TTL_SEGUNDOS if ttl is None else ttl
+        self.stale = settings.CACHE_STALE_SEGUNDOS if stale is None else stale
+        self.max_entradas = max_entradas
+        self._entradas: 'OrderedDict[Hashable, Entrada]' = OrderedDict()
+        self._en_vuelo: Dict[Hashable, asyncio.Task] = {}
+        # Cuándo se vio por primera vez una versión distinta de la de cada entrada
+        self._desactualizadas: Dict[Hashable, float] = {}
+        self.aciertos = 0
+        self.aciertos_vencidos = 0
+        self.fallos = 0
+        self.construcciones = 0
+
+    def guardar(self, clave: Hashable, valor: Any, version: Optional[str] = None):
+        self._entradas[clave] = Entrada(valor, version, time.monotonic())
+        self._entradas.move_to_end(clave)
+        self._desactualizadas.pop(clave, None)
+        while len(self._entradas) > self.max_entradas:
+            descartada, _ = self._entradas.popitem(last=False)
+            self._desactualizadas.pop(descartada, None)
+
+    def invalidar(self, clave: Optional[Hashable] = None):
+        '''Descarta una entrada (o todas); lo que esté en vuelo termina y se guarda igual.'''
+        if clave is None:
+            self._entradas.clear()
+            self._desactualizadas.clear()
+        else:
+            self._entradas.pop(clave, None)
+            self._desactualizadas.pop(clave, None)
+
+    def entrada(self, clave: Hashable) -> Optional[Entrada]:
+        '''Entrada guardada tal cual, sin mirar versión ni TTL; cuenta como uso para el LRU.'''
+        entrada = self._entradas.get(clave)
+        if entrada is not None:
+            self._entradas.move_to_end(clave)
+        return entrada
+
+    def _construir(self, clave: Hashable, construir: Constructor) -> asyncio.Task:
+        '''Tarea de construcción de la clave, compartida por todos los que la pidan mientras corre.'''
+        tarea = self._en_vuelo.get(clave)
+        if tarea is not None:
+            return tarea
+
+        async def construir_y_guardar() -> Entrada:
+            inicio = time.perf_counter()
+            valor, version = await construir()
+            self.guardar(clave, valor, version)
+            logger.info(f'Cache {clave}: construido en {time.perf_counter() - inicio:.2f} s (versión {version})')
+            return self._entradas[clave]
+
+        def terminar(tarea: asyncio.Task):
+            self._en_vuelo.pop(clave, None)
+            if not tarea.cancelled() and tarea.exception() is not None:
+                logger.error(f'Cache {clave}: falló la construcción: {tarea.exception()}')
+
+        self.construcciones += 1
+        tarea = asyncio.get_running_loop().create_task(construir_y_guardar())
+        tarea.add_done_callback(terminar)
+        self._en_vuelo[clave] = tarea
+        return tarea
+
+    async def obtener_entrada(
+        self,
+        clave: Hashable,
+        construir: Constructor,
+        version: Optional[str] = None,
+        forzar: bool = False
+    ) -> Entrada:
+        '''
+        Entrada de la clave según la política descripta arriba (su versión es
+        la de lo que se entrega, que con stale puede ser anterior a la
+        actual). forzar=True espera una construcción nueva (o la que ya esté
+        en vuelo).
+        '''
+        entrada = self._entradas.get(clave)
+        if entrada is not None and not forzar:
+            ahora = time.monotonic()
+            if version is None:
+                vigente = ahora - entrada.creada < self.ttl
+                vencida = ahora - entrada.creada - self.ttl
+            else:
+                vigente = entrada.version == version
+                vencida = 0.0 if vigente else ahora - self._desactualizadas.setdefault(clave, ahora)
+            if vigente:
+                self.aciertos += 1
+                self._entradas.move_to_end(clave)
+                return entrada
+            if vencida < self.stale:
+                self.aciertos_vencidos += 1
+                self._construir(clave, construir)
+                return entrada
+
+        self.fallos += 1
+        # shield: si el pedido se cancela, la construcción compartida sigue
+        return await asyncio.shield(self._construir(clave, construir))
+
+    async def obtener(self, clave: Hashable, construir: Constructor, version: Optional[str] = None, forzar: bool = False) -> Any:
+        return (await self.obtener_entrada(clave, construir, version, forzar)).valor
+
+    def estado(self) -> Dict[str, Any]:
+        ahora = time.monotonic()
+        return {
+            'ttl_segundos': self.ttl,
+            'stale_segundos': self.stale,
+            'aciertos': self.aciertos,
+            'aciertos_vencidos': self.aciertos_vencidos,
+            'fallos': self.fallos,
+            'construcciones': self.construcciones,
+            'en_vuelo': [str(clave) for clave in self._en_vuelo],
+            'entradas': {
+                str(clave): {'version': entrada.version, 'edad_segundos': round(ahora - entrada.creada, 3)}
+                for clave, entrada in self._entradas.items()
+            },
+        }
@@ -0,0 +1,150 @@
+"""
+Destinos del procesamiento por lotes (ver LaboratorioDengueService.procesar_en_lotes).
+
+Cada destino recibe los lotes ya procesados con agregar() y entrega su
+resultado con cerrar(). Ninguno guarda los lotes completos en memoria: el
+Parquet se escribe por row groups y el agregado solo conserva sumas
+parciales, que se derraman a disco si superan el presupuesto de memoria.
+"""
+import logging
+import os
+import shutil
+import tempfile
+from typing import Any, Dict, List, Optional
+
+import polars as pl
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+class DestinoParquet:
+    '''Escribe los lotes como row groups de un Parquet (zstd). El archivo aparece completo recién al cerrar.'''
+    def __init__(self, ruta: str, compresion: str = 'zstd'):
+        self.ruta = ruta
+        self.compresion = compresion
+        self.filas = 0
+        self._ruta_temporal = f'{ruta}.tmp'
+        self._writer: Optional[pq.ParquetWriter] = None
+        self._schema: Optional[pa.Schema] = None
+
+    def agregar(self, df: pl.DataFrame):
+        tabla = df.to_arrow()
+        if self._writer is None:
+            self._schema = tabla.schema
+            self._writer = pq.ParquetWriter(self._ruta_temporal, self._schema, compression=self.compresion)
+        else:
+            # Un lote con una columna toda nula puede llegar con otro tipo
+            tabla = tabla.select(self._schema.names).cast(self._schema)
+        self._writer.write_table(tabla)
+        self.filas += df.height
+
+    def cerrar(self) -> Dict[str, Any]:
+        if self._writer is None:
+            return {'ruta': None, 'filas': 0, 'bytes': 0}
+        self._writer.close()
+        os.replace(self._ruta_temporal, self.ruta)
+        return {'ruta': self.ruta, 'filas': self.filas, 'bytes': os.path.getsize(self.ruta)}
+
+    def descartar(self):
+        if self._writer is not None:
+            self._writer.close()
+            os.remove(self._ruta_temporal)
+
+# Nombre -> columnas por las que se agregan casos y demora
+DIMENSIONES_AGREGADO = {
+    'localidad': ['localidad_normalizada'],
+    'departamento': ['departamento_normalizado'],
+    'resultado_pcr': ['rt_pcr_tiempo_real_dengue_normalizado'],
+    'semana_epidemiologica': ['anio_recepcion', 'sem_epid_recepcion'],
+}
+
+class DestinoAgregado:
+    '''
+    Casos y demora promedio por cada dimensión. Las sumas parciales se
+    re-agregan con cada lote; si igual superan el presupuesto (dimensiones
+    de muchísimos valores) se derraman a Parquet y se combinan al cerrar.
+    '''
+    def __init__(
+        self,
+        dimensiones: Dict[str, List[str]] = DIMENSIONES_AGREGADO,
+        presupuesto_bytes: Optional[int] = None,
+        ruta_derrame: Optional[str] = None
+    ):
+        self.dimensiones = dimensiones
+        self.presupuesto_bytes = presupuesto_bytes or settings.PRESUPUESTO_MEMORIA_MB * 1024 * 1024 // 2
+        self.ruta_derrame = ruta_derrame or settings.RUTA_DERRAME
+        self.total = 0
+        self._parciales: Dict[str, Optional[pl.DataFrame]] = {nombre: None for nombre in dimensiones}
+        self._derrames: Dict[str, List[str]] = {nombre: [] for nombre in dimensiones}
+        self._directorio: Optional[str] = None
+
+    @staticmethod
+    def _sumar(df: pl.DataFrame, columnas: List[str]) -> pl.DataFrame:
+        return df.group_by(columnas).agg(
+            pl.col('casos').sum(), pl.col('demora_suma').sum(), pl.col('demora_n').sum()
+        )
+
+    def agregar(self, df: pl.DataFrame):
+        self.total += df.height
+        demora = pl.col('demora_dias') if 'demora_dias' in df.columns else pl.lit(None, dtype=pl.Float64)
+        for nombre, columnas in self.dimensiones.items():
+            parcial = df.group_by(columnas).agg(
+                pl.len().cast(pl.Int64).alias('casos'),
+                demora.sum().cast(pl.Float64).alias('demora_suma'),
+                demora.count().cast(pl.Int64).alias('demora_n')
+            )
+            previo = self._parciales[nombre]
+            if previo is not None:
+                parcial = self._sumar(pl.concat([previo, parcial], how='vertical_relaxed'), columnas)
+            self._parciales[nombre] = parcial
+
+        if sum(p.estimated_size() for p in self._parciales.values() if p is not None) > self.presupuesto_bytes:
+            self._derramar()
+
+    def _derramar(self):
+        if self._directorio is None:
+            self._directorio = tempfile.mkdtemp(prefix='agregado_', dir=self.ruta_derrame)
+        for nombre, parcial in self._parciales.items():
+            if parcial is None:
+                continue
+            ruta = os.path.join(self._directorio, f'{nombre}_{len(self._derrames[nombre])}.parquet')
+            parcial.write_parquet(ruta)
+            self._derrames[nombre].append(ruta)
+            self._parciales[nombre] = None
+        logger.info(f'Agregado parcial derramado a {self._directorio}')
+
+    def cerrar(self) -> Dict[str, Any]:
+        try:
+            resultado = {'total_casos': self.total}
+            for nombre, columnas in self.dimensiones.items():
+                partes = [pl.scan_parquet(ruta) for ruta in self._derrames[nombre]]
+                if self._parciales[nombre] is not None:
+                    partes.append(self._parciales[nombre].lazy())
+                if not partes:
+                    resultado[nombre] = []
+                    continue
+                final = (
+                    pl.concat(partes, how='vertical_relaxed')
+                    .group_by(columnas)
+                    .agg(pl.col('casos').sum(), pl.col('demora_suma').sum(), pl.col('demora_n').sum())
+                    .with_columns(
+                        pl.when(pl.col('demora_n') > 0)
+                        .then((pl.col('demora_suma') / pl.col('demora_n')).round(2))
+                        .alias('demora_promedio_dias')
+                    )
+                    .drop('demora_suma', 'demora_n')
+                    .sort('casos', *columnas, descending=[True] + [False] * len(columnas), nulls_last=True)
+                    .collect(engine='streaming')
+                )
+                resultado[nombre] = final.to_dicts()
+            return resultado
+        finally:
+            self.descartar()
+
+    def descartar(self):
+        if self._directorio is not None:
+            shutil.rmtree(self._directorio, ignore_errors=True)
+            self._directorio = None
@@ -0,0 +1,81 @@
+"""
+Instantánea en disco del dataset procesado, para arrancar en caliente.
+
+El dataset procesado se guarda como un Parquet (zstd) que lleva en sus
+propios metadatos la huella de la tabla con la que se sincronizó, la versión
+de las tablas de normalización y la marca de agua. Al arrancar se lee con
+memory map y el servicio solo sincroniza y procesa lo que entró después, en
+lugar de volver a leer y normalizar toda la tabla.
+"""
+import json
+import logging
+import os
+from datetime import datetime
+from typing import Any, Dict, NamedTuple, Optional
+
+import polars as pl
+
+from app.data.repositories.laboratorio_dengue_repository import HuellaDataset
+
+logger = logging.getLogger(__name__)
+
+# Clave de los metadatos del Parquet; FORMATO cambia si cambia lo que se guarda
+CLAVE_METADATOS = 'laboratorio_dengue.instantanea'
+FORMATO = 1
+
+class Instantanea(NamedTuple):
+    df: pl.DataFrame
+    huella: HuellaDataset
+    version_mapeos: str
+    ultimo_id: Optional[int]
+    ultimo_created_at: Optional[datetime]
+
+def _fecha(valor: Optional[str]) -> Optional[datetime]:
+    return datetime.fromisoformat(valor) if valor else None
+
+def _iso(valor: Optional[datetime]) -> Optional[str]:
+    return valor.isoformat() if valor else None
+
+def escribir_instantanea(ruta: str, instantanea: Instantanea) -> Dict[str, Any]:
+    '''Escribe la instantánea; el archivo se reemplaza de una vez, nunca queda uno a medio escribir.'''
+    metadatos = {
+        'formato': FORMATO,
+        'huella': {
+            'filas': instantanea.huella.filas,
+            'max_id': instantanea.huella.max_id,
+            'max_created_at': _iso(instantanea.huella.max_created_at),
+        },
+        'version_mapeos': instantanea.version_mapeos,
+        'ultimo_id': instantanea.ultimo_id,
+        'ultimo_created_at': _iso(instantanea.ultimo_created_at),
+    }
+    os.makedirs(os.path.dirname(os.path.abspath(ruta)), exist_ok=True)
+    ruta_temporal = f'{ruta}.tmp'
+    instantanea.df.write_parquet(
+        ruta_temporal, compression='zstd', metadata={CLAVE_METADATOS: json.dumps(metadatos)}
+    )
+    os.replace(ruta_temporal, ruta)
+    return {'ruta': ruta, 'filas': instantanea.df.height, 'bytes': os.path.getsize(ruta)}
+
+def leer_instantanea(ruta: str) -> Optional[Instantanea]:
+    '''Lee la instantánea con memory map. None si no existe o es de otro formato.'''
+    if not os.path.exists(ruta):
+        return None
+
+    metadatos = pl.read_parquet_metadata(ruta).get(CLAVE_METADATOS)
+    if metadatos is None:
+        logger.warning(f'{ruta} no es una instantánea del dataset procesado')
+        return None
+    metadatos = json.loads(metadatos)
+    if metadatos.get('formato') != FORMATO:
+        logger.info(f'Instantánea {ruta} en formato {metadatos.get("formato")} (se espera {FORMATO}): se descarta')
+        return None
+
+    huella = metadatos['huella']
+    return Instantanea(
+        df=pl.read_parquet(ruta, memory_map=True),
+        huella=HuellaDataset(huella['filas'], huella['max_id'], _fecha(huella['max_created_at'])),
+        version_mapeos=metadatos['version_mapeos'],
+        ultimo_id=metadatos['ultimo_id'],
+        ultimo_created_at=_fecha(metadatos['ultimo_created_at']),
+    )
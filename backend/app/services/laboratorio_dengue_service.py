@@ -1,121 +1,662 @@
 import polars as pl
-from typing import List, Dict, Any
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+import asyncio
 import logging
-from datetime import datetime
+from datetime import date, datetime
 
-from app.data.repositories.laboratorio_dengue_repository import get_laboratorio_dengue_data
+from app.core.config import settings
+from app.core.metricas import metricas
+from app.data.repositories.laboratorio_dengue_repository import (
+    HuellaDataset,
+    get_huella_laboratorio_dengue,
+    get_laboratorio_dengue_agregados,
+    stream_laboratorio_dengue_data
+)
 from app.data.processors.dengue_processor import DengueDataProcessor
+from app.data.processors.coincidencia_difusa import INDICES_DIFUSOS, IndiceDifuso
+from app.data.processors.mapeos import recargar as recargar_tablas, tablas
+from app.data.processors.memo import NormalizadorMemoizado, laboratorio_memo, localidad_memo
+from app.services.admision import EjecutorProcesamiento
+from app.services.cache import CacheVersionado
+from app.services.instantanea import Instantanea, escribir_instantanea, leer_instantanea
 
 logger = logging.getLogger(__name__)
 
+# Filtros que se resuelven sobre columnas normalizadas del dataset procesado
+COLUMNAS_FILTRO_NORMALIZADO = {
+    'localidad': 'localidad_normalizada',
+    'departamento': 'departamento_normalizado',
+    'resultado_pcr': 'rt_pcr_tiempo_real_dengue_normalizado',
+}
+
+# Histogramas de KPIs: columna raw -> (normalizador, columna normalizada)
+HISTOGRAMAS_KPI = {
+    'localidad': (localidad_memo, 'localidad_normalizada'),
+    'rt_pcr_tiempo_real_dengue': (laboratorio_memo, 'rt_pcr_tiempo_real_dengue_normalizado'),
+}
+
+def reagregar_histograma(
+    histograma: pl.DataFrame,
+    normalizador: NormalizadorMemoizado,
+    columna_salida: str,
+    indice_difuso: Optional[IndiceDifuso] = None
+) -> pl.DataFrame:
+    '''Normaliza los valores distintos de un histograma (valor, casos) y suma los casos por valor normalizado.'''
+    normalizador.verificar()
+    normalizados = [normalizador(valor) for valor in histograma['valor'].to_list()]
+    if indice_difuso is not None:
+        normalizados = indice_difuso.canonizar_valores(normalizados)
+    return (
+        histograma
+        .with_columns(pl.Series(columna_salida, normalizados, dtype=pl.Utf8))
+        .group_by(columna_salida)
+        .agg(pl.col('casos').sum())
+        .sort('casos', descending=True)
+    )
+
+# Claves del dataset procesado completo y de la huella en los caches del servicio
+CLAVE_DATASET = 'procesado'
+CLAVE_HUELLA = 'huella'
+
+# Memoria de un lote en vuelo respecto de sus bytes crudos: el lote crudo, el
+# procesado (normalizadas y derivadas) y la copia que arma el destino
+FACTOR_MEMORIA_LOTE = 4
+FILAS_MINIMAS_LOTE = 1000
+
+def filas_por_lote(bytes_por_fila: float, presupuesto_bytes: int, maximo: int) -> int:
+    '''Filas por lote procesado para que un lote en vuelo entre en el presupuesto de memoria.'''
+    por_presupuesto = int(presupuesto_bytes / max(bytes_por_fila * FACTOR_MEMORIA_LOTE, 1))
+    return max(FILAS_MINIMAS_LOTE, min(por_presupuesto, maximo))
+
+def filtrar_normalizados(df: pl.DataFrame, filtros_normalizados: Dict[str, Optional[str]]) -> pl.DataFrame:
+    condiciones = [
+        pl.col(COLUMNAS_FILTRO_NORMALIZADO[nombre]) == valor
+        for nombre, valor in filtros_normalizados.items()
+        if valor is not None
+    ]
+    return df.filter(*condiciones) if condiciones else df
+
 class LaboratorioDengueService:
-    def __init__(self, max_workers: int = None, chunk_size: int = 1000):
-        self.processor = DengueDataProcessor(max_workers=max_workers, chunk_size=chunk_size)
+    def __init__(self, max_workers: int = None, chunk_size: int = None):
+        self.processor = DengueDataProcessor(
+            max_workers=max_workers,
+            chunk_size=chunk_size,
+            motor=settings.MOTOR_NORMALIZACION,
+            canonizacion_difusa=settings.CANONIZACION_DIFUSA
+        )
+        
+        # Dataset procesado en memoria y marca de agua de la última sincronización
+        self._df_procesado: Optional[pl.DataFrame] = None
+        self._ultimo_id: Optional[int] = None
+        self._ultimo_created_at: Optional[datetime] = None
+        self._lock_sincronizacion = asyncio.Lock()
+        
+        # El trabajo de CPU (procesar, fusionar, serializar) corre acá, fuera del event loop
+        self.ejecutor = EjecutorProcesamiento()
+        
+        # Dataset procesado ya construido, por versión del dataset. Va solo en su
+        # cache: los rangos de fechas de /kpis no pueden desalojarlo
+        self.cache = CacheVersionado(max_entradas=1)
+        # KPIs ya calculados por rango de fechas y versión del dataset
+        self.cache_kpis = CacheVersionado()
+        # Huella de la tabla: una consulta por ráfaga de pedidos, no una por pedido
+        self._cache_huella = CacheVersionado(ttl=settings.HUELLA_TTL_SEGUNDOS, stale=0, max_entradas=1)
+        # Huella de la tabla con la que se sincronizó el dataset en memoria
+        self._huella: Optional[HuellaDataset] = None
+        # True con RefrescoDataset activo: los pedidos entregan lo ya construido
+        self.precalculado = False
+        # Versión del dataset que está en la instantánea en disco
+        self._version_instantanea: Optional[str] = None
+    
+    def cerrar(self):
+        '''Libera el hilo de procesamiento y el pool de procesos del procesador.'''
+        self.ejecutor.cerrar()
+        self.processor.cerrar()
     
-    async def obtener_datos_procesados(self) -> List[Dict[str, Any]]:
-        logger.info('Obteniendo datos raw de la base de datos')
+    async def _leer_dataframe(self, **consulta) -> pl.DataFrame:
+        '''Acumula los lotes del cursor en un único DataFrame columnar.'''
+        lotes = []
+        async for lote in stream_laboratorio_dengue_data(**consulta):
+            lotes.append(lote)
+            logger.debug(f'Lote recibido con {lote.height} registros')
         
-        raw_data = await get_laboratorio_dengue_data()
+        if not lotes:
+            return pl.DataFrame()
         
-        if not raw_data:
-            logger.warning('No se encontraron datos en la base de datos')
-            return []
+        with metricas.etapa('concatenacion') as etapa:
+            df = pl.concat(lotes, how='vertical_relaxed')
+            etapa.filas, etapa.bytes = df.height, df.estimated_size()
+        return df
+    
+    def _procesar(self, df: pl.DataFrame) -> pl.DataFrame:
+        logger.info(f'DataFrame creado con shape: {df.shape}')
         
-        logger.info(f'Convirtiendo {len(raw_data)} registros a DataFrame de Polars')
+        return self.processor.procesar_datos_paralelo(df)
+    
+    def _actualizar_marca_de_agua(self, df_raw: pl.DataFrame):
+        max_id = df_raw['id'].max()
+        if max_id is not None and (self._ultimo_id is None or max_id > self._ultimo_id):
+            self._ultimo_id = max_id
         
-        def normalizar_valor(valor):
-            if valor is None:
-                return None
-            if hasattr(valor, 'strftime'):
-                return valor.strftime('%Y-%m-%d')
-            return valor
-        
-        data_dicts = []
-        for row in raw_data:
-            row_dict = {}
-            for key, value in row._mapping.items():
-                row_dict[key] = normalizar_valor(value)
-            data_dicts.append(row_dict)
-        
-        try:
-            df = pl.DataFrame(data_dicts, infer_schema_length=None)
-            logger.info('DataFrame creado exitosamente con inferencia automática')
-        except Exception as e:
-            logger.warning(f'Error con inferencia automática: {e}')
+        max_created_at = df_raw['created_at'].max()
+        if max_created_at is not None and (self._ultimo_created_at is None or max_created_at > self._ultimo_created_at):
+            self._ultimo_created_at = max_created_at
+    
+    def _fusionar(self, df_nuevo: pl.DataFrame) -> pl.DataFrame:
+        '''Incorpora filas nuevas al dataset; una fila ya presente se reemplaza por su versión nueva.'''
+        df_vigente = self._df_procesado.filter(~pl.col('id').is_in(df_nuevo['id'].implode()))
+        return pl.concat([df_vigente, df_nuevo], how='vertical_relaxed')
+    
+    @staticmethod
+    def _version(huella: HuellaDataset) -> str:
+        # Los mismos datos normalizados con otras tablas son otra versión
+        return f'{huella.version}.{tablas().version}'
+    
+    async def huella(self) -> HuellaDataset:
+        '''Huella actual de laboratorio_dengue (reutilizada durante HUELLA_TTL_SEGUNDOS).'''
+        async def consultar():
+            huella = await get_huella_laboratorio_dengue()
+            return huella, huella.version
+        
+        return await self._cache_huella.obtener(CLAVE_HUELLA, consultar)
+    
+    async def version_actual(self) -> str:
+        '''Versión de los datos que se entregarían ahora: huella de la tabla y tablas de normalización.'''
+        return self._version(await self.huella())
+    
+    async def version_vigente(self) -> str:
+        '''
+        Versión de lo que se entregaría ahora. Con el refresco en segundo plano
+        es la del dataset ya construido, sin consultar la base.
+        '''
+        if self.precalculado:
+            entrada = self.cache.entrada(CLAVE_DATASET)
+            if entrada is not None:
+                return entrada.version
+        return await self.version_actual()
+    
+    def version_dataset(self) -> Optional[str]:
+        '''Versión del dataset en memoria (la huella con la que se sincronizó).'''
+        if self._df_procesado is None or self._huella is None:
+            return None
+        return self._version(self._huella)
+    
+    async def _dataset_versionado(self, completo: bool = False) -> Tuple[pl.DataFrame, Optional[str]]:
+        '''
+        Dataset procesado desde el cache, con su versión. Mientras la huella de
+        la tabla no cambie no se lee nada más; si cambió se sincroniza (una
+        sola vez aunque lo pidan varios a la vez): incremental si solo hubo
+        altas, completa si la tabla perdió filas. completo=True fuerza una
+        lectura completa. Con el refresco en segundo plano se entrega lo ya
+        construido sin mirar la huella.
+        '''
+        if self.precalculado and not completo:
+            entrada = self.cache.entrada(CLAVE_DATASET)
+            if entrada is not None:
+                return entrada.valor, entrada.version
+        
+        huella = await self.huella()
+        entrada = await self.cache.obtener_entrada(
+            CLAVE_DATASET, self._constructor_dataset(huella, completo), self._version(huella), forzar=completo
+        )
+        return entrada.valor, entrada.version
+    
+    def _constructor_dataset(self, huella: HuellaDataset, completo: bool = False):
+        async def construir():
+            previa = self._huella
+            bajas = previa is not None and (
+                huella.filas < previa.filas or (huella.max_id or 0) < (previa.max_id or 0)
+            )
+            if bajas:
+                logger.info(f'La tabla perdió filas ({previa.filas} -> {huella.filas}): sincronización completa')
+            df = await self.sincronizar_datos(completo=completo or bajas)
+            # La huella se leyó antes de sincronizar: si entraron filas en el medio, la próxima no coincide
+            self._huella = huella
+            return df, self.version_dataset()
+        
+        return construir
+    
+    async def precalcular(self) -> Tuple[pl.DataFrame, Optional[str]]:
+        '''
+        Construye el dataset procesado y los KPIs generales con la versión
+        actual y los reemplaza en el cache (lo usa RefrescoDataset).
+        '''
+        huella = await self.huella()
+        entrada = await self.cache.obtener_entrada(
+            CLAVE_DATASET, self._constructor_dataset(huella), self._version(huella), forzar=True
+        )
+        await self._kpis_versionados(None, None, entrada.version, forzar=True)
+        return entrada.valor, entrada.version
+    
+    async def dataset_procesado(self, completo: bool = False) -> pl.DataFrame:
+        df, _ = await self._dataset_versionado(completo)
+        return df
+    
+    async def sincronizar_datos(self, completo: bool = False) -> pl.DataFrame:
+        '''
+        Devuelve el dataset procesado. La primera vez (o con completo=True) lee la
+        tabla entera; después solo lee las filas posteriores a la marca de agua
+        (id / created_at) y las fusiona con el dataset en memoria.
+        '''
+        async with self._lock_sincronizacion:
+            incremental = not completo and self._df_procesado is not None
+            with metricas.ejecucion('sincronizacion', incremental=incremental) as ejecucion:
+                df = await self._sincronizar(incremental)
+                ejecucion['filas_en_memoria'] = df.height
+            return df
+    
+    async def _sincronizar(self, incremental: bool) -> pl.DataFrame:
+        '''Cuerpo de sincronizar_datos; se llama con el lock tomado.'''
+        if incremental:
+            logger.info(f'Sincronización incremental desde id={self._ultimo_id}, created_at={self._ultimo_created_at}')
+            df_raw = await self._leer_dataframe(
+                desde_id=self._ultimo_id,
+                desde_created_at=self._ultimo_created_at
+            )
+        else:
+            logger.info('Sincronización completa de laboratorio_dengue')
+            self._ultimo_id = None
+            self._ultimo_created_at = None
+            df_raw = await self._leer_dataframe()
+        
+        if df_raw.is_empty():
+            if not incremental:
+                self._df_procesado = None
+                return pl.DataFrame()
+            logger.info('Sin registros nuevos desde la última sincronización')
+            return self._df_procesado
+        
+        self._df_procesado = await self.ejecutor.ejecutar(self._procesar_y_fusionar, df_raw, incremental)
+        self._actualizar_marca_de_agua(df_raw)
+        
+        logger.info(f'{df_raw.height} registros sincronizados, {self._df_procesado.height} en memoria')
+        
+        return self._df_procesado
+    
+    def _procesar_y_fusionar(self, df_raw: pl.DataFrame, incremental: bool) -> pl.DataFrame:
+        df_nuevo = self._procesar(df_raw)
+        if not incremental:
+            return df_nuevo
+        with metricas.etapa('fusion', filas=df_nuevo.height):
+            return self._fusionar(df_nuevo)
+    
+    async def cargar_instantanea(self, ruta: Optional[str] = None) -> bool:
+        '''
+        Restaura el dataset procesado desde la instantánea en disco, con su
+        huella y su marca de agua: la próxima sincronización solo lee lo que
+        entró después. No se usa si se normalizó con otras tablas de mapeo ni
+        si tiene más filas o un id mayor que la tabla actual (es de otra base
+        o la tabla perdió filas). Devuelve True si el dataset quedó restaurado.
+        '''
+        ruta = settings.RUTA_INSTANTANEA if ruta is None else ruta
+        if not ruta:
+            return False
+        
+        async with self._lock_sincronizacion:
+            if self._df_procesado is not None:
+                return False
+            try:
+                instantanea = await self.ejecutor.ejecutar(self._leer_instantanea, ruta)
+            except Exception as e:
+                logger.warning(f'No se pudo leer la instantánea {ruta}: {type(e).__name__}: {e}')
+                return False
+            if instantanea is None:
+                return False
+            if instantanea.version_mapeos != tablas().version:
+                logger.info(
+                    f'Instantánea normalizada con otras tablas ({instantanea.version_mapeos} != '
+                    f'{tablas().version}): sincronización completa'
+                )
+                return False
+            
             try:
-                logger.info('Intentando crear DataFrame con todos los valores como string')
-                
-                data_dicts_str = []
-                for row_dict in data_dicts:
-                    str_dict = {}
-                    for key, value in row_dict.items():
-                        if value is None:
-                            str_dict[key] = None
-                        else:
-                            str_dict[key] = str(value)
-                    data_dicts_str.append(str_dict)
-                
-                df = pl.DataFrame(data_dicts_str)
-                logger.info('DataFrame creado exitosamente con conversión a string')
-                
-            except Exception as e2:
-                logger.error(f'Error crítico creando DataFrame: {e2}')
-                raise e2
+                actual = await self.huella()
+            except Exception as e:
+                logger.warning(f'No se pudo verificar la instantánea contra la tabla: {type(e).__name__}: {e}')
+                return False
+            if instantanea.huella.filas > actual.filas or (instantanea.huella.max_id or 0) > (actual.max_id or 0):
+                logger.warning(
+                    f'La instantánea no corresponde a la tabla actual ({instantanea.huella.filas} filas hasta '
+                    f'id={instantanea.huella.max_id}, la tabla tiene {actual.filas} hasta id={actual.max_id}): '
+                    'sincronización completa'
+                )
+                return False
+            
+            self._df_procesado = instantanea.df
+            self._huella = instantanea.huella
+            self._ultimo_id = instantanea.ultimo_id
+            self._ultimo_created_at = instantanea.ultimo_created_at
+            self._version_instantanea = self.version_dataset()
+            self.cache.guardar(CLAVE_DATASET, self._df_procesado, self._version_instantanea)
         
-        logger.info(f'DataFrame creado con shape: {df.shape}')
+        logger.info(f'Dataset restaurado desde {ruta}: {instantanea.df.height} registros (versión {self._version_instantanea})')
+        return True
+    
+    @staticmethod
+    def _leer_instantanea(ruta: str) -> Optional[Instantanea]:
+        with metricas.etapa('lectura_instantanea') as etapa:
+            instantanea = leer_instantanea(ruta)
+            if instantanea is not None:
+                etapa.filas, etapa.bytes = instantanea.df.height, instantanea.df.estimated_size()
+        return instantanea
+    
+    async def guardar_instantanea(self, ruta: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        '''
+        Escribe el dataset en memoria como instantánea si cambió desde la
+        última que se guardó. Devuelve ruta, filas y bytes, o None si no
+        escribió nada.
+        '''
+        ruta = settings.RUTA_INSTANTANEA if ruta is None else ruta
+        if not ruta:
+            return None
         
-        df_processed = self.processor.procesar_datos_paralelo(df)
+        # Dataset, huella, marca de agua y tablas tomados juntos, sin una sincronización en el medio
+        async with self._lock_sincronizacion:
+            version = self.version_dataset()
+            if version is None or version == self._version_instantanea:
+                return None
+            instantanea = Instantanea(
+                df=self._df_procesado,
+                huella=self._huella,
+                version_mapeos=tablas().version,
+                ultimo_id=self._ultimo_id,
+                ultimo_created_at=self._ultimo_created_at,
+            )
         
-        result = df_processed.to_dicts()
+        resultado = await self.ejecutor.ejecutar(self._escribir_instantanea, ruta, instantanea)
+        self._version_instantanea = version
+        logger.info(f'Instantánea guardada en {ruta}: {resultado["filas"]} registros, {resultado["bytes"]} bytes')
+        return resultado
+    
+    @staticmethod
+    def _escribir_instantanea(ruta: str, instantanea: Instantanea) -> Dict[str, Any]:
+        with metricas.etapa('escritura_instantanea', filas=instantanea.df.height) as etapa:
+            resultado = escribir_instantanea(ruta, instantanea)
+            etapa.bytes = resultado['bytes']
+        return resultado
+    
+    def describir_mapeos(self) -> Dict[str, Any]:
+        '''Versión vigente de las tablas de normalización.'''
+        return tablas().describir()
+    
+    async def recargar_mapeos(self) -> Dict[str, Any]:
+        '''
+        Vuelve a leer las tablas de normalización y las reemplaza de una vez. El
+        dataset en memoria no se reprocesa: solo se actualizan las filas de los
+        valores crudos afectados por las claves que cambiaron.
+        '''
+        async with self._lock_sincronizacion:
+            cambios = await self.ejecutor.ejecutar(self._recargar_y_renormalizar)
+            if cambios:
+                # Los KPIs cacheados se normalizaron con las tablas anteriores
+                self.cache_kpis.invalidar()
+                if self._df_procesado is not None:
+                    self.cache.guardar(CLAVE_DATASET, self._df_procesado, self.version_dataset())
         
-        logger.info(f'Procesamiento completado. {len(result)} registros procesados')
+        return {
+            **tablas().describir(),
+            'cambios': {tabla: len(claves) for tabla, claves in cambios.items()},
+        }
+    
+    def _recargar_y_renormalizar(self) -> Dict[str, Any]:
+        cambios = recargar_tablas()
+        if cambios and self._df_procesado is not None:
+            with metricas.etapa('renormalizacion', filas=self._df_procesado.height):
+                self._df_procesado = self.processor.renormalizar(self._df_procesado, cambios)
+        return cambios
+    
+    async def obtener_dataframe_procesado(self, **filtros) -> pl.DataFrame:
+        df, _ = await self.obtener_dataframe_versionado(**filtros)
+        return df
+    
+    async def obtener_dataframe_versionado(
+        self,
+        completo: bool = False,
+        fecha_desde: Optional[date] = None,
+        fecha_hasta: Optional[date] = None,
+        **filtros_normalizados: Optional[str]
+    ) -> Tuple[pl.DataFrame, Optional[str]]:
+        '''
+        Dataset procesado restringido a la selección pedida, con la versión de
+        los datos de los que sale.
+
+        Con el dataset ya en memoria se toma del cache y se filtra ahí. Si todavía no
+        hay dataset y hay rango de fechas, el rango se empuja al WHERE y solo se
+        procesa esa selección (sin poblar el dataset en memoria).
+        '''
+        hay_fechas = fecha_desde is not None or fecha_hasta is not None
+        
+        if hay_fechas and self._df_procesado is None and not completo:
+            logger.info(f'Leyendo selección fecha_recepcion entre {fecha_desde} y {fecha_hasta}')
+            version = await self.version_actual()
+            df_raw = await self._leer_dataframe(fecha_desde=fecha_desde, fecha_hasta=fecha_hasta)
+            if df_raw.is_empty():
+                return pl.DataFrame(), version
+            df = await self.ejecutor.ejecutar(self._procesar, df_raw)
+        else:
+            df, version = await self._dataset_versionado(completo=completo)
+            if df.is_empty():
+                return df, version
+            if fecha_desde is not None:
+                df = df.filter(pl.col('fecha_recepcion_date') >= fecha_desde)
+            if fecha_hasta is not None:
+                df = df.filter(pl.col('fecha_recepcion_date') <= fecha_hasta)
         
+        return filtrar_normalizados(df, filtros_normalizados), version
+    
+    async def obtener_opciones_filtro(self) -> Tuple[Dict[str, Any], Optional[str]]:
+        '''
+        Valores normalizados posibles de cada filtro de /procesados y rango de
+        fecha_recepcion, con la versión del dataset: el dashboard arma sus
+        filtros con esto y pide solo la selección.
+        '''
+        df, version = await self._dataset_versionado()
+        return await self.ejecutor.ejecutar(self._opciones_filtro, df), version
+    
+    @staticmethod
+    def _opciones_filtro(df: pl.DataFrame) -> Dict[str, Any]:
+        if df.is_empty():
+            return {'total_casos': 0, 'fecha_recepcion_min': None, 'fecha_recepcion_max': None}
+        return {
+            'total_casos': df.height,
+            'fecha_recepcion_min': df['fecha_recepcion_date'].min(),
+            'fecha_recepcion_max': df['fecha_recepcion_date'].max(),
+            **{
+                nombre: df[columna].drop_nulls().unique().sort().to_list()
+                for nombre, columna in COLUMNAS_FILTRO_NORMALIZADO.items()
+            },
+        }
+    
+    async def obtener_datos_procesados(self, completo: bool = False, **filtros) -> List[Dict[str, Any]]:
+        result, _ = await self.obtener_datos_versionados(completo=completo, **filtros)
         return result
     
-    async def obtener_datos_raw(self) -> List[Dict[str, Any]]:
-        raw_data = await get_laboratorio_dengue_data()
+    async def obtener_datos_versionados(self, completo: bool = False, **filtros) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        logger.info('Obteniendo datos procesados')
         
-        if not raw_data:
-            return []
+        df_processed, version = await self.obtener_dataframe_versionado(completo=completo, **filtros)
+        
+        if df_processed.is_empty():
+            logger.warning('No se encontraron datos para la selección')
+            return [], version
         
-        return [dict(row._mapping) for row in raw_data]
+        result = await self.ejecutor.ejecutar(self._a_dicts, df_processed)
+        
+        logger.info(f'Procesamiento completado. {len(result)} registros procesados')
+        
+        return result, version
+    
+    @staticmethod
+    def _a_dicts(df: pl.DataFrame) -> List[Dict[str, Any]]:
+        with metricas.etapa('to_dicts', filas=df.height, bytes=df.estimated_size()):
+            return df.to_dicts()
     
-    async def obtener_kpis_basicos(self) -> Dict[str, Any]:
-        datos_procesados = await self.obtener_datos_procesados()
+    async def _lotes_procesados(
+        self,
+        fecha_desde: Optional[date] = None,
+        fecha_hasta: Optional[date] = None,
+        **filtros_normalizados: Optional[str]
+    ) -> AsyncIterator[pl.DataFrame]:
+        '''
+        Lee la selección con el cursor y entrega lotes ya procesados de a uno,
+        sin armar la tabla entera. Los lotes del cursor se juntan hasta
+        filas_por_lote(), calculado con PRESUPUESTO_MEMORIA_MB y los bytes por
+        fila del primer lote leído.
+        '''
+        presupuesto = settings.PRESUPUESTO_MEMORIA_MB * 1024 * 1024
+        objetivo = None
+        pendientes: List[pl.DataFrame] = []
+        filas_pendientes = 0
         
-        if not datos_procesados:
-            return {'error': 'No hay datos disponibles'}
+        async for lote in stream_laboratorio_dengue_data(fecha_desde=fecha_desde, fecha_hasta=fecha_hasta):
+            if lote.is_empty():
+                continue
+            if objetivo is None:
+                objetivo = filas_por_lote(lote.estimated_size() / lote.height, presupuesto, settings.LOTE_STREAMING)
+                logger.info(f'Procesamiento por lotes de {objetivo} filas (presupuesto {settings.PRESUPUESTO_MEMORIA_MB} MB)')
+            pendientes.append(lote)
+            filas_pendientes += lote.height
+            if filas_pendientes < objetivo:
+                continue
+            df_raw = pl.concat(pendientes, how='vertical_relaxed') if len(pendientes) > 1 else pendientes[0]
+            pendientes, filas_pendientes = [], 0
+            for inicio in range(0, df_raw.height, objetivo):
+                df = await self._procesar_lote(df_raw.slice(inicio, objetivo), filtros_normalizados)
+                if not df.is_empty():
+                    yield df
+        
+        if pendientes:
+            df = await self._procesar_lote(pl.concat(pendientes, how='vertical_relaxed'), filtros_normalizados)
+            if not df.is_empty():
+                yield df
+    
+    async def _procesar_lote(self, df_raw: pl.DataFrame, filtros_normalizados: Dict[str, Optional[str]]) -> pl.DataFrame:
+        # Los lotes de un trabajo ya en marcha esperan su turno en vez de cortarlo a la mitad
+        df = await self.ejecutor.ejecutar(self.processor.procesar_datos_paralelo, df_raw, rechazable=False)
+        return filtrar_normalizados(df, filtros_normalizados)
+    
+    async def procesar_en_lotes(self, destino, **filtros) -> Any:
+        '''
+        Procesa la selección lote a lote y entrega cada lote a destino
+        (DestinoParquet, DestinoAgregado, ...). Devuelve destino.cerrar(); si
+        algo falla a mitad de camino el destino se descarta.
+        '''
+        with metricas.ejecucion('lotes', destino=type(destino).__name__) as ejecucion:
+            ejecucion['lotes'] = 0
+            try:
+                async for df in self._lotes_procesados(**filtros):
+                    await self.ejecutor.ejecutar(self._entregar, destino, df, rechazable=False)
+                    ejecucion['lotes'] += 1
+            except BaseException:
+                destino.descartar()
+                raise
+            return await self.ejecutor.ejecutar(destino.cerrar, rechazable=False)
+    
+    @staticmethod
+    def _entregar(destino, df: pl.DataFrame):
+        with metricas.etapa('destino', filas=df.height, bytes=df.estimated_size()):
+            destino.agregar(df)
+    
+    async def stream_procesados_ndjson(self, **filtros) -> AsyncIterator[bytes]:
+        '''Dataset procesado como NDJSON, un bloque por lote: la respuesta nunca está entera en memoria.'''
+        with metricas.ejecucion('stream_ndjson') as ejecucion:
+            ejecucion['lotes'] = 0
+            async for df in self._lotes_procesados(**filtros):
+                contenido = await self.ejecutor.ejecutar(self._a_ndjson, df, rechazable=False)
+                ejecucion['lotes'] += 1
+                yield contenido
+    
+    @staticmethod
+    def _a_ndjson(df: pl.DataFrame) -> bytes:
+        with metricas.etapa('ndjson', filas=df.height) as etapa:
+            contenido = df.write_ndjson().encode()
+            etapa.bytes = len(contenido)
+        return contenido
+    
+    async def obtener_datos_raw(
+        self,
+        fecha_desde: Optional[date] = None,
+        fecha_hasta: Optional[date] = None,
+        **filtros_raw: Optional[str]
+    ) -> List[Dict[str, Any]]:
+        '''Filas tal como están en la tabla; todos los filtros van al WHERE y comparan valores raw.'''
+        df = await self._leer_dataframe(fecha_desde=fecha_desde, fecha_hasta=fecha_hasta, **filtros_raw)
         
-        df = pl.DataFrame(datos_procesados)
+        if df.is_empty():
+            return []
         
-        total_casos = len(df)
+        return await self.ejecutor.ejecutar(self._a_dicts, df)
+    
+    async def obtener_kpis_basicos(
+        self,
+        fecha_desde: Optional[date] = None,
+        fecha_hasta: Optional[date] = None
+    ) -> Dict[str, Any]:
+        kpis, _ = await self.obtener_kpis_versionados(fecha_desde, fecha_hasta)
+        return kpis
+    
+    async def obtener_kpis_versionados(
+        self,
+        fecha_desde: Optional[date] = None,
+        fecha_hasta: Optional[date] = None
+    ) -> Tuple[Dict[str, Any], str]:
+        '''
+        KPIs de la selección desde el cache, recalculados solo si cambió la
+        versión de los datos. Se calculan en MySQL contra la tabla actual, no
+        sobre el dataset del refresco: su versión es siempre version_actual(),
+        también con el dataset precalculado.
+        '''
+        return await self._kpis_versionados(fecha_desde, fecha_hasta, await self.version_actual())
+    
+    async def _kpis_versionados(
+        self,
+        fecha_desde: Optional[date],
+        fecha_hasta: Optional[date],
+        version: str,
+        forzar: bool = False
+    ) -> Tuple[Dict[str, Any], str]:
+        async def construir():
+            return await self._calcular_kpis(fecha_desde, fecha_hasta), version
         
-        top_localidades = (
-            df.group_by('localidad_normalizada')
-            .agg(pl.count().alias('casos'))
-            .sort('casos', descending=True)
-            .head(10)
-            .to_dicts()
+        entrada = await self.cache_kpis.obtener_entrada(('kpis', fecha_desde, fecha_hasta), construir, version, forzar=forzar)
+        return entrada.valor, entrada.version
+    
+    async def _calcular_kpis(
+        self,
+        fecha_desde: Optional[date] = None,
+        fecha_hasta: Optional[date] = None
+    ) -> Dict[str, Any]:
+        '''
+        KPIs calculados con GROUP BY en MySQL. Solo se normalizan los valores
+        distintos de cada histograma y luego se re-agregan por valor normalizado.
+        '''
+        agregados = await get_laboratorio_dengue_agregados(
+            list(HISTOGRAMAS_KPI),
+            fecha_desde=fecha_desde,
+            fecha_hasta=fecha_hasta
         )
         
-        distribucion_pcr = (
-            df.group_by('rt_pcr_tiempo_real_dengue_normalizado')
-            .agg(pl.count().alias('casos'))
-            .sort('casos', descending=True)
-            .to_dicts()
-        )
+        if not agregados['total_casos']:
+            return {'error': 'No hay datos disponibles'}
         
-        demora_promedio = None
-        if 'demora_dias' in df.columns:
-            try:
-                demora_promedio = df.select(pl.col('demora_dias').mean()).item()
-            except Exception as e:
-                logger.warning(f'Error calculando demora promedio: {e}')
+        histogramas = {
+            columna: reagregar_histograma(
+                agregados['histogramas'][columna],
+                normalizador,
+                columna_salida,
+                INDICES_DIFUSOS.get(columna) if settings.CANONIZACION_DIFUSA else None
+            )
+            for columna, (normalizador, columna_salida) in HISTOGRAMAS_KPI.items()
+        }
+        
+        demora_promedio = agregados['demora_promedio_dias']
         
         return {
-            'total_casos': total_casos,
-            'top_localidades': top_localidades,
-            'distribucion_pcr': distribucion_pcr,
-            'demora_promedio_dias': round(demora_promedio, 2) if demora_promedio else None,
+            'total_casos': agregados['total_casos'],
+            'fecha_recepcion_min': agregados['fecha_recepcion_min'],
+            'fecha_recepcion_max': agregados['fecha_recepcion_max'],
+            'top_localidades': histogramas['localidad'].head(10).to_dicts(),
+            'distribucion_pcr': histogramas['rt_pcr_tiempo_real_dengue'].to_dicts(),
+            'demora_promedio_dias': round(float(demora_promedio), 2) if demora_promedio else None,
             'fecha_procesamiento': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
         }
@@ -0,0 +1,116 @@
+"""
+Refresco en segundo plano del dataset procesado y de los KPIs.
+
+Una tarea iniciada en el lifespan de la app consulta la huella de la tabla
+cada REFRESCO_INTERVALO_SEGUNDOS y, si cambió (o si nunca se construyó),
+reconstruye el dataset procesado y los KPIs generales y los deja en el cache
+del servicio. Con el refresco activo los pedidos leen lo último construido
+sin esperar ninguna reconstrucción ni consultar la base; el reemplazo es una
+única asignación de la entrada del cache, así que nunca ven uno a medio hacer.
+Después de cada reconstrucción se guarda la instantánea en disco; si al
+iniciar ya se restauró una, se entrega enseguida y el primer refresco solo
+aplica lo que entró desde entonces.
+"""
+import asyncio
+import logging
+import time
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from app.core.config import settings
+from app.services.laboratorio_dengue_service import CLAVE_DATASET, LaboratorioDengueService
+
+logger = logging.getLogger(__name__)
+
+class RefrescoDataset:
+    def __init__(self, service: LaboratorioDengueService, intervalo: Optional[float] = None):
+        self.service = service
+        self.intervalo = settings.REFRESCO_INTERVALO_SEGUNDOS if intervalo is None else intervalo
+        self.listo = asyncio.Event()
+        self.version: Optional[str] = None
+        self.ultimo_refresco: Optional[datetime] = None
+        self.ultima_duracion: Optional[float] = None
+        self.ultima_verificacion: Optional[datetime] = None
+        self.refrescos = 0
+        self.errores = 0
+        self.ultimo_error: Optional[str] = None
+        self.ultima_instantanea: Optional[Dict[str, Any]] = None
+        self._tarea: Optional[asyncio.Task] = None
+
+    async def refrescar(self) -> bool:
+        '''Reconstruye si cambió la versión de los datos. Devuelve True si hubo reconstrucción.'''
+        self.ultima_verificacion = datetime.now()
+        version = await self.service.version_actual()
+        if version == self.version:
+            return False
+
+        inicio = time.perf_counter()
+        _, version = await self.service.precalcular()
+        self.ultima_duracion = time.perf_counter() - inicio
+        self.ultimo_refresco = datetime.now()
+        self.version = version
+        self.refrescos += 1
+        self.listo.set()
+        logger.info(f'Dataset refrescado en {self.ultima_duracion:.2f} s (versión {version})')
+        
+        try:
+            instantanea = await self.service.guardar_instantanea()
+            if instantanea is not None:
+                self.ultima_instantanea = {**instantanea, 'version': version, 'guardada': datetime.now()}
+        except Exception as e:
+            # El dataset ya está refrescado; sin instantánea solo se pierde el arranque en caliente
+            logger.warning(f'No se pudo guardar la instantánea: {type(e).__name__}: {e}')
+        return True
+
+    async def _bucle(self):
+        while True:
+            try:
+                await self.refrescar()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # Se sigue entregando lo último construido; se reintenta en el próximo intervalo
+                self.errores += 1
+                self.ultimo_error = f'{type(e).__name__}: {e}'
+                logger.error(f'Falló el refresco del dataset: {self.ultimo_error}')
+            await asyncio.sleep(self.intervalo)
+
+    def iniciar(self):
+        if self._tarea is None:
+            self.service.precalculado = True
+            if self.service.cache.entrada(CLAVE_DATASET) is not None:
+                # Restaurado de la instantánea: se atiende ya y el primer refresco aplica el delta
+                self.listo.set()
+            self._tarea = asyncio.get_running_loop().create_task(self._bucle())
+
+    async def esperar_listo(self, espera: Optional[float] = None) -> bool:
+        '''Espera la primera construcción (hasta `espera` segundos). Devuelve si terminó.'''
+        try:
+            await asyncio.wait_for(self.listo.wait(), espera)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    async def detener(self):
+        if self._tarea is not None:
+            self._tarea.cancel()
+            try:
+                await self._tarea
+            except asyncio.CancelledError:
+                pass
+            self._tarea = None
+
+    def estado(self) -> Dict[str, Any]:
+        return {
+            'activo': self._tarea is not None and not self._tarea.done(),
+            'listo': self.listo.is_set(),
+            'intervalo_segundos': self.intervalo,
+            'version': self.version,
+            'ultimo_refresco': self.ultimo_refresco,
+            'ultima_duracion_segundos': round(self.ultima_duracion, 3) if self.ultima_duracion is not None else None,
+            'ultima_verificacion': self.ultima_verificacion,
+            'refrescos': self.refrescos,
+            'errores': self.errores,
+            'ultimo_error': self.ultimo_error,
+            'ultima_instantanea': self.ultima_instantanea,
+        }
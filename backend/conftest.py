@@ -0,0 +1,134 @@
+"""
+Datos y base simulados compartidos por las pruebas del servicio: filas de
+laboratorio_dengue generadas, una tabla simulada que reemplaza al
+repositorio y servicios que se cierran solos al terminar cada prueba.
+"""
+
+import asyncio
+import os
+import sys
+from datetime import date, timedelta
+
+import polars as pl
+import pytest
+
+# Agregar el directorio del proyecto al path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import app.services.laboratorio_dengue_service as servicio
+from app.core.config import settings
+from app.data.repositories.laboratorio_dengue_repository import HuellaDataset, filas_a_dataframe
+from app.services.cache import CacheVersionado
+from app.services.laboratorio_dengue_service import LaboratorioDengueService
+
+LOCALIDADES = ['CAP', 'LA BANDA', 'FRIAS', 'añatuya', None]
+RESULTADOS = ['NO DETECTABLE', 'Detectable', 'no realizado', None]
+
+def _generar_filas(n: int) -> list:
+    filas = []
+    for i in range(n):
+        recepcion = date(2023, 1, 1) + timedelta(days=i % 400)
+        filas.append((
+            i + 1, str(i % 90), 'HOSPITAL REGIONAL', 'X', LOCALIDADES[i % 5], 'CAPITAL',
+            recepcion, recepcion + timedelta(days=i % 4) if i % 7 else None, recepcion - timedelta(days=2),
+            '3', None, None, None, None, None, RESULTADOS[i % 4], None, None
+        ))
+    return filas
+
+class BaseSimulada:
+    '''Tabla laboratorio_dengue en memoria con las funciones del repositorio que usa el servicio.'''
+    def __init__(self, filas: int):
+        self.filas = _generar_filas(filas)
+        # desde_id de cada lectura (None: lectura completa)
+        self.lecturas = []
+        self.demora = 0.0
+        self.falla = False
+        self.lote: int = None
+
+    async def cursor(self, batch_size=None, desde_id=None, desde_created_at=None, **filtros):
+        self.lecturas.append(desde_id)
+        await asyncio.sleep(self.demora)
+        if self.falla:
+            raise ConnectionError('base caída')
+        pendientes = [f for f in self.filas if self._posterior(f, desde_id, desde_created_at)]
+        lote = self.lote or len(pendientes)
+        for inicio in range(0, len(pendientes), max(lote, 1)):
+            yield filas_a_dataframe(pendientes[inicio:inicio + lote])
+
+    @staticmethod
+    def _posterior(fila: tuple, desde_id, desde_created_at) -> bool:
+        # Igual que el WHERE del repositorio: id > desde_id OR created_at > desde_created_at
+        if desde_id is None and desde_created_at is None:
+            return True
+        if desde_id is not None and fila[0] > desde_id:
+            return True
+        return desde_created_at is not None and fila[-1] is not None and fila[-1] > desde_created_at
+
+    async def huella(self):
+        return HuellaDataset(len(self.filas), max(f[0] for f in self.filas), None)
+
+    async def agregados(self, columnas, fecha_desde=None, fecha_hasta=None):
+        df = filas_a_dataframe(self.filas)
+        return {
+            'total_casos': df.height,
+            'fecha_recepcion_min': df['fecha_recepcion'].min(),
+            'fecha_recepcion_max': df['fecha_recepcion'].max(),
+            'demora_promedio_dias': None,
+            'histogramas': {
+                columna: df.group_by(pl.col(columna).alias('valor')).agg(pl.len().alias('casos'))
+                for columna in columnas
+            },
+        }
+
+async def _esperar(condicion, limite: float = 10):
+    '''Espera a que condicion() sea verdadera (el refresco corre cada 50 ms).'''
+    for _ in range(int(limite / 0.02)):
+        if condicion():
+            return
+        await asyncio.sleep(0.02)
+    assert False, 'No se cumplió a tiempo'
+
+@pytest.fixture
+def generar_filas():
+    '''Filas crudas de laboratorio_dengue con ids 1..n, en el orden de columnas del repositorio.'''
+    return _generar_filas
+
+@pytest.fixture
+def esperar():
+    return _esperar
+
+@pytest.fixture
+def base(monkeypatch):
+    '''Base simulada de 1000 filas en lugar del repositorio.'''
+    base = BaseSimulada(1000)
+    monkeypatch.setattr(servicio, 'stream_laboratorio_dengue_data', base.cursor)
+    monkeypatch.setattr(servicio, 'get_huella_laboratorio_dengue', base.huella)
+    monkeypatch.setattr(servicio, 'get_laboratorio_dengue_agregados', base.agregados)
+    return base
+
+@pytest.fixture(autouse=True)
+def ruta_instantanea(monkeypatch, tmp_path):
+    '''Ruta de la instantánea de la prueba: ninguna prueba escribe en la ruta real.'''
+    ruta = str(tmp_path / 'laboratorio_dengue.parquet')
+    monkeypatch.setattr(settings, 'RUTA_INSTANTANEA', ruta)
+    return ruta
+
+@pytest.fixture
+def nuevo_servicio():
+    '''
+    Crea servicios sin cache por tiempo (cada cambio de huella se ve en el
+    siguiente pedido) y los cierra al terminar la prueba.
+    '''
+    servicios = []
+
+    def crear(**opciones) -> LaboratorioDengueService:
+        service = LaboratorioDengueService(max_workers=1, **opciones)
+        service.cache = CacheVersionado(ttl=0, stale=0, max_entradas=1)
+        service.cache_kpis = CacheVersionado(ttl=0, stale=0)
+        service._cache_huella = CacheVersionado(ttl=0, stale=0)
+        servicios.append(service)
+        return service
+
+    yield crear
+    for service in servicios:
+        service.cerrar()
@@ -1,14 +1,46 @@
+import logging
+from contextlib import asynccontextmanager
+
 import fastapi
+from fastapi.responses import JSONResponse
+from app.core.config import settings
 from app.data.connection import engine
 from app.api.routes import router as api_router
+from app.api.laboratorio_dengue import refresco, service as laboratorio_dengue_service
+from app.services.admision import Saturado
+
+logger = logging.getLogger(__name__)
+
+@asynccontextmanager
+async def lifespan(app: fastapi.FastAPI):
+    # Con instantánea el arranque no reprocesa la tabla: solo se sincroniza lo que entró después
+    await laboratorio_dengue_service.cargar_instantanea()
+    if settings.REFRESCO_SEGUNDO_PLANO:
+        refresco.iniciar()
+        # uvicorn no acepta conexiones hasta que termine el arranque: se espera la primera construcción
+        if not await refresco.esperar_listo(settings.REFRESCO_ESPERA_INICIAL_SEGUNDOS):
+            logger.warning('El dataset todavía no está construido; /ready responde 503 hasta que lo esté')
+    yield
+    await refresco.detener()
+    try:
+        await laboratorio_dengue_service.guardar_instantanea()
+    except Exception as e:
+        logger.warning(f'No se pudo guardar la instantánea al cerrar: {type(e).__name__}: {e}')
+    laboratorio_dengue_service.cerrar()
+    await engine.dispose()
 
-app = fastapi.FastAPI()
+app = fastapi.FastAPI(lifespan=lifespan)
 
-app.add_event_handler('startup', engine.connect)
-app.add_event_handler('shutdown', engine.dispose)
+@app.exception_handler(Saturado)
+async def procesamiento_saturado(request: fastapi.Request, exc: Saturado):
+    return JSONResponse(
+        status_code=503,
+        content={'detail': str(exc)},
+        headers={'Retry-After': str(exc.reintentar_en)}
+    )
 
 @app.get('/')
 def read_root():
     return {'Hello': 'World'}
 
-app.include_router(api_router)
\ No newline at end of file
+app.include_router(api_router)
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+Backfill de laboratorio_dengue procesado por lotes, con memoria acotada.
+
+Lee la selección con el cursor, procesa lotes de hasta LOTE_STREAMING filas
+(menos si PRESUPUESTO_MEMORIA_MB no alcanza) y los escribe a un Parquet o los
+acumula en agregados por localidad, departamento, resultado PCR y semana
+epidemiológica. Nunca arma la tabla entera en memoria.
+
+Uso: python scripts/backfill.py parquet salida.parquet [--desde 2020-01-01] [--hasta 2024-12-31]
+     python scripts/backfill.py agregado [salida.json] [--desde ...] [--hasta ...]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+from datetime import date
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.data.connection import engine
+from app.services.destinos import DestinoAgregado, DestinoParquet
+from app.services.laboratorio_dengue_service import LaboratorioDengueService
+
+async def main(destino: str, ruta: str = None, desde: date = None, hasta: date = None):
+    service = LaboratorioDengueService()
+    try:
+        if destino == 'parquet':
+            resultado = await service.procesar_en_lotes(DestinoParquet(ruta), fecha_desde=desde, fecha_hasta=hasta)
+            print(f'{resultado["filas"]} filas escritas en {resultado["ruta"]} ({resultado["bytes"]} bytes)')
+        else:
+            resultado = await service.procesar_en_lotes(DestinoAgregado(), fecha_desde=desde, fecha_hasta=hasta)
+            contenido = json.dumps(resultado, default=str, ensure_ascii=False, indent=2)
+            if ruta:
+                with open(ruta, 'w', encoding='utf-8') as archivo:
+                    archivo.write(contenido)
+                print(f'{resultado["total_casos"]} casos agregados en {ruta}')
+            else:
+                print(contenido)
+    finally:
+        service.cerrar()
+        await engine.dispose()
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('destino', choices=['parquet', 'agregado'])
+    parser.add_argument('ruta', nargs='?')
+    parser.add_argument('--desde', type=date.fromisoformat)
+    parser.add_argument('--hasta', type=date.fromisoformat)
+    args = parser.parse_args()
+    if args.destino == 'parquet' and not args.ruta:
+        parser.error('parquet necesita la ruta de salida')
+    asyncio.run(main(args.destino, args.ruta, args.desde, args.hasta))
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Benchmark de _calcular_campos_derivados: las etapas aplicadas en modo eager,
+una por una (como antes), contra el plan lazy con un solo collect().
+
+Las fechas se generan como texto con los tres formatos conocidos para medir
+también el parseo (coalesce de formatos contra detección del dominante). Para el plan lazy se muestra el perfil por nodo de Polars.
+
+Uso: python scripts/bench_derivados.py [filas]   (por defecto 1000000)
+"""
+
+import os
+import random
+import sys
+import time
+from datetime import date, timedelta
+
+import polars as pl
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.data.processors.dengue_processor import etapas_campos_derivados
+from app.data.processors.fecha_processor import FORMATOS_FECHA, olvidar_formatos, parsear_fechas
+
+# La mayoría de las fechas llegan en ISO; el resto en los formatos cargados a mano
+PESOS_FORMATOS = [90, 7, 3]
+
+def generar_dataframe(n: int) -> pl.DataFrame:
+    random.seed(0)
+    inicio = date(2023, 1, 1)
+    fechas = [inicio + timedelta(days=random.randint(0, 700)) for _ in range(2_000)]
+    def columna_fecha():
+        formatos = random.choices(FORMATOS_FECHA, PESOS_FORMATOS, k=n)
+        return [
+            random.choice(fechas).strftime(formato) if random.random() > 0.05 else None
+            for formato in formatos
+        ]
+    return pl.DataFrame({
+        'edad': [str(random.randint(0, 90)) + random.choice(['', ' años', 'a']) for _ in range(n)],
+        'fecha_recepcion': columna_fecha(),
+        'fecha_procesamiento': columna_fecha(),
+        'fecha_inicio_fiebre': columna_fecha(),
+        'dias_evolucion': [str(random.randint(0, 15)) for _ in range(n)],
+    })
+
+def eager_por_etapas(df: pl.DataFrame) -> tuple:
+    tiempos = []
+    for nombre, expresiones, _ in etapas_campos_derivados(df.schema):
+        inicio = time.perf_counter()
+        df = df.with_columns(expresiones)
+        tiempos.append((nombre, time.perf_counter() - inicio))
+    return df, tiempos
+
+def plan_lazy(df: pl.DataFrame) -> pl.LazyFrame:
+    plan = df.lazy()
+    for _, expresiones, _ in etapas_campos_derivados(df.schema):
+        plan = plan.with_columns(expresiones)
+    return plan
+
+def comparar_parseo(df: pl.DataFrame):
+    '''Coalesce de todos los formatos (versión anterior) contra detección del formato dominante.'''
+    print('Parseo de fechas (coalesce / formato dominante + residuo):')
+    olvidar_formatos()
+    for col in ['fecha_recepcion', 'fecha_procesamiento', 'fecha_inicio_fiebre']:
+        inicio = time.perf_counter()
+        coalesce = df.select(pl.coalesce([
+            pl.col(col).str.strptime(pl.Date, format=formato, strict=False) for formato in FORMATOS_FECHA
+        ])).to_series()
+        t_coalesce = time.perf_counter() - inicio
+
+        inicio = time.perf_counter()
+        detectado = parsear_fechas(df[col], col)
+        t_detectado = time.perf_counter() - inicio
+        assert detectado.equals(coalesce.rename(col))
+        print(f'  {col:<28} {t_coalesce:6.3f}s / {t_detectado:6.3f}s')
+    print()
+
+if __name__ == '__main__':
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    df = generar_dataframe(n)
+    print(f'{n:,} filas\n')
+    comparar_parseo(df)
+
+    df_eager, tiempos = eager_por_etapas(df)
+    print('Eager, una etapa por vez:')
+    for nombre, segundos in tiempos:
+        print(f'  {nombre:<28} {segundos:6.3f}s')
+    print(f'  {"total":<28} {sum(s for _, s in tiempos):6.3f}s')
+
+    inicio = time.perf_counter()
+    df_lazy = plan_lazy(df).collect()
+    total_lazy = time.perf_counter() - inicio
+    assert df_lazy.equals(df_eager)
+
+    _, perfil = plan_lazy(df).profile()
+    print('\nLazy, un solo collect() (perfil por nodo, µs):')
+    for fila in perfil.iter_rows(named=True):
+        print(f'  {fila["node"][:60]:<60} {fila["end"] - fila["start"]:>10,}')
+    print(f'  {"total":<60} {total_lazy:9.3f}s')
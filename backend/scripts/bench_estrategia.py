@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Benchmark de procesar_datos_paralelo: configuración fija anterior (pool de
+4 procesos, chunks de 500) contra la estrategia adaptativa por columna.
+
+Se mide con pocas y con muchas variantes distintas por columna, en frío
+(procesador nuevo, memos vacíos) y en caliente (segunda corrida).
+
+Uso: python scripts/bench_estrategia.py [filas]   (por defecto 200000)
+"""
+
+import logging
+import os
+import random
+import sys
+import time
+
+import polars as pl
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.data.processors.dengue_processor import DengueDataProcessor
+from app.data.processors.memo import MEMOS
+from app.data.processors.planificacion import cpus_disponibles
+
+BASE = {
+    'localidad': ['CAP', 'LA BANDA', 'FRIAS', 'TERMAS DE RIO HONDO', 'AÑATUYA', None],
+    'departamento': ['CAPITAL', 'BANDA', 'RIO HONDO', 'GENERAL TABOADA', None],
+    'establecimiento_notificador': ['HOSPITAL REGIONAL', 'DORREGO- UPA N?6', 'BANDA-CIS', None],
+    'rt_pcr_tiempo_real_dengue': ['NO DETECTABLE', 'DETECTABLE', 'no realizado', 'DEN-2', None],
+}
+
+def generar(n: int, distintos: int) -> pl.DataFrame:
+    '''Columnas con `distintos` variantes sucias por columna (sufijos y mayúsculas al azar).'''
+    random.seed(0)
+    datos = {'id': list(range(n))}
+    for col, valores in BASE.items():
+        variantes = [
+            None if v is None else (v.lower() if i % 2 else v) + ('' if i < len(valores) else f' {i}')
+            for i, v in enumerate(valores * (distintos // len(valores) + 1))
+        ][:distintos]
+        datos[col] = random.choices(variantes, k=n)
+    return pl.DataFrame(datos)
+
+def medir(processor: DengueDataProcessor, df: pl.DataFrame) -> float:
+    inicio = time.perf_counter()
+    processor.procesar_datos_paralelo(df)
+    return time.perf_counter() - inicio
+
+if __name__ == '__main__':
+    logging.disable(logging.INFO)
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    print(f'{n:,} filas, {cpus_disponibles()} CPUs disponibles')
+    for distintos in (50, 20_000):
+        df = generar(n, distintos)
+        for nombre, argumentos in (
+            ('fija (4 procesos, chunk 500)', dict(max_workers=4, chunk_size=500, estrategia='procesos')),
+            ('adaptativa', dict()),
+        ):
+            for memo in MEMOS.values():
+                memo.limpiar()
+            processor = DengueDataProcessor(**argumentos)
+            try:
+                frio = medir(processor, df)
+                for memo in MEMOS.values():
+                    memo.limpiar()
+                caliente = medir(processor, df)
+            finally:
+                processor.cerrar()
+            print(f'  {distintos:>6} distintos  {nombre:<30} frío {frio:6.3f}s  caliente {caliente:6.3f}s')
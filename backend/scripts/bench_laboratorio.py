@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark de normalizar_laboratorio: regex secuenciales originales
+contra el clasificador compilado y su variante vectorizada en Polars.
+
+Uso: python scripts/bench_laboratorio.py [valores]   (por defecto 200000)
+"""
+
+import os
+import random
+import sys
+import time
+
+import polars as pl
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.data.processors.laboratorio_processor import normalizar_laboratorio
+from app.data.processors.text_expr import normalizar_laboratorio_expr
+from test_laboratorio_processor import normalizar_laboratorio_original
+
+# Distribución aproximada de los valores crudos en las columnas de laboratorio
+DISTRIBUCION = [
+    ('NO DETECTABLE', 30), ('No detectable', 8), (None, 20), ('no realizado', 10),
+    ('NO  REALIZADO', 3), ('no relizado', 2), ('DETECTABLE', 8), ('Positivo', 3),
+    ('DEN-2', 4), ('DEN 1', 2), ('den_3', 1), ('EN PROCESO', 2), ('Indeterminado', 2),
+    ('-', 3), ('NEGATIVO.', 2), ('sin procesar', 1), ('DEN-1 y DEN-2', 1), ('25', 1),
+]
+
+def generar_valores(n: int) -> list:
+    random.seed(0)
+    valores, pesos = zip(*DISTRIBUCION)
+    return random.choices(valores, weights=pesos, k=n)
+
+def medir(func, valores) -> float:
+    inicio = time.perf_counter()
+    func(valores)
+    return time.perf_counter() - inicio
+
+if __name__ == '__main__':
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    valores = generar_valores(n)
+    serie = pl.Series('v', valores, dtype=pl.Utf8).to_frame()
+    serie.head(1).select(normalizar_laboratorio_expr(pl.col('v')))  # compila las clases regex una vez
+
+    t_original = medir(lambda vs: [normalizar_laboratorio_original(v) for v in vs], valores)
+    t_compilado = medir(lambda vs: [normalizar_laboratorio(v) for v in vs], valores)
+    t_polars = medir(lambda df: df.lazy().select(normalizar_laboratorio_expr(pl.col('v'))).collect(), serie)
+
+    print(f'{n:,} valores')
+    print(f'  regex secuenciales: {t_original:6.3f}s ({n / t_original:,.0f} valores/s)')
+    print(f'  clasificador:       {t_compilado:6.3f}s ({n / t_compilado:,.0f} valores/s)')
+    print(f'  polars:             {t_polars:6.3f}s ({n / t_polars:,.0f} valores/s)')
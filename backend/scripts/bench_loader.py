@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Benchmark de carga DB -> Polars: ruta anterior (diccionario por fila con
+strftime por fecha) contra filas_a_dataframe con esquema declarado.
+
+Uso: python scripts/bench_loader.py [filas ...]   (por defecto 100000 1000000)
+"""
+
+import os
+import random
+import sys
+import time
+from datetime import date, datetime, timedelta
+
+import polars as pl
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.data.repositories.laboratorio_dengue_repository import filas_a_dataframe
+
+LOCALIDADES = ['CAP', 'LA BANDA', 'FRIAS', 'TERMAS DE RIO HONDO', 'AÑATUYA', None]
+RESULTADOS = ['NO DETECTABLE', 'DETECTABLE', 'no realizado', 'DEN-2', None]
+
+def generar_filas(n: int) -> list:
+    random.seed(0)
+    base = date(2023, 1, 1)
+    filas = []
+    for i in range(n):
+        recepcion = base + timedelta(days=random.randint(0, 700))
+        filas.append((
+            i, str(random.randint(0, 90)), 'HOSPITAL REGIONAL', 'CEAMM',
+            random.choice(LOCALIDADES), 'CAPITAL',
+            recepcion, recepcion + timedelta(days=random.randint(0, 5)), recepcion - timedelta(days=3),
+            str(random.randint(0, 10)),
+            *(random.choice(RESULTADOS) for _ in range(7)),
+            datetime(2023, 1, 1) + timedelta(minutes=i)
+        ))
+    return filas
+
+def ruta_diccionarios(filas: list, columnas: list) -> pl.DataFrame:
+    """Ruta anterior de LaboratorioDengueService.obtener_datos_procesados."""
+    def normalizar_valor(valor):
+        if valor is None:
+            return None
+        if hasattr(valor, 'strftime'):
+            return valor.strftime('%Y-%m-%d')
+        return valor
+
+    data_dicts = []
+    for fila in filas:
+        data_dicts.append({key: normalizar_valor(value) for key, value in zip(columnas, fila)})
+    return pl.DataFrame(data_dicts, infer_schema_length=None)
+
+def medir(func, *args) -> float:
+    inicio = time.perf_counter()
+    func(*args)
+    return time.perf_counter() - inicio
+
+if __name__ == '__main__':
+    from app.data.repositories.laboratorio_dengue_repository import selected_columns
+
+    tamanios = [int(a) for a in sys.argv[1:]] or [100_000, 1_000_000]
+    for n in tamanios:
+        filas = generar_filas(n)
+        t_dicts = medir(ruta_diccionarios, filas, selected_columns)
+        t_columnar = medir(filas_a_dataframe, filas)
+        print(f'{n:>9,} filas | diccionarios: {t_dicts:6.2f}s | columnar: {t_columnar:6.2f}s | x{t_dicts / t_columnar:.1f}')
@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark de quitar_tildes: NFKD con marcadores para la Ñ (versión
+anterior) contra la tabla de str.translate y su par vectorizado en Polars.
+
+Uso: python scripts/bench_tildes.py [valores]   (por defecto 500000)
+"""
+
+import os
+import random
+import sys
+import time
+
+import polars as pl
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.data.processors.mapeos import tablas
+from app.data.processors.text_utils import limpiar_basico, quitar_tildes
+from app.data.processors.text_expr import quitar_tildes_expr
+from test_quitar_tildes import quitar_tildes_original
+
+def generar_valores(n: int) -> list:
+    '''Valores ya pasados por limpiar_basico, como los recibe quitar_tildes.'''
+    random.seed(0)
+    vigentes = tablas()
+    base = [
+        limpiar_basico(v)
+        for tabla in (vigentes.localidades, vigentes.departamentos, vigentes.establecimientos)
+        for v in list(tabla) + list(tabla.values())
+    ]
+    base += ['AÑATUYA', 'SANTIAGO DEL ESTERO', 'FERNÁNDEZ', 'CAPÍTAL', 'CLODOMIRA', 'QUIMILÍ']
+    return random.choices(base, k=n)
+
+def medir(func, valores) -> float:
+    inicio = time.perf_counter()
+    func(valores)
+    return time.perf_counter() - inicio
+
+if __name__ == '__main__':
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 500_000
+    valores = generar_valores(n)
+    serie = pl.Series('v', valores, dtype=pl.Utf8).to_frame()
+    serie.head(1).select(quitar_tildes_expr(pl.col('v')))  # arma la tabla completa una vez
+
+    t_original = medir(lambda vs: [quitar_tildes_original(v) for v in vs], valores)
+    t_tabla = medir(lambda vs: [quitar_tildes(v) for v in vs], valores)
+    t_polars = medir(lambda df: df.select(quitar_tildes_expr(pl.col('v'))), serie)
+
+    print(f'{n:,} valores')
+    print(f'  NFKD + marcadores: {t_original:6.3f}s ({n / t_original:,.0f} valores/s)')
+    print(f'  str.translate:     {t_tabla:6.3f}s ({n / t_tabla:,.0f} valores/s)')
+    print(f'  polars:            {t_polars:6.3f}s ({n / t_polars:,.0f} valores/s)')
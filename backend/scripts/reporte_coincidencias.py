@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Reporte de valores de localidad y establecimiento notificador que no están
+en las tablas de mapeo, con la coincidencia difusa sugerida para cada uno.
+
+Lee de la base los valores distintos con su cantidad de casos, los normaliza
+y ordena los que quedan fuera de los mapeos por cantidad de casos. Sirve para
+revisar a mano las sugerencias y pasarlas a app/data/mapeos/localidades.json /
+establecimientos.json (luego POST /laboratorio-dengue/mapeos/recargar).
+Es el camino por defecto: el servicio solo aplica las coincidencias por su
+cuenta con CANONIZACION_DIFUSA=true.
+
+Uso: python scripts/reporte_coincidencias.py [--umbral 0.85] [--csv salida.csv]
+"""
+
+import argparse
+import asyncio
+import csv
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.config import settings
+from app.data.connection import engine
+from app.data.repositories.laboratorio_dengue_repository import get_laboratorio_dengue_agregados
+from app.data.processors.coincidencia_difusa import INDICES_DIFUSOS
+from app.data.processors.dengue_processor import COLUMNAS_NORMALIZADAS
+
+def sugerencias(histograma, normalizador, indice, umbral: float) -> list:
+    '''Filas (valor normalizado, casos, sugerencia, nombre coincidente, similitud, aceptada).'''
+    casos_por_valor = {}
+    for valor, casos in histograma.iter_rows():
+        normalizado = normalizador(valor)
+        casos_por_valor[normalizado] = casos_por_valor.get(normalizado, 0) + casos
+
+    indice.verificar()
+    filas = []
+    for valor, casos in casos_por_valor.items():
+        if valor is None or indice.conocido(valor):
+            continue
+        coincidencia = indice.sugerir(valor)
+        if coincidencia is None:
+            filas.append((valor, casos, '', '', 0.0, False))
+        else:
+            filas.append((
+                valor, casos, coincidencia.canonico, coincidencia.nombre,
+                round(coincidencia.similitud, 3), coincidencia.similitud >= umbral
+            ))
+    return sorted(filas, key=lambda fila: -fila[1])
+
+async def main(umbral: float, ruta_csv: str = None):
+    columnas = list(INDICES_DIFUSOS)
+    agregados = await get_laboratorio_dengue_agregados(columnas)
+    await engine.dispose()
+
+    reporte = []
+    for columna in columnas:
+        normalizador = COLUMNAS_NORMALIZADAS[columna][2]
+        filas = sugerencias(agregados['histogramas'][columna], normalizador, INDICES_DIFUSOS[columna], umbral)
+        reporte.extend((columna, *fila) for fila in filas)
+
+        print(f'\n{columna}: {len(filas)} valores fuera del mapeo (umbral {umbral})')
+        for valor, casos, canonico, nombre, similitud, aceptada in filas:
+            marca = '*' if aceptada else ' '
+            print(f' {marca} {casos:>7}  {valor:<45} -> {canonico or "-":<40} ({similitud:.2f} vs {nombre or "-"})')
+
+    if ruta_csv:
+        with open(ruta_csv, 'w', newline='', encoding='utf-8') as archivo:
+            escritor = csv.writer(archivo)
+            escritor.writerow(['columna', 'valor', 'casos', 'sugerencia', 'coincide_con', 'similitud', 'aceptada'])
+            escritor.writerows(reporte)
+        print(f'\nReporte guardado en {ruta_csv}')
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--umbral', type=float, default=settings.UMBRAL_SIMILITUD)
+    parser.add_argument('--csv', dest='ruta_csv')
+    args = parser.parse_args()
+    asyncio.run(main(args.umbral, args.ruta_csv))
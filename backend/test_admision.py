@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Pruebas del ejecutor de procesamiento: trabajo fuera del event loop, cola
+acotada con rechazo (503), también para /procesados con el dataset ya
+construido, y métricas del trabajo dentro de la ejecución.
+"""
+
+import asyncio
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+# Agregar el directorio del proyecto al path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.core.metricas import metricas
+from app.services.admision import EjecutorProcesamiento, Saturado
+
+def trabajo_lento(segundos: float) -> str:
+    time.sleep(segundos)
+    return threading.current_thread().name
+
+def test_no_bloquea_el_loop():
+    ejecutor = EjecutorProcesamiento(cola=2, espera_maxima=5)
+
+    async def escenario():
+        latidos = 0
+
+        async def latir():
+            nonlocal latidos
+            while True:
+                await asyncio.sleep(0.01)
+                latidos += 1
+
+        tarea = asyncio.create_task(latir())
+        hilo = await ejecutor.ejecutar(trabajo_lento, 0.3)
+        tarea.cancel()
+        return hilo, latidos
+
+    try:
+        hilo, latidos = asyncio.run(escenario())
+    finally:
+        ejecutor.cerrar()
+    assert hilo.startswith('procesamiento')
+    assert latidos >= 10
+
+def test_cola_llena_y_espera_maxima():
+    ejecutor = EjecutorProcesamiento(cola=1, espera_maxima=5)
+
+    async def escenario():
+        primero = asyncio.create_task(ejecutor.ejecutar(trabajo_lento, 0.3))
+        await asyncio.sleep(0.05)
+        segundo = asyncio.create_task(ejecutor.ejecutar(trabajo_lento, 0))
+        await asyncio.sleep(0.05)
+        try:
+            ejecutor.verificar_admision()
+            assert False, 'La cola estaba llena'
+        except Saturado:
+            pass
+        try:
+            await ejecutor.ejecutar(trabajo_lento, 0)
+            assert False, 'La cola estaba llena'
+        except Saturado as e:
+            assert e.reintentar_en >= 1
+        # Los lotes de un trabajo admitido esperan aunque la cola esté llena
+        tercero = asyncio.create_task(ejecutor.ejecutar(trabajo_lento, 0, rechazable=False))
+        await asyncio.gather(primero, segundo, tercero)
+
+        ejecutor.espera_maxima = 0.05
+        lento = asyncio.create_task(ejecutor.ejecutar(trabajo_lento, 0.3))
+        await asyncio.sleep(0.01)
+        try:
+            await ejecutor.ejecutar(trabajo_lento, 0)
+            assert False, 'Debió vencer la espera'
+        except Saturado:
+            pass
+        await lento
+
+    try:
+        asyncio.run(escenario())
+    finally:
+        ejecutor.cerrar()
+    estado = ejecutor.estado()
+    assert estado['rechazados'] == 3
+    assert estado['completados'] == 4
+    assert estado['en_curso'] == estado['en_espera'] == 0
+
+def test_cancelado_conserva_el_turno():
+    ejecutor = EjecutorProcesamiento(cola=1, espera_maxima=5)
+
+    async def escenario():
+        primero = asyncio.create_task(ejecutor.ejecutar(trabajo_lento, 0.3))
+        await asyncio.sleep(0.05)
+        # El cliente se fue pero el hilo sigue: el turno no se libera todavía
+        primero.cancel()
+        await asyncio.sleep(0.05)
+        assert ejecutor.en_curso == 1
+        segundo = asyncio.create_task(ejecutor.ejecutar(trabajo_lento, 0))
+        await asyncio.sleep(0.05)
+        assert ejecutor.en_espera == 1
+        with pytest.raises(Saturado):
+            await ejecutor.ejecutar(trabajo_lento, 0)
+        await segundo
+
+    try:
+        asyncio.run(escenario())
+    finally:
+        ejecutor.cerrar()
+    estado = ejecutor.estado()
+    assert estado['completados'] == 2
+    assert estado['en_curso'] == estado['en_espera'] == 0
+
+def test_procesados_pasan_por_admision(base, nuevo_servicio):
+    service = nuevo_servicio()
+    service.ejecutor = EjecutorProcesamiento(cola=0, espera_maxima=5)
+
+    async def escenario():
+        assert len(await service.obtener_datos_procesados()) == 1000
+        # Con el dataset en cache solo queda serializar, y eso también se rechaza con la cola llena
+        lento = asyncio.create_task(service.ejecutor.ejecutar(trabajo_lento, 0.3))
+        await asyncio.sleep(0.05)
+        with pytest.raises(Saturado):
+            await service.obtener_datos_procesados()
+        await lento
+
+    asyncio.run(escenario())
+    assert base.lecturas == [None]
+
+def test_metricas_del_trabajo():
+    ejecutor = EjecutorProcesamiento()
+
+    def medido():
+        with metricas.etapa('prueba_admision', filas=5):
+            pass
+
+    async def escenario():
+        with metricas.ejecucion('prueba') as ejecucion:
+            await ejecutor.ejecutar(medido)
+        return ejecucion
+
+    try:
+        asyncio.run(escenario())
+    finally:
+        ejecutor.cerrar()
+    assert 'prueba_admision' in metricas.instantanea()['ultima_ejecucion']['etapas']
+
+if __name__ == '__main__':
+    sys.exit(pytest.main(['-q', __file__]))
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Pruebas del cache versionado: TTL, stale-while-revalidate, construcción
+única para pedidos simultáneos y su uso desde el servicio.
+"""
+
+import asyncio
+import os
+import sys
+
+import pytest
+
+# Agregar el directorio del proyecto al path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.services.cache import CacheVersionado
+from app.services.laboratorio_dengue_service import CLAVE_DATASET
+
+class Contador:
+    '''Constructor que tarda un poco y devuelve cuántas veces se llamó.'''
+    def __init__(self, demora: float = 0.05):
+        self.llamadas = 0
+        self.demora = demora
+
+    async def __call__(self):
+        self.llamadas += 1
+        await asyncio.sleep(self.demora)
+        return self.llamadas, f'v{self.llamadas}'
+
+def test_construccion_unica():
+    cache = CacheVersionado(ttl=60, stale=0)
+    construir = Contador()
+
+    async def escenario():
+        return await asyncio.gather(*[cache.obtener('x', construir) for _ in range(5)])
+
+    assert asyncio.run(escenario()) == [1] * 5
+    assert construir.llamadas == 1
+    assert cache.entrada('x').version == 'v1'
+
+def test_ttl_y_stale():
+    cache = CacheVersionado(ttl=0.05, stale=0.2)
+    construir = Contador(demora=0.02)
+
+    async def escenario():
+        assert await cache.obtener('x', construir) == 1
+        assert await cache.obtener('x', construir) == 1
+        await asyncio.sleep(0.06)
+        # Vencido pero dentro del margen: entrega el valor viejo y reconstruye aparte
+        assert await cache.obtener('x', construir) == 1
+        await asyncio.sleep(0.05)
+        assert await cache.obtener('x', construir) == 2
+        await asyncio.sleep(0.3)
+        # Fuera del margen: espera la reconstrucción
+        assert await cache.obtener('x', construir) == 3
+        assert await cache.obtener('x', construir, forzar=True) == 4
+
+    asyncio.run(escenario())
+    estado = cache.estado()
+    assert estado['aciertos_vencidos'] == 1
+    assert estado['construcciones'] == 4
+
+def test_error_no_se_guarda():
+    cache = CacheVersionado(ttl=60, stale=0)
+    intentos = []
+
+    async def fallar():
+        intentos.append(1)
+        raise RuntimeError('base caída')
+
+    async def escenario():
+        for _ in range(2):
+            try:
+                await cache.obtener('x', fallar)
+                assert False, 'Debió propagar el error'
+            except RuntimeError:
+                pass
+
+    asyncio.run(escenario())
+    assert len(intentos) == 2
+    assert cache.entrada('x') is None
+
+def test_cancelar_no_corta_la_construccion():
+    cache = CacheVersionado(ttl=60, stale=0)
+    construir = Contador(demora=0.1)
+
+    async def escenario():
+        pedido = asyncio.create_task(cache.obtener('x', construir))
+        await asyncio.sleep(0.01)
+        pedido.cancel()
+        assert await cache.obtener('x', construir) == 1
+
+    asyncio.run(escenario())
+    assert construir.llamadas == 1
+
+def test_entrada_cuenta_como_uso():
+    cache = CacheVersionado(ttl=60, stale=0, max_entradas=2)
+    cache.guardar('a', 1)
+    cache.guardar('b', 2)
+    assert cache.entrada('a').valor == 1
+    cache.guardar('c', 3)
+    assert cache.entrada('a') is not None
+    assert cache.entrada('b') is None
+
+def test_kpis_no_desalojan_el_dataset(nuevo_servicio):
+    service = nuevo_servicio()
+    service.cache.guardar(CLAVE_DATASET, 'dataset', 'v1')
+
+    async def kpis(desde):
+        return {'desde': desde}, 'v1'
+
+    async def escenario():
+        for dia in range(1, 29):
+            for mes in range(1, 3):
+                await service.cache_kpis.obtener(('kpis', f'2024-{mes:02}-{dia:02}', None), lambda: kpis(dia), 'v1')
+
+    asyncio.run(escenario())
+    assert service.cache.entrada(CLAVE_DATASET).valor == 'dataset'
+    assert len(service.cache_kpis.estado()['entradas']) == service.cache_kpis.max_entradas
+
+def test_servicio_sesiones_simultaneas(base, nuevo_servicio):
+    base.demora = 0.01
+    base.lote = 500
+    service = nuevo_servicio()
+
+    async def escenario():
+        return await asyncio.gather(*[service.obtener_datos_procesados() for _ in range(5)])
+
+    resultados = asyncio.run(escenario())
+    assert [len(r) for r in resultados] == [1000] * 5
+    assert base.lecturas == [None]
+    assert service.cache.entrada(CLAVE_DATASET).version == service.version_dataset()
+
+if __name__ == '__main__':
+    sys.exit(pytest.main(['-q', __file__]))
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Pruebas de la clave canónica: las variantes de codificación y de escritura
+de un mismo nombre caen en la misma clave y el índice compacto resuelve las
+variantes que antes se listaban una por una.
+"""
+
+import sys
+import os
+
+# Agregar el directorio del proyecto al path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.data.processors.text_utils import (
+    clave_canonica,
+    compactar_mapeo,
+    indice_canonico,
+    limpiar_basico
+)
+from app.data.processors.establecimiento_processor import normalizar_establecimiento_notificador
+from app.data.processors.localidad_processor import normalizar_localidad
+
+def test_variantes_misma_clave():
+    variantes = [
+        'DORREGO- UPA N?6', 'DORREGO- UPA N§6', 'DORREGO- UPA NØ6', 'DORREGO- UPA NRO6',
+        'DORREGO- UPA No6', 'DORREGO- UPA N°6', 'DORREGO- UPA N 6', 'DORREGO-UPAN?6',
+        'dorrego - upa nº 6', 'DORREGO UPA 6', 'DORREGO UPA6',
+    ]
+    assert {clave_canonica(v) for v in variantes} == {'DORREGO UPA N6'}
+    assert clave_canonica('A¤ATUYA HOSPITAL ZONAL') == clave_canonica('AÑATUYA - HOSPITAL ZONAL')
+    assert clave_canonica('NU?EZ') == clave_canonica('Núñez')
+    # Los números de UPA distintos no se mezclan
+    assert clave_canonica('UPA N?1') != clave_canonica('UPA N?11')
+
+def test_clave_estable_ante_limpieza():
+    for valor in ['EL CRUCE- UPA N?1', 'A?ATUYA', 'CA?ADA', 'B? BORGES', 'CAP?TAL', 'UPA N? 2']:
+        assert clave_canonica(limpiar_basico(valor)) == clave_canonica(valor)
+        assert clave_canonica(clave_canonica(valor)) == clave_canonica(valor)
+
+def test_variantes_fuera_de_la_tabla():
+    casos = [
+        ('EL CRUCE- UPA N§1', 'EL CRUCE - UPA N1'),
+        ('EL CRUCE- UPA N?1', 'EL CRUCE - UPA N1'),
+        ('CTRAL.ARGENTINO-UPA NRO2', 'CENTRAL ARGENTINO - UPA N2'),
+        ('PARQUE INDRUSTRIAL- UPA NØ 5- BANDA', 'AMPLIACION PARQUE INDUSTRIAL - UPA N5'),
+        ('Dorrego - UPA Nº6', 'DORREGO - UPA N6'),
+        ('DAHER LABORATORIO', 'DAHER - LABORATORIO'),
+        ('LA CA¤ADA-HOSPITAL DE TRANSITO', 'LA CAÑADA - HOSPITAL DE TRANSITO'),
+        ('N/A', 'DESCONOCIDO'),
+        ('ESTABLECIMIENTO NUEVO', 'ESTABLECIMIENTO NUEVO'),
+    ]
+    for entrada, esperado in casos:
+        assert normalizar_establecimiento_notificador(entrada) == esperado, entrada
+    assert normalizar_localidad('Capítal') == 'SANTIAGO DEL ESTERO'
+
+def test_indice_compacto():
+    mapeo = {'UPA N?1': 'UPA 1', 'UPA N§1': 'UPA 1', 'UPA NRO1': 'UPA 1', 'OTRO': 'OTRO - X', 'OTRO X': 'OTRO - X'}
+    compacto = compactar_mapeo(mapeo)
+    assert compacto == {'UPA N?1': 'UPA 1', 'OTRO': 'OTRO - X'}
+    assert indice_canonico(compacto) == indice_canonico(mapeo)
+
+    try:
+        indice_canonico({'UPA N?1': 'A', 'UPA NRO1': 'B'})
+        assert False, 'Debió detectar el conflicto'
+    except ValueError:
+        pass
+
+if __name__ == '__main__':
+    test_variantes_misma_clave()
+    test_clave_estable_ante_limpieza()
+    test_variantes_fuera_de_la_tabla()
+    test_indice_compacto()
+    print('OK')
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+Pruebas de la canonización difusa de localidades y establecimientos.
+"""
+
+import sys
+import os
+
+# Agregar el directorio del proyecto al path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.data.processors.coincidencia_difusa import (
+    IndiceDifuso,
+    indice_establecimientos,
+    indice_localidades
+)
+from app.data.processors.localidad_processor import normalizar_localidad
+from app.data.processors.mapeos import firma_mapeos
+
+def test_typos_de_localidades():
+    casos = {
+        'NUEVA ESPERANSA': 'NUEVA ESPERANZA',
+        'SANTIAGO DEL ESTRO': 'SANTIAGO DEL ESTERO',
+        'AÑATUIA': 'AÑATUYA',
+        'LA BANDA': 'LA BANDA',
+    }
+    for valor, esperado in casos.items():
+        assert indice_localidades.canonizar(normalizar_localidad(valor)) == esperado, valor
+
+def test_umbral_y_valores_distintos():
+    # Localidades reales que se parecen a una canónica pero no son la misma
+    for valor in ['BANDERA', 'LA PAMPA', 'PINTO', 'LORETO']:
+        assert indice_localidades.canonizar(valor) == valor
+    assert indice_localidades.canonizar(None) is None
+    assert indice_localidades.canonizar('CAPX') == 'CAPX'  # muy corto para comparar
+
+def test_numeros_de_establecimiento():
+    assert indice_establecimientos.canonizar('EL CRUCE- UPA Ñ1') == 'EL CRUCE - UPA N1'
+    # Misma denominación con otro número: no se une
+    assert indice_establecimientos.canonizar('EL CRUCE - UPA N9') == 'EL CRUCE - UPA N9'
+
+def test_reconstruccion_al_cambiar_mapeo():
+    mapeo = {'VILLA UNION': 'VILLA UNION'}
+    indice = IndiceDifuso('prueba', lambda: dict(mapeo), lambda: firma_mapeos([mapeo]), umbral=0.85)
+    assert indice.canonizar_valores(['VILLA UNNION', 'OTRA COSA']) == ['VILLA UNION', 'OTRA COSA']
+
+    mapeo['OTRA COSA'] = 'COSA'
+    assert indice.canonizar_valores(['OTRA COZA']) == ['COSA']
+
+if __name__ == '__main__':
+    test_typos_de_localidades()
+    test_umbral_y_valores_distintos()
+    test_numeros_de_establecimiento()
+    test_reconstruccion_al_cambiar_mapeo()
+    print('OK')
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Pruebas del procesamiento por lotes: destinos Parquet y agregado (con
+derrame a disco) y el recorrido del servicio sobre un cursor simulado.
+"""
+
+import asyncio
+import json
+import os
+import shutil
+import sys
+import tempfile
+
+import polars as pl
+import pytest
+
+# Agregar el directorio del proyecto al path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.core.config import settings
+from app.data.repositories.laboratorio_dengue_repository import filas_a_dataframe
+from app.services.destinos import DestinoAgregado, DestinoParquet
+from app.services.laboratorio_dengue_service import LaboratorioDengueService, filas_por_lote
+
+def lotes_procesados(filas: list, tamanio: int) -> list:
+    service = LaboratorioDengueService(max_workers=1)
+    try:
+        return [
+            service.processor.procesar_datos_paralelo(filas_a_dataframe(filas[inicio:inicio + tamanio]))
+            for inicio in range(0, len(filas), tamanio)
+        ]
+    finally:
+        service.cerrar()
+
+def test_filas_por_lote():
+    assert filas_por_lote(100, 512 * 1024 * 1024, 50000) == 50000
+    assert filas_por_lote(1000, 40 * 1000 * 1000, 50000) == 10000
+    assert filas_por_lote(10 ** 9, 1024, 50000) == 1000
+
+def test_destino_parquet(generar_filas):
+    lotes = lotes_procesados(generar_filas(1200), 500)
+    # Un lote donde una columna vino toda nula con otro tipo
+    lotes[-1] = lotes[-1].with_columns(pl.lit(None).alias('serotipo_virus_dengue'))
+    directorio = tempfile.mkdtemp()
+    try:
+        ruta = os.path.join(directorio, 'salida.parquet')
+        destino = DestinoParquet(ruta)
+        for lote in lotes:
+            destino.agregar(lote)
+        assert not os.path.exists(ruta)
+        resultado = destino.cerrar()
+        assert resultado['filas'] == 1200
+        leido = pl.read_parquet(ruta)
+        esperado = pl.concat(lotes, how='vertical_relaxed').cast(leido.schema)
+        assert leido.equals(esperado)
+    finally:
+        shutil.rmtree(directorio)
+
+def test_destino_agregado_con_derrame(generar_filas):
+    lotes = lotes_procesados(generar_filas(1200), 300)
+    completo = pl.concat(lotes, how='vertical_relaxed')
+    directorio = tempfile.mkdtemp()
+    try:
+        en_memoria = DestinoAgregado()
+        derramado = DestinoAgregado(presupuesto_bytes=1, ruta_derrame=directorio)
+        for lote in lotes:
+            en_memoria.agregar(lote)
+            derramado.agregar(lote)
+        assert os.listdir(directorio)
+        resultado = derramado.cerrar()
+        assert resultado == en_memoria.cerrar()
+        assert not os.listdir(directorio)
+    finally:
+        shutil.rmtree(directorio)
+
+    assert resultado['total_casos'] == 1200
+    esperado = (
+        completo.group_by('localidad_normalizada').len('casos')
+        .sort('casos', 'localidad_normalizada', descending=[True, False], nulls_last=True)
+    )
+    assert [(f['localidad_normalizada'], f['casos']) for f in resultado['localidad']] == esperado.rows()
+    assert sum(f['casos'] for f in resultado['semana_epidemiologica']) == 1200
+    demoras = dict(completo.group_by('localidad_normalizada').agg(pl.col('demora_dias').mean().round(2)).rows())
+    assert {f['localidad_normalizada']: f['demora_promedio_dias'] for f in resultado['localidad']} == demoras
+
+def test_servicio_por_lotes(base, nuevo_servicio, generar_filas, monkeypatch, tmp_path):
+    base.filas = generar_filas(2500)
+    base.lote = 700
+    monkeypatch.setattr(settings, 'LOTE_STREAMING', 1000)
+    service = nuevo_servicio()
+    completo = service.processor.procesar_datos_paralelo(filas_a_dataframe(base.filas))
+
+    ruta = str(tmp_path / 'salida.parquet')
+    resultado = asyncio.run(service.procesar_en_lotes(DestinoParquet(ruta)))
+    assert resultado['filas'] == 2500
+    assert pl.read_parquet(ruta).sort('id').equals(completo.sort('id'))
+
+    async def leer_ndjson():
+        return [bloque async for bloque in service.stream_procesados_ndjson(localidad='LA BANDA')]
+    bloques = asyncio.run(leer_ndjson())
+    registros = [json.loads(linea) for bloque in bloques for linea in bloque.decode().splitlines()]
+    assert len(bloques) > 2
+    assert len(registros) == completo.filter(pl.col('localidad_normalizada') == 'LA BANDA').height
+    assert {r['localidad_normalizada'] for r in registros} == {'LA BANDA'}
+
+if __name__ == '__main__':
+    sys.exit(pytest.main(['-q', __file__]))
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Pruebas del parseo de fechas con detección del formato dominante por columna.
+"""
+
+import sys
+import os
+
+import polars as pl
+
+# Agregar el directorio del proyecto al path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.data.processors import fecha_processor
+from app.data.processors.fecha_processor import (
+    FORMATOS_FECHA,
+    detectar_formatos,
+    olvidar_formatos,
+    parsear_fecha,
+    parsear_fechas
+)
+
+def parsear_coalesce(serie: pl.Series) -> pl.Series:
+    '''Versión anterior: todos los formatos sobre toda la serie.'''
+    return pl.select(pl.coalesce([
+        pl.lit(serie).str.strptime(pl.Date, format=formato, strict=False)
+        for formato in FORMATOS_FECHA
+    ])).to_series().rename(serie.name)
+
+MIXTAS = pl.Series('fecha', [
+    '05/01/2023', '2023-01-06', None, '07/01/2023', '2023/01/08', '', 'sin fecha',
+    '31/12/2022', '2023-02-30', '01/02/2023', '03/03/2023',
+])
+
+def test_detecta_formato_dominante():
+    assert detectar_formatos(MIXTAS)[0] == '%d/%m/%Y'
+    assert detectar_formatos(pl.Series([None], dtype=pl.Utf8)) == FORMATOS_FECHA
+
+def test_equivale_a_coalesce():
+    olvidar_formatos()
+    assert parsear_fechas(MIXTAS).equals(parsear_coalesce(MIXTAS))
+    assert parsear_fechas(MIXTAS, 'fecha_prueba').equals(parsear_coalesce(MIXTAS))
+
+def test_formato_cacheado_y_redeteccion():
+    olvidar_formatos()
+    parsear_fechas(MIXTAS, 'fecha_prueba')
+    assert fecha_processor._formatos_por_columna['fecha_prueba'][0] == '%d/%m/%Y'
+
+    # Un lote con otro formato dominante fuerza una nueva detección
+    iso = pl.Series('fecha', ['2024-01-01', '2024-01-02', '2024-01-03', '05/01/2024'])
+    assert parsear_fechas(iso, 'fecha_prueba').equals(parsear_coalesce(iso))
+    assert fecha_processor._formatos_por_columna['fecha_prueba'][0] == '%Y-%m-%d'
+    olvidar_formatos()
+
+def test_expresion():
+    olvidar_formatos()
+    df = MIXTAS.to_frame().lazy().select(parsear_fecha(pl.col('fecha'), 'fecha')).collect()
+    assert df['fecha'].equals(parsear_coalesce(MIXTAS))
+    olvidar_formatos()
+
+if __name__ == '__main__':
+    test_detecta_formato_dominante()
+    test_equivale_a_coalesce()
+    test_formato_cacheado_y_redeteccion()
+    test_expresion()
+    print('OK')
@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+Pruebas de los filtros: predicados raw en el WHERE de /raw y valores
+posibles de los filtros de /procesados para armar el dashboard.
+"""
+
+import asyncio
+import os
+import sys
+from datetime import date
+
+import pytest
+
+# Agregar el directorio del proyecto al path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.data.repositories.laboratorio_dengue_repository import _construir_where
+
+def test_where_con_filtros_raw():
+    where, parametros = _construir_where(
+        fecha_desde=date(2024, 1, 1), departamento='CAPITAL', localidad=None, resultado_pcr='DETECTABLE'
+    )
+    assert 'fecha_recepcion >= :fecha_desde' in where
+    assert 'departamento = :departamento' in where
+    assert 'rt_pcr_tiempo_real_dengue = :resultado_pcr' in where
+    assert 'localidad' not in where
+    assert parametros == {'fecha_desde': date(2024, 1, 1), 'departamento': 'CAPITAL', 'resultado_pcr': 'DETECTABLE'}
+
+def test_opciones_y_seleccion(base, nuevo_servicio):
+    service = nuevo_servicio()
+
+    async def escenario():
+        opciones, version = await service.obtener_opciones_filtro()
+        assert version == await service.version_actual()
+        assert opciones['total_casos'] == 1000
+        assert opciones['fecha_recepcion_min'] <= opciones['fecha_recepcion_max']
+        assert opciones['localidad'] == sorted(opciones['localidad'])
+
+        # Cada valor ofrecido selecciona un subconjunto no vacío
+        total = 0
+        for localidad in opciones['localidad']:
+            seleccion = await service.obtener_datos_procesados(localidad=localidad)
+            assert seleccion and {fila['localidad_normalizada'] for fila in seleccion} == {localidad}
+            total += len(seleccion)
+        assert total <= 1000
+
+    asyncio.run(escenario())
+
+if __name__ == '__main__':
+    sys.exit(pytest.main(['-q', __file__]))
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Pruebas de la huella de laboratorio_dengue como versión de los caches: sin
+cambios no se relee nada, altas sincronizan incremental, bajas completo, y
+la API responde 304 a quien ya tiene la versión vigente.
+"""
+
+import asyncio
+import os
+import sys
+from datetime import datetime
+
+import pytest
+from starlette.requests import Request
+
+# Agregar el directorio del proyecto al path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.api.laboratorio_dengue import cabeceras_version, no_modificado
+from app.data.repositories.laboratorio_dengue_repository import HuellaDataset
+from app.services.cache import CacheVersionado
+
+def test_version_de_la_huella():
+    huella = HuellaDataset(10, 10, datetime(2024, 1, 1))
+    assert huella.version == HuellaDataset(10, 10, datetime(2024, 1, 1)).version
+    assert huella.version != HuellaDataset(11, 11, datetime(2024, 1, 1)).version
+    assert huella.version != HuellaDataset(10, 10, datetime(2024, 1, 2)).version
+    assert huella.describir()['filas'] == 10
+
+def test_cache_por_version():
+    cache = CacheVersionado(ttl=0, stale=0)
+    construcciones = []
+
+    async def construir():
+        construcciones.append(1)
+        return len(construcciones), 'v1'
+
+    async def escenario():
+        assert await cache.obtener('x', construir, version='v1') == 1
+        # Misma versión: vale aunque el TTL sea 0
+        assert await cache.obtener('x', construir, version='v1') == 1
+        assert await cache.obtener('x', construir, version='v2') == 2
+
+    asyncio.run(escenario())
+    assert len(construcciones) == 2
+
+def test_sincronizacion_segun_huella(base, nuevo_servicio, generar_filas):
+    service = nuevo_servicio()
+
+    async def escenario():
+        assert len(await service.obtener_datos_procesados()) == 1000
+        _, version = await service.obtener_datos_versionados()
+        assert base.lecturas == [None]
+        assert version == await service.version_actual()
+
+        base.filas.extend(generar_filas(1050)[1000:])
+        assert len(await service.obtener_datos_procesados()) == 1050
+        assert base.lecturas == [None, 1000]
+
+        del base.filas[:100]
+        assert len(await service.obtener_datos_procesados()) == 950
+        assert base.lecturas == [None, 1000, None]
+
+    asyncio.run(escenario())
+
+def test_revalidacion_http():
+    def pedido(if_none_match=None):
+        cabeceras = [(b'if-none-match', if_none_match.encode())] if if_none_match else []
+        return Request({'type': 'http', 'method': 'GET', 'path': '/', 'headers': cabeceras})
+
+    cabeceras = cabeceras_version('abc.def')
+    assert cabeceras['ETag'] == '"abc.def"'
+    assert no_modificado(pedido('"abc.def"'), 'abc.def')
+    assert no_modificado(pedido('W/"otra", "abc.def"'), 'abc.def')
+    assert not no_modificado(pedido('"otra"'), 'abc.def')
+    assert not no_modificado(pedido(), 'abc.def')
+    assert cabeceras_version(None) == {}
+
+if __name__ == '__main__':
+    sys.exit(pytest.main(['-q', __file__]))
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Pruebas de la instantánea del dataset procesado: ida y vuelta por Parquet,
+arranque en caliente que solo sincroniza el delta, descarte si cambiaron
+las tablas de normalización y refresco listo apenas se restaura.
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+from datetime import datetime
+
+import polars as pl
+import pytest
+
+# Agregar el directorio del proyecto al path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import app.services.laboratorio_dengue_service as servicio
+from app.data.repositories.laboratorio_dengue_repository import HuellaDataset, filas_a_dataframe
+from app.services.instantanea import Instantanea, escribir_instantanea, leer_instantanea
+from app.services.refresco import RefrescoDataset
+
+def test_ida_y_vuelta(generar_filas):
+    df = filas_a_dataframe(generar_filas(50))
+    huella = HuellaDataset(50, 50, datetime(2024, 3, 1, 10, 30))
+    with tempfile.TemporaryDirectory() as directorio:
+        ruta = os.path.join(directorio, 'sub', 'dataset.parquet')
+        resultado = escribir_instantanea(ruta, Instantanea(df, huella, 'abc', 50, datetime(2024, 3, 1, 10, 30)))
+        assert resultado['filas'] == 50 and resultado['bytes'] > 0
+        assert not os.path.exists(f'{ruta}.tmp')
+
+        leida = leer_instantanea(ruta)
+        assert leida.df.equals(df)
+        assert leida.huella == huella and leida.huella.version == huella.version
+        assert leida.version_mapeos == 'abc'
+        assert (leida.ultimo_id, leida.ultimo_created_at) == (50, datetime(2024, 3, 1, 10, 30))
+
+        assert leer_instantanea(os.path.join(directorio, 'no_existe.parquet')) is None
+        otro = os.path.join(directorio, 'otro.parquet')
+        df.write_parquet(otro)
+        assert leer_instantanea(otro) is None
+
+def test_arranque_en_caliente(base, nuevo_servicio, generar_filas, ruta_instantanea):
+    async def escenario():
+        anterior = nuevo_servicio()
+        df, version = await anterior.obtener_dataframe_versionado()
+        assert (await anterior.guardar_instantanea(ruta_instantanea))['filas'] == 1000
+        # Sin cambios no se vuelve a escribir
+        assert await anterior.guardar_instantanea(ruta_instantanea) is None
+
+        # Reinicio sin cambios en la tabla: no se lee ni se procesa nada
+        base.lecturas.clear()
+        service = nuevo_servicio()
+        assert await service.cargar_instantanea(ruta_instantanea)
+        df_restaurado, version_restaurada = await service.obtener_dataframe_versionado()
+        assert base.lecturas == []
+        assert version_restaurada == version
+        assert df_restaurado.sort('id').equals(df.sort('id'))
+
+        # Reinicio con altas: solo se leen las filas posteriores a la instantánea
+        base.filas.extend(generar_filas(1100)[1000:])
+        service = nuevo_servicio()
+        assert await service.cargar_instantanea(ruta_instantanea)
+        assert len(await service.obtener_datos_procesados()) == 1100
+        assert base.lecturas == [1000]
+        assert service.version_dataset() == await service.version_actual()
+
+        # Un proceso que arranca en frío llega al mismo dataset
+        completo = await nuevo_servicio().dataset_procesado()
+        assert (await service.dataset_procesado()).sort('id').equals(completo.sort('id'))
+
+    asyncio.run(escenario())
+
+def test_otras_tablas_de_normalizacion(base, nuevo_servicio, ruta_instantanea):
+    async def escenario():
+        df = await nuevo_servicio().dataset_procesado()
+        escribir_instantanea(ruta_instantanea, Instantanea(df, await base.huella(), 'otra_version', 1000, None))
+
+        service = nuevo_servicio()
+        assert not await service.cargar_instantanea(ruta_instantanea)
+        assert service.version_dataset() is None
+        # Una instantánea rota tampoco impide arrancar
+        with open(ruta_instantanea, 'wb') as archivo:
+            archivo.write(b'no es parquet')
+        assert not await service.cargar_instantanea(ruta_instantanea)
+        assert len(await service.obtener_datos_procesados()) == 1000
+
+    asyncio.run(escenario())
+
+def test_instantanea_de_otra_tabla(base, nuevo_servicio, ruta_instantanea):
+    async def escenario():
+        # Instantánea con más filas que la tabla actual (de otra base o la tabla perdió filas)
+        df = await nuevo_servicio().dataset_procesado()
+        escribir_instantanea(ruta_instantanea, Instantanea(df, await base.huella(), servicio.tablas().version, 1000, None))
+        del base.filas[500:]
+
+        service = nuevo_servicio()
+        assert not await service.cargar_instantanea(ruta_instantanea)
+        assert service.version_dataset() is None
+        assert len(await service.obtener_datos_procesados()) == 500
+
+    asyncio.run(escenario())
+
+def test_refresco_con_instantanea(base, nuevo_servicio, generar_filas, esperar, ruta_instantanea):
+    async def escenario():
+        anterior = nuevo_servicio()
+        refresco = RefrescoDataset(anterior, intervalo=0.05)
+        refresco.iniciar()
+        assert await refresco.esperar_listo(10)
+        await esperar(lambda: refresco.ultima_instantanea is not None)
+        await refresco.detener()
+        assert refresco.estado()['ultima_instantanea']['filas'] == 1000
+
+        # El siguiente arranque está listo antes de consultar la base y el primer refresco aplica el delta
+        base.filas.extend(generar_filas(1050)[1000:])
+        service = nuevo_servicio()
+        assert await service.cargar_instantanea()
+        base.demora = 0.3
+        refresco = RefrescoDataset(service, intervalo=0.05)
+        refresco.iniciar()
+        assert refresco.listo.is_set()
+        assert len(await asyncio.wait_for(service.obtener_datos_procesados(), 0.2)) == 1000
+
+        await esperar(lambda: refresco.ultima_instantanea is not None)
+        assert len(await service.obtener_datos_procesados()) == 1050
+        await refresco.detener()
+        assert pl.read_parquet(ruta_instantanea).height == 1050
+
+    asyncio.run(escenario())
+
+if __name__ == '__main__':
+    sys.exit(pytest.main(['-q', __file__]))
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Pruebas de los KPIs por agregados de MySQL: los histogramas crudos se
+re-agregan por valor normalizado, dan lo mismo que los KPIs calculados
+sobre el dataset procesado en memoria y llevan la versión de la tabla que
+consultaron.
+"""
+
+import asyncio
+import os
+import sys
+
+import polars as pl
+import pytest
+
+# Agregar el directorio del proyecto al path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.data.processors.memo import localidad_memo
+from app.services.laboratorio_dengue_service import reagregar_histograma
+
+LOCALIDADES = ['LA BANDA', 'la banda', ' La  Banda ', 'CAP', 'Capital', 'añatuya', 'AÑATUYA', None]
+RESULTADOS = ['NO DETECTABLE', 'no detectable', 'Detectable', 'No Detectable ', None]
+
+def test_reagregar_suma_variantes():
+    histograma = pl.DataFrame({
+        'valor': ['LA BANDA', 'la banda', ' La  Banda ', 'CAP', 'Capital', None],
+        'casos': [10, 3, 2, 7, 1, 4],
+    }, schema={'valor': pl.Utf8, 'casos': pl.UInt32})
+    resultado = reagregar_histograma(histograma, localidad_memo, 'localidad_normalizada')
+    assert dict(resultado.rows()) == {'LA BANDA': 15, 'SANTIAGO DEL ESTERO': 8, 'DESCONOCIDO': 4}
+    assert resultado['casos'].to_list() == sorted(resultado['casos'].to_list(), reverse=True)
+
+def test_kpis_iguales_a_los_de_memoria(base, nuevo_servicio):
+    base.filas = [
+        fila[:4] + (LOCALIDADES[i % len(LOCALIDADES)],) + fila[5:15] + (RESULTADOS[i % len(RESULTADOS)],) + fila[16:]
+        for i, fila in enumerate(base.filas)
+    ]
+    service = nuevo_servicio()
+
+    async def escenario():
+        return await service._calcular_kpis(), await service.dataset_procesado()
+
+    kpis, df = asyncio.run(escenario())
+
+    # KPIs como se calculaban antes, sobre el dataset procesado completo
+    def conteos(columna: str) -> dict:
+        return dict(df.group_by(columna).agg(pl.len()).rows())
+
+    assert kpis['total_casos'] == df.height == 1000
+    localidades = {f['localidad_normalizada']: f['casos'] for f in kpis['top_localidades']}
+    assert localidades == conteos('localidad_normalizada')
+    assert localidades['LA BANDA'] == 3 * 1000 // len(LOCALIDADES)
+    pcr = {f['rt_pcr_tiempo_real_dengue_normalizado']: f['casos'] for f in kpis['distribucion_pcr']}
+    assert pcr == conteos('rt_pcr_tiempo_real_dengue_normalizado')
+    assert pcr['negativo'] == 3 * 1000 // len(RESULTADOS)
+
+def test_version_de_los_kpis(base, nuevo_servicio, generar_filas):
+    service = nuevo_servicio()
+
+    async def escenario():
+        _, version_dataset = await service.precalcular()
+        service.precalculado = True
+        kpis, version = await service.obtener_kpis_versionados()
+        assert kpis['total_casos'] == 1000 and version == version_dataset
+
+        # La tabla cambió y el refresco todavía no corrió: el dataset sigue en su
+        # versión, pero los KPIs consultan la tabla y llevan la versión de esta
+        base.filas.extend(generar_filas(1010)[1000:])
+        assert await service.version_vigente() == version_dataset
+        kpis, version = await service.obtener_kpis_versionados()
+        assert kpis['total_casos'] == 1010
+        assert version == await service.version_actual() != version_dataset
+
+    asyncio.run(escenario())
+
+if __name__ == '__main__':
+    sys.exit(pytest.main(['-q', __file__]))
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Prueba de equivalencia del clasificador compilado de resultados de laboratorio
+contra la implementación original de regex secuenciales.
+"""
+
+import random
+import re
+import sys
+import os
+from typing import Optional
+
+import polars as pl
+
+# Agregar el directorio del proyecto al path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.data.processors.laboratorio_processor import normalizar_laboratorio
+from app.data.processors.text_expr import normalizar_laboratorio_expr
+
+def normalizar_laboratorio_original(valor: Optional[str]) -> str:
+    """Implementación anterior (regex secuenciales), usada como referencia."""
+    if not valor or str(valor).strip() in ['', '-', '--', '?']:
+        return 'no realizado'
+
+    val = str(valor).strip()
+    val = re.sub(r'\s+', ' ', val)
+    val = val.lower()
+    val = re.sub(r'[^\w\s\-]', '', val)
+
+    if re.search(r'no detectable|no detectado|negativo|non detectable', val):
+        return 'negativo'
+
+    if re.search(r'detectable|positivo|positiva', val):
+        return 'positivo'
+
+    if 'en proceso' in val or 'en estudio' in val:
+        return 'en proceso'
+
+    if re.search(r'no\s+(realizado|relizado|realiado|realzado|realisado)', val) or \
+       re.search(r'no\s+(procesado|procesada|efectuado|efectuada)', val) or \
+       re.search(r'sin\s+(realizar|procesar)', val) or \
+       val in ['no realizado', 'no  realizado', 'no   realizado', 'no realiado', 'no relizado']:
+        return 'no realizado'
+
+    if 'indeterminado' in val:
+        return 'indeterminado'
+
+    match = re.search(r'den[\s\-_.]*([1-4])', val)
+    if match:
+        return f'DEN-{match.group(1)}'
+
+    if 'den' in val and 'y' in val:
+        return 'DEN-1 y DEN-2'
+
+    if val in ['den_', 'den-', 'den']:
+        return 'DEN-1'
+    if val in ['de-2', '25']:
+        return 'DEN-2'
+
+    if 'no' in val and ('real' in val or 'reliz' in val or 'proces' in val):
+        return 'no realizado'
+
+    return val
+
+# Valores reales vistos en las columnas de laboratorio
+CASOS_LABORATORIO = [
+    None, '', ' ', '-', '--', '?', 'NO DETECTABLE', 'No detectable', 'no detectado',
+    'NEGATIVO', 'Negativo.', 'non detectable', 'DETECTABLE', 'Detectable', 'POSITIVO',
+    'positiva', 'EN PROCESO', 'en estudio', 'NO REALIZADO', 'No  realizado', 'no relizado',
+    'no realiado', 'NO REALZADO', 'no realisado', 'NO PROCESADO', 'no procesada',
+    'no efectuado', 'sin realizar', 'SIN PROCESAR', 'INDETERMINADO', 'DEN-1', 'DEN 2',
+    'den_3', 'DEN.4', 'Den1', 'DENV-2', 'DEN-1 y DEN-2', 'den y', 'DEN', 'den_', 'den-',
+    'DE-2', '25', 'no se pudo realizar', 'no proces', 'NS1 detectable den 2',
+    'negativo den-1', 'detectable, no realizado', 'indeterminado den-3', 'den 5',
+    '¿¿??', 'Pendiente', 'no, realizado', 'x  no  real', 'dengue 2', 'DEN - 3 detectado',
+]
+
+def textos_aleatorios(n=5000, semilla=0):
+    fragmentos = [
+        'no', 'den', 'de', 'y', ' ', '-', '_', '.', ',', '?', '1', '2', '4', '5', 'real',
+        'izado', 'proces', 'detect', 'able', 'ado', 'non ', 'negativ', 'o', 'a', 'posit',
+        'en ', 'estudio', 'sin ', 'indeterminado', 'Ñ', '\t', 'é', '́', '‿',
+    ]
+    rnd = random.Random(semilla)
+    return [''.join(rnd.choice(fragmentos) for _ in range(rnd.randint(0, 8))) for _ in range(n)]
+
+def test_clasificador_compilado():
+    for valor in CASOS_LABORATORIO + textos_aleatorios():
+        assert normalizar_laboratorio(valor) == normalizar_laboratorio_original(valor), valor
+
+def test_clasificador_vectorizado():
+    valores = [v for v in CASOS_LABORATORIO + textos_aleatorios()]
+    esperado = [normalizar_laboratorio_original(v) for v in valores]
+    obtenido = (
+        pl.Series('v', valores, dtype=pl.Utf8).to_frame()
+        .select(normalizar_laboratorio_expr(pl.col('v')).alias('v'))['v'].to_list()
+    )
+    diferencias = [(v, e, o) for v, e, o in zip(valores, esperado, obtenido) if e != o]
+    assert not diferencias, diferencias[:10]
+
+if __name__ == "__main__":
+    test_clasificador_compilado()
+    test_clasificador_vectorizado()
+    print("✅ Clasificador de laboratorio equivalente a la implementación original")
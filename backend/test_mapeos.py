@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Pruebas del registro de tablas de normalización: carga desde los archivos,
+recarga con cambios y re-normalización de solo las filas afectadas.
+"""
+
+import json
+import os
+import shutil
+import sys
+import tempfile
+
+import polars as pl
+
+# Agregar el directorio del proyecto al path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.core.config import settings
+from app.data.processors.mapeos import TABLAS, cargar_tablas, diferencias, recargar, tablas
+from app.data.processors.localidad_processor import normalizar_localidad
+from app.data.processors.dengue_processor import DengueDataProcessor
+
+def copiar_tablas(destino: str, **cambios):
+    '''Copia los archivos vigentes a destino aplicando cambios[tabla] sobre su mapeo.'''
+    for tabla in TABLAS:
+        origen = os.path.join(settings.RUTA_MAPEOS, f'{tabla}.json')
+        with open(origen, encoding='utf-8') as archivo:
+            contenido = json.load(archivo)
+        if tabla in cambios:
+            contenido['version'] += 1
+            contenido['mapeo'].update(cambios[tabla])
+        with open(os.path.join(destino, f'{tabla}.json'), 'w', encoding='utf-8') as archivo:
+            json.dump(contenido, archivo, ensure_ascii=False)
+
+def test_carga():
+    vigentes = tablas()
+    assert vigentes.localidades['CAP'] == 'SANTIAGO DEL ESTERO'
+    assert set(vigentes.describir()['tablas']) == set(TABLAS)
+    assert cargar_tablas().version == vigentes.version
+
+def test_archivo_invalido():
+    ruta = tempfile.mkdtemp()
+    try:
+        copiar_tablas(ruta)
+        with open(os.path.join(ruta, 'departamentos.json'), 'w', encoding='utf-8') as archivo:
+            json.dump({'version': 2, 'mapeo': {'CAP': 1}}, archivo)
+        try:
+            recargar(ruta)
+            assert False, 'Debió rechazar la tabla'
+        except ValueError:
+            pass
+        assert tablas().departamentos['CAP'] == 'CAPITAL'
+    finally:
+        shutil.rmtree(ruta)
+
+def test_recarga_y_renormalizacion():
+    processor = DengueDataProcessor(max_workers=1)
+    crudo = pl.DataFrame({'localidad': ['Villa Nueva', 'CAP', 'La Banda', 'Villa Nueva', None]})
+    df = crudo.with_columns(
+        pl.col('localidad').map_elements(normalizar_localidad, return_dtype=pl.Utf8).alias('localidad_normalizada')
+    )
+    assert df['localidad_normalizada'][0] == 'VILLA NUEVA'
+
+    anteriores = tablas()
+    ruta = tempfile.mkdtemp()
+    try:
+        copiar_tablas(ruta, localidades={'VILLA NUEVA': 'LA BANDA'})
+        cambios = recargar(ruta)
+        assert cambios == {'localidades': {'VILLA NUEVA'}}
+        assert diferencias(anteriores, tablas()) == cambios
+        assert tablas().version != anteriores.version
+
+        actualizado = processor.renormalizar(df, cambios)
+        assert actualizado['localidad_normalizada'].to_list() == [
+            'LA BANDA', 'SANTIAGO DEL ESTERO', 'LA BANDA', 'LA BANDA', None
+        ]
+        assert normalizar_localidad('Villa Nueva') == 'LA BANDA'
+    finally:
+        shutil.rmtree(ruta)
+        recargar(settings.RUTA_MAPEOS)
+        processor.cerrar()
+
+    assert tablas().version == anteriores.version
+    assert normalizar_localidad('Villa Nueva') == 'VILLA NUEVA'
+
+if __name__ == '__main__':
+    test_carga()
+    test_archivo_invalido()
+    test_recarga_y_renormalizacion()
+    print('OK')
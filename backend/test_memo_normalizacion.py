@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Pruebas del memo LRU de los normalizadores: estadísticas, límite de tamaño,
+invalidación al cambiar los mapeos y siembra entre procesos.
+"""
+
+import sys
+import os
+
+# Agregar el directorio del proyecto al path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.data.processors.memo import NormalizadorMemoizado, firma_mapeos
+from app.data.processors.localidad_processor import normalizar_localidad
+
+def test_hits_y_misses():
+    memo = NormalizadorMemoizado('prueba', normalizar_localidad, lambda: firma_mapeos([{}]))
+    for valor in ['CAP', 'LA BANDA', 'CAP', 'CAP', None]:
+        assert memo(valor) == normalizar_localidad(valor)
+
+    stats = memo.estadisticas()
+    assert stats['hits'] == 2
+    assert stats['misses'] == 3
+    assert stats['size'] == 3
+
+def test_limite_lru():
+    memo = NormalizadorMemoizado('prueba', str.upper, lambda: firma_mapeos([{}]), max_size=2)
+    memo('a')
+    memo('b')
+    memo('a')  # 'a' pasa a ser el más reciente
+    memo('c')  # desaloja a 'b'
+    assert list(memo.exportar()) == ['a', 'c']
+
+def test_invalidacion_por_mapeo():
+    mapeo = {'X': 'EQUIS'}
+    memo = NormalizadorMemoizado('prueba', lambda v: mapeo.get(v, v), lambda: firma_mapeos([mapeo]))
+    assert memo('X') == 'EQUIS'
+    assert not memo.verificar()
+
+    mapeo['X'] = 'OTRA'
+    assert memo.verificar()
+    assert memo.estadisticas()['size'] == 0
+    assert memo('X') == 'OTRA'
+
+def test_siembra():
+    mapeo = {'X': 'EQUIS'}
+    origen = NormalizadorMemoizado('prueba', lambda v: mapeo.get(v, v), lambda: firma_mapeos([mapeo]))
+    origen('X')
+    origen('Y')
+
+    destino = NormalizadorMemoizado('prueba', lambda v: mapeo.get(v, v), lambda: firma_mapeos([mapeo]))
+    destino.sembrar(origen.exportar(), origen.firma)
+    assert destino.estadisticas()['size'] == 2
+
+    otro = NormalizadorMemoizado('prueba', lambda v: v, lambda: firma_mapeos([{'X': 'OTRA'}]))
+    otro.sembrar(origen.exportar(), origen.firma)
+    assert otro.estadisticas()['size'] == 0
+
+def test_firma_estable():
+    assert firma_mapeos([{'a': '1', 'b': '2'}]) == firma_mapeos([{'b': '2', 'a': '1'}])
+    assert firma_mapeos([{'a': '1'}]) != firma_mapeos([{'a': '2'}])
+
+if __name__ == '__main__':
+    test_hits_y_misses()
+    test_limite_lru()
+    test_invalidacion_por_mapeo()
+    test_siembra()
+    test_firma_estable()
+    print('OK')
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Pruebas del transporte de columnas por memoria compartida usado por el pool
+de normalización.
+"""
+
+import sys
+import os
+from multiprocessing.shared_memory import SharedMemory
+
+# Agregar el directorio del proyecto al path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.data.processors.memoria_compartida import leer_columna, liberar, publicar_columna, recibir_columna
+from app.data.processors.dengue_processor import (
+    DengueDataProcessor,
+    procesar_chunk_compartido,
+    procesar_chunk_localidades
+)
+
+VALORES = ['CAP', None, 'LA BANDA', '', 'AÑATUYA', 'N§', 'TERMAS DE RÍO HONDO', None]
+
+def test_lectura_por_rangos():
+    descriptor = publicar_columna(VALORES)
+    try:
+        assert leer_columna(descriptor) == VALORES
+        assert leer_columna(descriptor, 1, 5) == VALORES[1:5]
+        assert leer_columna(descriptor, 7, 8) == [None]
+    finally:
+        liberar(descriptor)
+
+def test_columna_vacia():
+    descriptor = publicar_columna([])
+    assert recibir_columna(descriptor) == []
+
+def test_recibir_libera_segmento():
+    descriptor = publicar_columna(VALORES)
+    assert recibir_columna(descriptor) == VALORES
+    try:
+        SharedMemory(name=descriptor.nombre).close()
+        assert False, 'el segmento debería haberse liberado'
+    except FileNotFoundError:
+        pass
+
+def test_chunk_compartido():
+    descriptor = publicar_columna(VALORES)
+    try:
+        descriptor_resultado, cpu = procesar_chunk_compartido(procesar_chunk_localidades, descriptor, 2, 7)
+        resultado = recibir_columna(descriptor_resultado)
+    finally:
+        liberar(descriptor)
+    assert resultado == procesar_chunk_localidades(VALORES[2:7])
+
+def test_error_no_deja_segmentos():
+    # Un error por chunk se reemplaza por DESCONOCIDO; lo que corta el bucle es algo como una interrupción
+    class Interrupcion(BaseException):
+        pass
+
+    class MemoRoto:
+        def actualizar(self, chunk, resultado):
+            raise Interrupcion()
+
+    processor = DengueDataProcessor(max_workers=2, chunk_size=2, estrategia='procesos')
+    antes = set(os.listdir('/dev/shm'))
+    try:
+        processor._procesar_columnas_paralelo({'localidad_normalizada': (VALORES, procesar_chunk_localidades, MemoRoto(), 2)})
+        assert False, 'Debió propagar el error'
+    except Interrupcion:
+        pass
+    finally:
+        # Espera a los chunks en curso: al terminar liberan su resultado
+        processor.cerrar()
+    assert set(os.listdir('/dev/shm')) <= antes
+
+if __name__ == '__main__':
+    test_lectura_por_rangos()
+    test_columna_vacia()
+    test_recibir_libera_segmento()
+    test_chunk_compartido()
+    test_error_no_deja_segmentos()
+    print('OK')
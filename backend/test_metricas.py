@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Pruebas del registro de métricas del pipeline: etapas, ejecuciones anidadas,
+cola del pool y exportación.
+"""
+
+import logging
+import sys
+import os
+
+# Agregar el directorio del proyecto al path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.core.metricas import RegistroMetricas
+
+def test_etapas_acumuladas():
+    registro = RegistroMetricas()
+    for _ in range(3):
+        with registro.etapa('lectura', filas=10) as etapa:
+            etapa.bytes = 100
+    etapas = registro.instantanea()['etapas']
+    assert etapas['lectura']['llamadas'] == 3
+    assert etapas['lectura']['filas'] == 30
+    assert etapas['lectura']['bytes'] == 300
+    assert etapas['lectura']['ultima']['filas'] == 10
+
+def test_ejecucion_anidada():
+    registro = RegistroMetricas()
+    with registro.ejecucion('externa') as datos:
+        with registro.etapa('lectura', filas=5):
+            pass
+        with registro.ejecucion('interna'):
+            with registro.etapa('normalizacion', filas=5):
+                pass
+            with registro.etapa('normalizacion', filas=5):
+                pass
+        datos['extra'] = 1
+    # Fuera de una ejecución la etapa solo se acumula
+    with registro.etapa('suelta'):
+        pass
+
+    ultima = registro.instantanea()['ultima_ejecucion']
+    assert ultima['ejecucion'] == 'externa'
+    assert ultima['extra'] == 1
+    assert set(ultima['etapas']) == {'lectura', 'normalizacion'}
+    assert ultima['etapas']['normalizacion']['filas'] == 10
+
+def test_registro_de_log():
+    registros = []
+    class Capturar(logging.Handler):
+        def emit(self, record):
+            registros.append(record)
+    handler = Capturar()
+    logger = logging.getLogger('app.core.metricas')
+    nivel = logger.level
+    logger.addHandler(handler)
+    logger.setLevel(logging.INFO)
+    try:
+        registro = RegistroMetricas()
+        with registro.ejecucion('prueba', filas=1):
+            pass
+    finally:
+        logger.removeHandler(handler)
+        logger.setLevel(nivel)
+    assert registros[-1].metricas['ejecucion'] == 'prueba'
+
+def test_cola_pool_y_prometheus():
+    registro = RegistroMetricas()
+    registro.encolar()
+    registro.encolar()
+    registro.desencolar(None)
+    pool = registro.instantanea()['pool']
+    assert pool == {'cola': 1, 'cola_max': 2}
+
+    with registro.etapa('to_dicts', filas=4):
+        pass
+    texto = registro.exportar_prometheus()
+    assert 'dengue_etapa_filas_total{etapa="to_dicts"} 4' in texto
+    assert 'dengue_pool_cola 1' in texto
+
+if __name__ == '__main__':
+    test_etapas_acumuladas()
+    test_ejecucion_anidada()
+    test_registro_de_log()
+    test_cola_pool_y_prometheus()
+    print('OK')
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Pruebas de la planificación de la normalización: CPUs según el cgroup,
+elección de estrategia por columna y tamaño de chunk.
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+
+# Agregar el directorio del proyecto al path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.core.config import settings
+from app.data.processors.planificacion import (
+    CostosNormalizacion,
+    _cuota_cgroup,
+    elegir_estrategia
+)
+
+def escribir(ruta: str, contenido: str):
+    os.makedirs(os.path.dirname(ruta), exist_ok=True)
+    with open(ruta, 'w') as archivo:
+        archivo.write(contenido)
+
+def test_cuota_cgroup():
+    raiz = tempfile.mkdtemp()
+    try:
+        assert _cuota_cgroup(raiz) is None
+        escribir(os.path.join(raiz, 'cpu', 'cpu.cfs_quota_us'), '150000\n')
+        escribir(os.path.join(raiz, 'cpu', 'cpu.cfs_period_us'), '100000\n')
+        assert _cuota_cgroup(raiz) == 1.5
+        # cgroup v2 tiene prioridad
+        escribir(os.path.join(raiz, 'cpu.max'), 'max 100000\n')
+        assert _cuota_cgroup(raiz) is None
+        escribir(os.path.join(raiz, 'cpu.max'), '200000 100000\n')
+        assert _cuota_cgroup(raiz) == 2.0
+    finally:
+        shutil.rmtree(raiz)
+
+def test_estrategia_por_trabajo():
+    # Poco trabajo: no conviene repartir
+    assert elegir_estrategia(100, 20e-6, cpus=8).modo == 'serial'
+    # Un solo CPU: siempre en el proceso principal
+    assert elegir_estrategia(1_000_000, 20e-6, cpus=1).modo == 'serial'
+    assert elegir_estrategia(100_000, 20e-6, cpus=8).modo == 'procesos'
+    assert elegir_estrategia(100_000, 20e-6, libera_gil=True, cpus=8).modo == 'hilos'
+    assert elegir_estrategia(100, 20e-6, forzada='procesos', cpus=8).modo == 'procesos'
+    # Las expresiones de Polars no ganan nada en otro proceso
+    assert elegir_estrategia(100, 20e-6, libera_gil=True, forzada='procesos', cpus=8).modo == 'hilos'
+    assert elegir_estrategia(100, 20e-6, libera_gil=True, forzada='serial', cpus=8).modo == 'serial'
+
+def test_tamanio_chunk():
+    estrategia = elegir_estrategia(100_000, 20e-6, cpus=4)
+    # 4 chunks por worker, con al menos OBJETIVO_SEGUNDOS_CHUNK de trabajo cada uno
+    assert estrategia.chunk_size == max(100_000 // (4 * settings.CHUNKS_POR_WORKER), 1000)
+    assert estrategia.workers == 4
+
+    # Valores caros: chunks más chicos, nunca por debajo del mínimo
+    caro = elegir_estrategia(100_000, 1e-3, cpus=4)
+    assert caro.chunk_size == max(settings.CHUNK_MINIMO, 100_000 // (4 * settings.CHUNKS_POR_WORKER))
+
+    # Pocos chunks: no se usan más workers que chunks
+    pocos = elegir_estrategia(5_000, 20e-6, cpus=8, chunk_size=2_000)
+    assert pocos.chunk_size == 2_000 and pocos.workers == 3
+
+def test_costos_promedio_movil():
+    costos = CostosNormalizacion(inicial=1e-5)
+    assert costos.costo('localidad') == 1e-5
+    costos.medir('localidad', 1.0, 1000)
+    assert costos.costo('localidad') == 1e-3
+    costos.medir('localidad', 0.0, 1000)  # mediciones vacías se ignoran
+    costos.medir('localidad', 2.0, 1000)
+    assert abs(costos.costo('localidad') - (0.7e-3 + 0.3 * 2e-3)) < 1e-12
+
+if __name__ == '__main__':
+    test_cuota_cgroup()
+    test_estrategia_por_trabajo()
+    test_tamanio_chunk()
+    test_costos_promedio_movil()
+    print('OK')
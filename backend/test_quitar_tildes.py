@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Prueba de equivalencia de quitar_tildes (tabla de str.translate) contra la
+versión anterior con NFKD sobre toda la cadena, con textos aleatorios.
+"""
+
+import random
+import sys
+import os
+import unicodedata
+
+import polars as pl
+
+# Agregar el directorio del proyecto al path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.data.processors.text_utils import quitar_tildes
+from app.data.processors.text_expr import quitar_tildes_expr
+
+def quitar_tildes_original(texto: str) -> str:
+    '''Versión anterior, con marcadores para proteger la Ñ.'''
+    if not isinstance(texto, str):
+        return str(texto)
+    
+    texto = texto.replace('ñ', '__enie__').replace('Ñ', '__ENIE__')
+    nfkd = unicodedata.normalize('NFKD', texto)
+    sin_tildes = ''.join(c for c in nfkd if not unicodedata.combining(c))
+    return sin_tildes.replace('__enie__', 'ñ').replace('__ENIE__', 'Ñ')
+
+def textos_aleatorios(n=20000, semilla=0):
+    '''Mezcla de texto típico de las tablas con caracteres de cualquier plano (sin surrogates).'''
+    frecuentes = list('ABCNÑñaáéíóúÁÉÍÓÚüÜ -.?§¤¥Ø°º') + ['́', '̃', '̧', 'ﬁ', 'ß', '가', '½', 'Å']
+    rnd = random.Random(semilla)
+    def caracter():
+        if rnd.random() < 0.7:
+            return rnd.choice(frecuentes)
+        codigo = rnd.randrange(0x110000 if rnd.random() < 0.2 else 0x3000)
+        return chr(codigo) if not 0xD800 <= codigo <= 0xDFFF else 'x'
+    return [''.join(caracter() for _ in range(rnd.randint(0, 16))) for _ in range(n)]
+
+def test_equivale_a_original():
+    valores = textos_aleatorios()
+    diferencias = [(v, quitar_tildes_original(v), quitar_tildes(v)) for v in valores if quitar_tildes_original(v) != quitar_tildes(v)]
+    assert not diferencias, diferencias[:10]
+    assert quitar_tildes(None) == quitar_tildes_original(None) == 'None'
+
+def test_expresion():
+    valores = textos_aleatorios(5000, semilla=1) + [None]
+    obtenido = pl.Series('v', valores, dtype=pl.Utf8).to_frame().select(quitar_tildes_expr(pl.col('v')))['v'].to_list()
+    assert obtenido == [None if v is None else quitar_tildes(v) for v in valores]
+
+def test_marcadores_literales():
+    # La versión anterior convertía un "__enie__" literal del texto en "ñ"
+    assert quitar_tildes('__enie__ Ñandú') == '__enie__ Ñandu'
+
+if __name__ == '__main__':
+    test_equivale_a_original()
+    test_expresion()
+    test_marcadores_literales()
+    print('OK')
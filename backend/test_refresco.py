@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Pruebas del refresco en segundo plano: primera construcción, reconstrucción
+al cambiar la huella sin hacer esperar a los pedidos y errores que no
+reemplazan lo ya construido.
+"""
+
+import asyncio
+import os
+import sys
+
+import pytest
+
+# Agregar el directorio del proyecto al path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.services.refresco import RefrescoDataset
+
+def test_refresco_sin_esperas(base, nuevo_servicio, generar_filas, esperar):
+    service = nuevo_servicio()
+    refresco = RefrescoDataset(service, intervalo=0.05)
+
+    async def escenario():
+        refresco.iniciar()
+        assert await refresco.esperar_listo(10)
+        assert refresco.estado()['refrescos'] == 1
+        assert (await service.obtener_kpis_basicos())['total_casos'] == 1000
+        version = refresco.version
+
+        # Sin cambios en la huella no se vuelve a leer la tabla
+        await asyncio.sleep(0.15)
+        assert len(base.lecturas) == 1
+        assert refresco.estado()['refrescos'] == 1
+
+        # Cambió la huella: mientras se reconstruye, los pedidos reciben lo anterior al instante
+        base.demora = 0.3
+        base.filas.extend(generar_filas(1100)[1000:])
+        await asyncio.sleep(0.1)
+        datos, version_servida = await asyncio.wait_for(service.obtener_datos_versionados(), 0.2)
+        assert len(datos) == 1000
+        assert version_servida == version
+
+        await esperar(lambda: refresco.refrescos == 2)
+        datos, version_servida = await service.obtener_datos_versionados()
+        assert len(datos) == 1100
+        assert version_servida == refresco.version != version
+        assert await service.version_vigente() == refresco.version
+        assert (await service.obtener_kpis_basicos())['total_casos'] == 1100
+        assert refresco.estado()['ultima_duracion_segundos'] >= 0.3
+        await refresco.detener()
+        assert not refresco.estado()['activo']
+
+    asyncio.run(escenario())
+
+def test_error_conserva_lo_construido(base, nuevo_servicio, generar_filas, esperar):
+    service = nuevo_servicio()
+    refresco = RefrescoDataset(service, intervalo=0.05)
+
+    async def escenario():
+        refresco.iniciar()
+        assert await refresco.esperar_listo(10)
+
+        base.falla = True
+        base.filas.extend(generar_filas(1010)[1000:])
+        await esperar(lambda: refresco.errores >= 1)
+        estado = refresco.estado()
+        assert 'ConnectionError' in estado['ultimo_error']
+        assert len(await service.obtener_datos_procesados()) == 1000
+
+        base.falla = False
+        await esperar(lambda: refresco.refrescos == 2)
+        assert len(await service.obtener_datos_procesados()) == 1010
+        await refresco.detener()
+
+    asyncio.run(escenario())
+
+if __name__ == '__main__':
+    sys.exit(pytest.main(['-q', __file__]))
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Pruebas de la sincronización incremental por marca de agua: la condición
+id OR created_at del WHERE, el reemplazo de filas que vuelven a llegar y
+el delta vacío que devuelve el dataset en memoria.
+"""
+
+import asyncio
+import os
+import sys
+from datetime import datetime, timedelta
+
+import pytest
+
+# Agregar el directorio del proyecto al path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.data.repositories.laboratorio_dengue_repository import _construir_where
+
+INICIO = datetime(2024, 1, 1)
+
+def con_created_at(filas: list) -> list:
+    '''created_at creciente con el id (la última columna del repositorio).'''
+    return [fila[:-1] + (INICIO + timedelta(minutes=fila[0]),) for fila in filas]
+
+def test_where_marca_de_agua():
+    where, parametros = _construir_where(desde_id=10, desde_created_at=INICIO)
+    # Una fila vieja que se modificó (created_at nuevo) también entra
+    assert '(id > :desde_id OR created_at > :desde_created_at)' in where
+    assert parametros == {'desde_id': 10, 'desde_created_at': INICIO}
+
+    where, parametros = _construir_where(desde_id=10)
+    assert '(id > :desde_id)' in where and 'created_at' not in where
+
+def test_marca_de_agua_y_fusion(base, nuevo_servicio, generar_filas, monkeypatch):
+    base.filas = con_created_at(base.filas)
+    service = nuevo_servicio()
+
+    async def escenario():
+        df = await service.sincronizar_datos()
+        assert df.height == 1000
+        assert (service._ultimo_id, service._ultimo_created_at) == (1000, INICIO + timedelta(minutes=1000))
+
+        # Altas: solo se leen las posteriores a la marca de agua
+        base.filas.extend(con_created_at(generar_filas(1010)[1000:]))
+        assert (await service.sincronizar_datos()).height == 1010
+        assert base.lecturas == [None, 1000]
+        assert service._ultimo_id == 1010
+
+        # Una fila ya sincronizada vuelve a llegar por su created_at: se reemplaza, no se duplica
+        modificada = INICIO + timedelta(days=30)
+        base.filas[4] = base.filas[4][:4] + ('LA BANDA',) + base.filas[4][5:-1] + (modificada,)
+        df = await service.sincronizar_datos()
+        assert df.height == 1010 and df['id'].n_unique() == 1010
+        assert df.filter(df['id'] == 5)['localidad_normalizada'].to_list() == ['LA BANDA']
+        assert (service._ultimo_id, service._ultimo_created_at) == (1010, modificada)
+
+        # Delta vacío: se devuelve el dataset en memoria sin procesar nada
+        monkeypatch.setattr(service.processor, 'procesar_datos_paralelo', lambda *args: pytest.fail('No debía procesar'))
+        assert await service.sincronizar_datos() is df
+        assert base.lecturas[-1] == 1010
+
+    asyncio.run(escenario())
+
+if __name__ == '__main__':
+    sys.exit(pytest.main(['-q', __file__]))
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Prueba dorada: los normalizadores vectorizados (text_expr) deben devolver
+exactamente lo mismo que las funciones escalares.
+"""
+
+import random
+import sys
+import os
+
+import polars as pl
+
+# Agregar el directorio del proyecto al path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.data.processors.text_utils import clave_canonica, limpiar_basico, quitar_tildes
+from app.data.processors.mapeos import tablas
+from app.data.processors.localidad_processor import normalizar_localidad
+from app.data.processors.departamento_processor import normalizar_departamento
+from app.data.processors.establecimiento_processor import (
+    limpiar_establecimiento,
+    normalizar_establecimiento_notificador
+)
+from app.data.processors.text_expr import (
+    clave_canonica_expr,
+    limpiar_basico_expr,
+    limpiar_establecimiento_expr,
+    normalizar_departamento_expr,
+    normalizar_establecimiento_expr,
+    normalizar_localidad_expr,
+    quitar_tildes_expr
+)
+
+def variantes(valores):
+    """Valores de las tablas más las variantes sucias que llegan desde la base."""
+    casos = [None, '', '   ', '-', 'ñandú', '__enie__', 'n?', 'Ñ́']
+    for valor in valores:
+        casos.extend([
+            valor,
+            valor.lower(),
+            f'  {valor}  ',
+            valor.replace(' ', '\t\t '),
+            valor.replace('A', 'Á').replace('O', 'ó'),
+            valor.replace('Ñ', 'N?'),
+            valor + '\x1c',
+        ])
+    return casos
+
+def textos_aleatorios(n=3000, semilla=0):
+    alfabeto = list('ABCNOPRUaeinou -.?§¤¥Ø°º/ÁÉÍÓÚáéíóúÑñÜü\t \x1c12') + ['́', '̃', 'ﬁ', 'ß', 'UPA', 'NRO']
+    rnd = random.Random(semilla)
+    return [''.join(rnd.choice(alfabeto) for _ in range(rnd.randint(0, 12))) for _ in range(n)]
+
+def comparar(valores, escalar, vectorizada):
+    esperado = [escalar(v) for v in valores]
+    obtenido = pl.Series('v', valores, dtype=pl.Utf8).to_frame().select(vectorizada(pl.col('v')).alias('v'))['v'].to_list()
+    diferencias = [(v, e, o) for v, e, o in zip(valores, esperado, obtenido) if e != o]
+    assert not diferencias, diferencias[:10]
+
+def test_localidades_golden():
+    valores = variantes(list(tablas().localidades) + list(tablas().localidades.values()))
+    comparar(valores, normalizar_localidad, normalizar_localidad_expr)
+
+def test_departamentos_golden():
+    valores = variantes(list(tablas().departamentos) + list(tablas().departamentos.values()))
+    comparar(valores, normalizar_departamento, normalizar_departamento_expr)
+
+def test_establecimientos_golden():
+    valores = variantes(
+        list(tablas().establecimientos) + list(tablas().establecimientos.values()) + list(tablas().alias_previos)
+    )
+    comparar(valores, normalizar_establecimiento_notificador, normalizar_establecimiento_expr)
+
+def test_textos_aleatorios():
+    valores = textos_aleatorios()
+    comparar(valores, quitar_tildes, quitar_tildes_expr)
+    comparar(valores, clave_canonica, clave_canonica_expr)
+    comparar(valores, limpiar_basico, limpiar_basico_expr)
+    comparar([v for v in valores if v.strip()], limpiar_establecimiento, limpiar_establecimiento_expr)
+    comparar(valores, normalizar_localidad, normalizar_localidad_expr)
+    comparar(valores, normalizar_departamento, normalizar_departamento_expr)
+    comparar(valores, normalizar_establecimiento_notificador, normalizar_establecimiento_expr)
+
+if __name__ == "__main__":
+    test_localidades_golden()
+    test_departamentos_golden()
+    test_establecimientos_golden()
+    test_textos_aleatorios()
+    print("✅ Normalizadores vectorizados idénticos a los escalares")
@@ -6,6 +6,53 @@ import logging
 
 logger = logging.getLogger(__name__)
 
+# Formatos de fecha conocidos, en orden de prioridad
+FORMATOS_FECHA = ['%Y-%m-%d', '%d/%m/%Y', '%Y/%m/%d']
+
+# Columna -> formatos ordenados (el dominante primero), persiste entre recargas
+_formatos_por_columna: Dict[str, List[str]] = {}
+
+def _detectar_formatos(serie: pl.Series, tamanio_muestra: int = 1000) -> List[str]:
+    muestra = serie.drop_nulls()
+    if muestra.len() > tamanio_muestra:
+        muestra = muestra.sample(tamanio_muestra, seed=0)
+    aciertos = {
+        formato: muestra.str.strptime(pl.Date, format=formato, strict=False).is_not_null().sum()
+        for formato in FORMATOS_FECHA
+    }
+    return sorted(FORMATOS_FECHA, key=lambda formato: -aciertos[formato])
+
+def parsear_fechas(serie: pl.Series, columna: str) -> pl.Series:
+    '''
+    Convierte una columna de fechas en texto a pl.Date: se parsea una sola vez
+    con el formato dominante (detectado sobre una muestra y cacheado por
+    columna) y solo el residuo pasa por los demás formatos.
+    '''
+    if serie.dtype == pl.Date:
+        return serie
+    if serie.dtype != pl.Utf8:
+        return serie.cast(pl.Date, strict=False)
+    
+    if columna not in _formatos_por_columna:
+        _formatos_por_columna[columna] = _detectar_formatos(serie)
+    formatos = _formatos_por_columna[columna]
+    fechas = serie.str.strptime(pl.Date, format=formatos[0], strict=False)
+    
+    residuo = fechas.is_null() & serie.is_not_null()
+    if not residuo.any():
+        return fechas
+    if residuo.sum() > serie.len() / 2:
+        # El formato cacheado dejó de ser el dominante
+        del _formatos_por_columna[columna]
+    
+    indices = residuo.arg_true()
+    restantes = serie.gather(indices)
+    alternativas = pl.select(pl.coalesce(
+        [pl.lit(restantes).str.strptime(pl.Date, format=formato, strict=False) for formato in formatos[1:]]
+        + [pl.lit(restantes).cast(pl.Date, strict=False)]
+    )).to_series()
+    return fechas.scatter(indices, alternativas)
+
 class DengueAnalyzer:
     def __init__(self, df: pl.DataFrame):
         self.df = df
@@ -49,14 +96,9 @@ class DengueAnalyzer:
             for col in date_columns:
                 if col in df_cleaned.columns:
                     try:
-                        df_cleaned = df_cleaned.with_columns([
-                            pl.coalesce([
-                                pl.col(col).str.strptime(pl.Date, format='%Y-%m-%d', strict=False),
-                                pl.col(col).str.strptime(pl.Date, format='%d/%m/%Y', strict=False),
-                                pl.col(col).str.strptime(pl.Date, format='%Y/%m/%d', strict=False),
-                                pl.col(col).cast(pl.Date, strict=False)
-                            ]).alias(f'{col}_parsed')
-                        ])
+                        df_cleaned = df_cleaned.with_columns(
+                            parsear_fechas(df_cleaned[col], col).alias(f'{col}_parsed')
+                        )
                     except Exception as date_error:
                         logger.warning(f"Error procesando fecha {col}: {date_error}")
             
@@ -301,11 +343,7 @@ class DengueAnalyzer:
                 try:
                     # Procesar fecha_recepcion string usando Polars
                     df_with_dates = self.df.with_columns(
-                        pl.coalesce([
-                            pl.col('fecha_recepcion').str.strptime(pl.Date, format='%Y-%m-%d', strict=False),
-                            pl.col('fecha_recepcion').str.strptime(pl.Date, format='%d/%m/%Y', strict=False),
-                            pl.col('fecha_recepcion').str.strptime(pl.Date, format='%Y/%m/%d', strict=False)
-                        ]).alias('fecha_parsed')
+                        parsear_fechas(self.df['fecha_recepcion'], 'fecha_recepcion').alias('fecha_parsed')
                     )
                     
                     casos_mensuales = (
@@ -5,7 +5,7 @@ import streamlit as st
 import pandas as pd
 import plotly.express as px
 import numpy as np
-from utils.data_fetcher import fetch_dengue_data
+from shared_filters import load_filtered_data
 
 # Configuración de la página
 st.set_page_config(
@@ -21,12 +21,12 @@ def main():
     
     # Obtener datos
     try:
-        df = fetch_dengue_data()
+        df = load_filtered_data()
         if df is None or len(df) == 0:
             st.error("No se pudieron obtener datos del backend")
             return
         
-        st.info(f"Analizando {len(df):,} registros totales")
+        st.info(f"Analizando {len(df):,} registros")
         
         show_laboratory_page(df)
         
@@ -3,8 +3,9 @@ Filtros compartidos para todas las páginas del dashboard
 """
 import streamlit as st
 import pandas as pd
-from datetime import datetime
+from datetime import date, datetime
 from typing import Dict, Any, Optional
+from utils.data_fetcher import AGE_GROUP_LABELS, fetch_dengue_data, fetch_filter_options
 
 class FilterManager:
     """Gestor de filtros compartidos entre páginas"""
@@ -12,8 +13,12 @@ class FilterManager:
     def __init__(self):
         self.filters = {}
     
-    def create_sidebar_filters(self, df: pd.DataFrame) -> Dict[str, Any]:
-        """Crear filtros en la sidebar que persistan entre páginas"""
+    def create_sidebar_filters(self, options: Dict[str, Any]) -> Dict[str, Any]:
+        """Crear filtros en la sidebar que persistan entre páginas.
+
+        Las opciones vienen de /laboratorio-dengue/filtros (ver fetch_filter_options),
+        así no hace falta bajar todos los datos para armarlos.
+        """
         
         st.sidebar.markdown("---")
         st.sidebar.subheader(" Filtros")
@@ -21,9 +26,9 @@ class FilterManager:
         filters = {}
         
         # Filtro de fechas
-        if 'fecha_recepcion' in df.columns and df['fecha_recepcion'].notna().any():
-            min_date = df['fecha_recepcion'].min().date() if df['fecha_recepcion'].notna().any() else datetime.now().date()
-            max_date = df['fecha_recepcion'].max().date() if df['fecha_recepcion'].notna().any() else datetime.now().date()
+        if options.get('fecha_recepcion_min') and options.get('fecha_recepcion_max'):
+            min_date = date.fromisoformat(options['fecha_recepcion_min'])
+            max_date = date.fromisoformat(options['fecha_recepcion_max'])
             
             # Usar session state para persistir el valor
             if 'filter_date_range' not in st.session_state:
@@ -37,15 +42,17 @@ class FilterManager:
                 key='filter_date_input'
             )
             
+            # El rango completo no filtra: no se manda al backend
             if isinstance(date_range, tuple) and len(date_range) == 2:
-                filters['date_range'] = date_range
                 st.session_state.filter_date_range = date_range
+                if date_range != (min_date, max_date):
+                    filters['date_range'] = date_range
             elif len(date_range) == 1:
-                filters['date_range'] = (date_range, date_range)
+                filters['date_range'] = (date_range[0], date_range[0])
         
         # Filtro de localidades
-        if 'localidad_normalizada' in df.columns:
-            localidades = ['Todas'] + sorted([loc for loc in df['localidad_normalizada'].dropna().unique() if pd.notna(loc)])
+        if options.get('localidad'):
+            localidades = ['Todas'] + options['localidad']
             
             selected_localidad = st.sidebar.selectbox(
                 "🏘️ Localidad",
@@ -55,8 +62,8 @@ class FilterManager:
             filters['localidad'] = selected_localidad
         
         # Filtro de departamentos
-        if 'departamento_normalizado' in df.columns:
-            departamentos = ['Todos'] + sorted([dep for dep in df['departamento_normalizado'].dropna().unique() if pd.notna(dep)])
+        if options.get('departamento'):
+            departamentos = ['Todos'] + options['departamento']
             
             selected_departamento = st.sidebar.selectbox(
                 " Departamento",
@@ -65,9 +72,9 @@ class FilterManager:
             )
             filters['departamento'] = selected_departamento
         
-        # Filtro de grupos etarios
-        if 'grupo_etario' in df.columns:
-            grupos = ['Todos'] + sorted([grupo for grupo in df['grupo_etario'].dropna().astype(str).unique() if pd.notna(grupo)])
+        # Filtro de grupos etarios (se calculan en el frontend, ver clean_data_original_style)
+        if options:
+            grupos = ['Todos'] + AGE_GROUP_LABELS
             
             selected_grupo = st.sidebar.selectbox(
                 " Grupo Etario",
@@ -77,8 +84,8 @@ class FilterManager:
             filters['grupo_etario'] = selected_grupo
         
         # Filtro de resultado RT-PCR
-        if 'rt_pcr_tiempo_real_dengue_normalizado' in df.columns:
-            pcr_options = ['Todos'] + sorted([pcr for pcr in df['rt_pcr_tiempo_real_dengue_normalizado'].dropna().unique() if pd.notna(pcr)])
+        if options.get('resultado_pcr'):
+            pcr_options = ['Todos'] + options['resultado_pcr']
             
             selected_pcr = st.sidebar.selectbox(
                 " Resultado RT-PCR",
@@ -87,11 +94,29 @@ class FilterManager:
             )
             filters['pcr_result'] = selected_pcr
         
-        # Mostrar resumen de filtros aplicados
-        self._show_filter_summary(filters, df)
-        
         return filters
     
+    def to_query_params(self, filters: Dict[str, Any]) -> Dict[str, str]:
+        """Traducir filtros a parámetros del endpoint /procesados para filtrar en el backend"""
+        params = {}
+        
+        if 'date_range' in filters and len(filters['date_range']) == 2:
+            start_date, end_date = filters['date_range']
+            params['fecha_desde'] = start_date.isoformat()
+            params['fecha_hasta'] = end_date.isoformat()
+        
+        if filters.get('localidad') and filters['localidad'] != 'Todas':
+            params['localidad'] = filters['localidad']
+        
+        if filters.get('departamento') and filters['departamento'] != 'Todos':
+            params['departamento'] = filters['departamento']
+        
+        if filters.get('pcr_result') and filters['pcr_result'] != 'Todos':
+            params['resultado_pcr'] = filters['pcr_result']
+        
+        # grupo_etario se calcula en el frontend y se sigue filtrando con apply_filters
+        return params
+    
     def apply_filters(self, df: pd.DataFrame, filters: Dict[str, Any]) -> pd.DataFrame:
         """Aplicar filtros al dataframe"""
         filtered_df = df.copy()
@@ -127,19 +152,16 @@ class FilterManager:
         
         return filtered_df
     
-    def _show_filter_summary(self, filters: Dict[str, Any], original_df: pd.DataFrame):
+    def show_filter_summary(self, filters: Dict[str, Any], filtered_df: pd.DataFrame, total_available: Optional[int] = None):
         """Mostrar resumen de filtros aplicados"""
         st.sidebar.markdown("---")
         st.sidebar.subheader(" Resumen de Filtros")
         
-        # Aplicar filtros para contar registros
-        filtered_df = self.apply_filters(original_df, filters)
-        
-        # Mostrar conteos
-        total_original = len(original_df)
+        # Mostrar conteos (el total disponible lo informa /filtros)
         total_filtered = len(filtered_df)
+        total_original = total_available or total_filtered
         
-        if total_filtered != total_original:
+        if total_original and total_filtered != total_original:
             reduction_pct = ((total_original - total_filtered) / total_original) * 100
             st.sidebar.metric(
                 "Registros Mostrados", 
@@ -177,6 +199,22 @@ def get_filter_manager() -> FilterManager:
         st.session_state.filter_manager = FilterManager()
     return st.session_state.filter_manager
 
+def load_filtered_data() -> Optional[pd.DataFrame]:
+    """Crear los filtros en la sidebar y pedir al backend solo los datos de la selección"""
+    filter_manager = get_filter_manager()
+    options = fetch_filter_options() or {}
+    filters = filter_manager.create_sidebar_filters(options)
+    
+    # Fechas, localidad, departamento y PCR se filtran en el backend
+    df = fetch_dengue_data(filter_manager.to_query_params(filters))
+    if df is None:
+        return None
+    
+    # grupo_etario se calcula en el frontend
+    df = filter_manager.apply_filters(df, filters)
+    filter_manager.show_filter_summary(filters, df, options.get('total_casos'))
+    return df
+
 def show_data_quality_info(df: pd.DataFrame):
     """Mostrar información de calidad de datos en sidebar"""
     st.sidebar.markdown("---")
@@ -1,7 +1,7 @@
 import streamlit as st
 import pandas as pd
 import plotly.express as px
-from utils.data_fetcher import fetch_dengue_data
+from shared_filters import load_filtered_data
 import warnings
 warnings.filterwarnings('ignore')
 
@@ -20,7 +20,7 @@ def main():
     
     # Obtener y validar datos
     try:
-        df = fetch_dengue_data()
+        df = load_filtered_data()
         
         if df is None or len(df) == 0:
             st.error("❌ **Error:** No se pudieron obtener datos del backend")
@@ -33,7 +33,7 @@ def main():
                 st.rerun()
             return
         
-        st.info(f"Analizando {len(df):,} registros totales")
+        st.info(f"Analizando {len(df):,} registros")
         
         # Mostrar contenido del dashboard
         show_dashboard_content(df)
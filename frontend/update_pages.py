@@ -29,8 +29,7 @@ Página de {title} - Simple
 import streamlit as st
 import pandas as pd
 import plotly.express as px
-from utils.data_fetcher import fetch_dengue_data
-from shared_filters import FilterManager
+from shared_filters import load_filtered_data
 
 # Configuración de la página
 st.set_page_config(
@@ -46,19 +45,13 @@ def main():
     
     # Obtener datos
     try:
-        df = fetch_dengue_data()
+        # Filtros en la sidebar; el backend devuelve solo la selección
+        df = load_filtered_data()
         if df is None or len(df) == 0:
             st.error("No se pudieron obtener datos del backend")
             return
         
-        # Crear filtros en sidebar
-        filter_manager = FilterManager()
-        with st.sidebar:
-            filters = filter_manager.create_sidebar_filters(df)
-        
-        df_filtered = filter_manager.apply_filters(df, filters)
-        
-        {function_name}(df_filtered)
+        {function_name}(df)
         
     except Exception as e:
         st.error(f"Error: {{str(e)}}")
@@ -6,13 +6,47 @@ import os
 
 logger = logging.getLogger(__name__)
 
-@st.cache_data(ttl=300)
-def fetch_data():
+# Grupos etarios calculados en clean_data_original_style (también opciones del filtro)
+AGE_GROUP_BINS = [0, 10, 20, 30, 40, 50, 60, 70, 100]
+AGE_GROUP_LABELS = ['0-10', '11-20', '21-30', '31-40', '41-50', '51-60', '61-70', '71+']
+
+def get_backend_url():
+    # Usar variable de entorno o localhost por defecto
+    return os.getenv("BACKEND_URL", "http://localhost:8000")
+
+def fetch_version():
+    """Versión actual de los datos en el backend (una consulta mínima), o None si no responde"""
+    try:
+        response = requests.get(f"{get_backend_url()}/laboratorio-dengue/version", timeout=5)
+        response.raise_for_status()
+        return response.json().get("version")
+    except requests.exceptions.RequestException as e:
+        logger.warning(f"No se pudo obtener la versión de los datos: {e}")
+        return None
+
+def fetch_filter_options():
+    """Valores posibles de los filtros y rango de fechas, sin bajar los datos"""
+    return _fetch_filter_options(fetch_version())
+
+@st.cache_data(ttl=3600, max_entries=4)
+def _fetch_filter_options(version=None):
     try:
-        # Usar variable de entorno o localhost por defecto
-        backend_url = os.getenv("BACKEND_URL", "http://localhost:8000")
+        response = requests.get(f"{get_backend_url()}/laboratorio-dengue/filtros", timeout=30)
+        response.raise_for_status()
+        return response.json()
+    except requests.exceptions.RequestException as e:
+        logger.warning(f"No se pudieron obtener las opciones de filtro: {e}")
+        return None
+
+# La versión es parte de la clave del cache: datos nuevos en el backend invalidan
+# la entrada en la siguiente visita; el TTL queda solo como tope
+@st.cache_data(ttl=3600, max_entries=16)
+def fetch_data(params=None, version=None):
+    try:
+        backend_url = get_backend_url()
         
-        response = requests.get(f"{backend_url}/laboratorio-dengue/procesados", timeout=30)
+        # Los filtros (ver FilterManager.to_query_params) se resuelven en el backend
+        response = requests.get(f"{backend_url}/laboratorio-dengue/procesados", params=params, timeout=30)
         response.raise_for_status()
         
         data = response.json()
@@ -33,12 +67,15 @@ def fetch_data():
             
         return None
 
-@st.cache_data(ttl=300)
-def fetch_dengue_data():
+def fetch_dengue_data(params=None):
     """Función para obtener datos de dengue del backend y preprocesarlos"""
+    return _fetch_dengue_data(params, fetch_version())
+
+@st.cache_data(ttl=3600, max_entries=16)
+def _fetch_dengue_data(params=None, version=None):
     try:
         # Obtener datos raw del backend
-        data = fetch_data()
+        data = fetch_data(params, version)
         if data is None:
             return None
         
@@ -82,9 +119,7 @@ def clean_data_original_style(df):
         df['mes_anio_recepcion'] = df['fecha_recepcion'].dt.to_period('M').astype(str)
         df['sem_epid_recepcion'] = df['fecha_recepcion'].dt.isocalendar().week
     if 'edad' in df.columns:
-        bins = [0, 10, 20, 30, 40, 50, 60, 70, 100]
-        labels = ['0-10', '11-20', '21-30', '31-40', '41-50', '51-60', '61-70', '71+']
-        df['grupo_etario'] = pd.cut(df['edad'], bins=bins, labels=labels, right=False)
+        df['grupo_etario'] = pd.cut(df['edad'], bins=AGE_GROUP_BINS, labels=AGE_GROUP_LABELS, right=False)
     if 'localidad_normalizada' in df.columns:
         df['localidad_agrupada'] = df['localidad_normalizada']
     